@@ -0,0 +1,62 @@
+"""Compare the row-major and wavefront kernels for the Levenshtein cost matrix, and time ``align_strings``.
+
+The alignment functions use the wavefront kernel through the predecessor masks for strings with at least 128 tokens,
+so the ``align_strings`` timings show how much of the kernel speedup reaches the public API.
+
+Run with ``python benchmarks/cost_matrix.py`` after building the extension in release mode.
+"""
+
+import timeit
+
+import numpy as np
+from stringalign._stringutils import create_cost_matrix
+from stringalign.align import align_strings
+
+LENGTHS = [16, 32, 64, 128, 256, 512, 1000, 2000, 5000]
+DTYPES = ["uint16", "uint32", "uint64"]
+
+
+def make_pair(length: int, rng: np.random.Generator) -> tuple[np.ndarray, np.ndarray]:
+    """Create a reference with ``length`` tokens and a prediction with about 10% of the tokens replaced."""
+    reference = rng.integers(0, 40, length, dtype=np.uint32)
+    predicted = reference.copy()
+    replaced = rng.random(length) < 0.1
+    predicted[replaced] = rng.integers(0, 40, replaced.sum(), dtype=np.uint32)
+    return reference, predicted
+
+
+def time_kernel(reference: np.ndarray, predicted: np.ndarray, dtype: str, wavefront: bool) -> float:
+    """The fastest time of creating the cost matrix, in microseconds."""
+    number = max(1, 2_000_000 // (len(reference) * len(predicted)))
+    timer = timeit.Timer(lambda: create_cost_matrix(reference, predicted, dtype, wavefront=wavefront))
+    return min(timer.repeat(repeat=5, number=number)) / number * 1e6
+
+
+def time_align_strings(reference: np.ndarray, predicted: np.ndarray) -> float:
+    """The fastest time of aligning the tokens as strings with the Needleman-Wunsch engine, in microseconds."""
+    reference_string = "".join(chr(ord("a") + token) for token in reference)
+    predicted_string = "".join(chr(ord("a") + token) for token in predicted)
+    number = max(1, 2_000_000 // (len(reference) * len(predicted)))
+    timer = timeit.Timer(lambda: align_strings(reference_string, predicted_string, engine="needleman-wunsch"))
+    return min(timer.repeat(repeat=5, number=number)) / number * 1e6
+
+
+def main() -> None:
+    rng = np.random.default_rng(0)
+    print(f"{'dtype':>6} {'length':>6} {'row-major (us)':>15} {'wavefront (us)':>15} {'speedup':>8}")
+    for dtype in DTYPES:
+        for length in LENGTHS:
+            reference, predicted = make_pair(length, rng)
+            row_major = time_kernel(reference, predicted, dtype, wavefront=False)
+            wavefront = time_kernel(reference, predicted, dtype, wavefront=True)
+            print(f"{dtype:>6} {length:>6} {row_major:>15.1f} {wavefront:>15.1f} {row_major / wavefront:>8.2f}")
+
+    print()
+    print(f"{'length':>6} {'align_strings (us)':>19}")
+    for length in LENGTHS:
+        reference, predicted = make_pair(length, rng)
+        print(f"{length:>6} {time_align_strings(reference, predicted):>19.1f}")
+
+
+if __name__ == "__main__":
+    main()
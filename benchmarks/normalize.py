@@ -0,0 +1,82 @@
+"""Compare the normalization of every token in Python with the compiled normalization plan and the Rust tokenizer.
+
+Run with ``python benchmarks/normalize.py`` after building the extension in release mode. For each kind of text, the
+tokenization and the CER are timed with a tokenizer that runs every normalization step in Python for every token (the
+behaviour before the normalization plan), with the default tokenizer and with a tokenizer that does not normalize.
+"""
+
+import random
+import timeit
+import unicodedata
+
+from stringalign.evaluate import compute_ter
+from stringalign.normalize import (
+    StringNormalizer,
+    normalize_whitespace,
+    remove_non_word_characters,
+    remove_whitespace,
+)
+from stringalign.tokenize import GraphemeClusterTokenizer
+
+ALPHABETS = {
+    "ASCII": "abcdefghijklmnopqrstuvwxyz ABCDEFGHIJKLMNOPQRSTUVWXYZ .,0123456789",
+    "Latin-1": "abcdefghijklmnopqrstuvwxyz æøåéèêëïüöäßçñ ÆØÅÉÈÜÖÄÑ .,",
+    "emoji": "abcdef 🙂🐍🏳️‍🌈❤️‍🔥👍🏽🇳🇴 .,",
+}
+LENGTH = 2000
+
+
+class EveryStepNormalizer(StringNormalizer):
+    """Normalizer that applies every step, even the steps that cannot change the text."""
+
+    def __call__(self, text: str) -> str:
+        if self.case_insensitive:
+            text = text.casefold()
+        if self.normalization is not None:
+            text = unicodedata.normalize(self.normalization, text)
+        if self.case_insensitive:
+            text = text.casefold()
+        if self.normalize_whitespace:
+            text = normalize_whitespace(text)
+        if self.remove_whitespace:
+            text = remove_whitespace(text)
+        if self.remove_non_word_characters:
+            text = remove_non_word_characters(text)
+        if self.normalization is not None:
+            text = unicodedata.normalize(self.normalization, text)
+        return text
+
+
+TOKENIZERS = {
+    "every step": GraphemeClusterTokenizer(EveryStepNormalizer(), EveryStepNormalizer()),
+    "default": GraphemeClusterTokenizer(),
+    "identity": GraphemeClusterTokenizer(StringNormalizer(normalization=None), StringNormalizer(normalization=None)),
+}
+
+
+def make_pair(alphabet: str, rng: random.Random) -> tuple[str, str]:
+    """Create a reference with ``LENGTH`` grapheme clusters and a prediction with about 5% of them replaced."""
+    clusters = GraphemeClusterTokenizer()(alphabet)
+    reference = rng.choices(clusters, k=LENGTH)
+    predicted = [rng.choice(clusters) if rng.random() < 0.05 else cluster for cluster in reference]
+    return "".join(reference), "".join(predicted)
+
+
+def best_time(function, number: int = 20) -> float:
+    """The fastest time of calling the function, in milliseconds."""
+    return min(timeit.Timer(function).repeat(repeat=5, number=number)) / number * 1e3
+
+
+def main() -> None:
+    rng = random.Random(0)
+    print(f"{'text':>8} {'tokenizer':>11} {'tokenize (ms)':>14} {'CER (ms)':>9}")
+    for name, alphabet in ALPHABETS.items():
+        reference, predicted = make_pair(alphabet, rng)
+        for tokenizer_name, tokenizer in TOKENIZERS.items():
+            tokenize_time = best_time(lambda: tokenizer(reference))
+            cer_time = best_time(lambda: compute_ter(reference, predicted, tokenizer=tokenizer), number=5)
+            print(f"{name:>8} {tokenizer_name:>11} {tokenize_time:>14.2f} {cer_time:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
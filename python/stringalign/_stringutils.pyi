@@ -1,4 +1,3 @@
-from collections.abc import Sequence
 from typing import Protocol, Self
 
 import numpy as np
@@ -12,4 +11,86 @@ class GraphemeClusterIterator(Protocol):
 def grapheme_clusters(s: str, extended: bool = True) -> list[str]: ...
 def unicode_words(s: str) -> list[str]: ...
 def split_at_word_boundaries(s: str) -> list[str]: ...
-def create_cost_matrix(reference: Sequence[str], predicted: Sequence[str]) -> np.ndarray: ...
+
+class ConfusableMatcher:
+    def __init__(self, confusable_map: dict[str, str], /) -> None: ...
+    @staticmethod
+    def bundled(confusable_type: str, /) -> ConfusableMatcher: ...
+    def resolve(self, s: str, /) -> str: ...
+
+def bundled_confusable_map(confusable_type: str, /) -> dict[str, str]: ...
+def normalized_tokens(
+    s: str,
+    segmentation: str,
+    confusables: ConfusableMatcher | None,
+    normalization: str | None,
+    case_insensitive: bool,
+    normalize_whitespace: bool,
+    remove_whitespace: bool,
+    remove_non_word_characters: bool,
+    /,
+) -> tuple[list[str], list[int]]: ...
+def segment_spans(s: str, segmentation: str, /) -> np.ndarray: ...
+def non_whitespace_token_spans(
+    s: str,
+    segmentation: str,
+    confusables: ConfusableMatcher | None,
+    normalization: str | None,
+    case_insensitive: bool,
+    normalize_whitespace: bool,
+    remove_whitespace: bool,
+    remove_non_word_characters: bool,
+    /,
+) -> tuple[np.ndarray, list[int]]: ...
+def create_cost_matrix(
+    reference: np.ndarray, predicted: np.ndarray, dtype: str | None = None, wavefront: bool | None = None
+) -> np.ndarray: ...
+def predecessor_masks(reference: np.ndarray, predicted: np.ndarray) -> np.ndarray: ...
+def levenshtein_distance(
+    reference: np.ndarray, predicted: np.ndarray, max_distance: int | None = None, myers: bool = False
+) -> int | None: ...
+def levenshtein_distances(
+    reference_ids: np.ndarray,
+    reference_offsets: np.ndarray,
+    predicted_ids: np.ndarray,
+    predicted_offsets: np.ndarray,
+    max_distance: int | None,
+    myers: bool,
+    n_threads: int,
+) -> list[int | None]: ...
+def count_optimal_alignments(reference: np.ndarray, predicted: np.ndarray) -> int: ...
+def needleman_wunsch_alignment(
+    reference: np.ndarray, predicted: np.ndarray
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, bool]: ...
+def hirschberg_alignment(
+    reference: np.ndarray, predicted: np.ndarray, n_threads: int = 1
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, bool]: ...
+def banded_alignment(
+    reference: np.ndarray, predicted: np.ndarray, max_distance: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, bool]: ...
+def myers_alignment(
+    reference: np.ndarray, predicted: np.ndarray, use_hirschberg: bool
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, bool]: ...
+def anchored_alignment(
+    reference: np.ndarray, predicted: np.ndarray, anchor_length: int, hirschberg_min_cells: int, n_threads: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, bool]: ...
+def align_many(
+    reference_ids: np.ndarray,
+    reference_offsets: np.ndarray,
+    predicted_ids: np.ndarray,
+    predicted_offsets: np.ndarray,
+    use_hirschberg: np.ndarray,
+    max_distance: int | None,
+    myers: bool,
+    n_threads: int,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]: ...
+def sample_alignments(
+    reference: np.ndarray, predicted: np.ndarray, n_samples: int, seed: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]: ...
+def operation_moments(
+    reference: np.ndarray, predicted: np.ndarray
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]: ...
+
+class AlignmentEnumerator:
+    def __init__(self, reference: np.ndarray, predicted: np.ndarray, skip: int, /) -> None: ...
+    def take(self, n_alignments: int, /) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]: ...
@@ -2,34 +2,59 @@ from __future__ import annotations
 
 import html
 import os
-from collections import deque
 from dataclasses import dataclass
-from typing import TYPE_CHECKING, Protocol, cast, runtime_checkable
+from itertools import chain, pairwise
+from typing import TYPE_CHECKING, Literal, Protocol, overload, runtime_checkable
 
 import numpy as np
 
 import stringalign.tokenize
+from stringalign._stringutils import AlignmentEnumerator as _AlignmentEnumerator
+from stringalign._stringutils import align_many as _align_many
+from stringalign._stringutils import anchored_alignment as _anchored_alignment
+from stringalign._stringutils import banded_alignment as _banded_alignment
+from stringalign._stringutils import count_optimal_alignments as _count_optimal_alignments
 from stringalign._stringutils import create_cost_matrix as _create_cost_matrix
+from stringalign._stringutils import hirschberg_alignment as _hirschberg_alignment
+from stringalign._stringutils import levenshtein_distance as _levenshtein_distance
+from stringalign._stringutils import levenshtein_distances as _levenshtein_distances
+from stringalign._stringutils import myers_alignment as _myers_alignment
+from stringalign._stringutils import needleman_wunsch_alignment as _needleman_wunsch_alignment
+from stringalign._stringutils import operation_moments as _operation_moments
+from stringalign._stringutils import predecessor_masks as _predecessor_masks
+from stringalign._stringutils import sample_alignments as _sample_alignments
 
 if TYPE_CHECKING:  # pragma: no cover
-    from collections.abc import Generator, Iterable
+    from collections.abc import Generator, Iterable, Sequence
     from typing import Self
 
+    import numpy.typing as npt
+
 __all__ = [
     "AlignmentOperation",
     "MergableAlignmentOperation",
     "AlignmentTuple",
+    "AlignmentEngine",
+    "DistanceEngine",
     "StringType",
     "Inserted",
     "Deleted",
     "Replaced",
     "Kept",
     "align_strings",
+    "align_many",
+    "sample_alignments",
+    "AlignmentBatch",
     "find_all_alignments",
+    "nth_alignment",
+    "count_optimal_alignments",
+    "expected_alignment_operation_counts",
     "combine_alignment_ops",
     "create_cost_matrix",
+    "intern_tokens",
     "compute_levenshtein_distance_from_alignment",
     "levenshtein_distance",
+    "levenshtein_distances",
 ]
 
 _DEFAULT_RANDOM_SEED = int(os.getenv("STRINGALIGN_RANDOM_SEED", 42))
@@ -194,16 +219,181 @@ class AlignmentOperation(Protocol):
 
 AlignmentTuple = tuple[AlignmentOperation, ...]
 AlignmentList = list[AlignmentOperation]
+AlignmentEngine = Literal["auto", "needleman-wunsch", "hirschberg", "myers", "anchored"]
+DistanceEngine = Literal["auto", "myers"]
+
+# Op codes used for alignment operations by the Rust extension (see src/dp.rs)
+_KEPT, _REPLACED, _DELETED, _INSERTED = range(4)
+
+# With the automatic engine selection, alignments with more cost matrix cells than this use the Hirschberg algorithm.
+# The default corresponds to 256 MiB of predecessor masks (four bits per cell).
+_HIRSCHBERG_MIN_CELLS = 2**29
+
+# The anchored engine anchors the alignment at token n-grams of this length that occur once in both strings.
+_ANCHOR_LENGTH = 16
+
+# The largest number of alignments fetched from the Rust enumerator at a time by find_all_alignments.
+_MAX_ENUMERATION_PAGE_SIZE = 1024
+
+
+def intern_tokens(
+    reference_tokens: Iterable[str], predicted_tokens: Iterable[str], vocabulary: dict[str, int] | None = None
+) -> tuple[np.ndarray, np.ndarray]:
+    """Map the reference and predicted tokens to dense integer ids.
+
+    Equal tokens get equal ids, so the alignment kernels can compare tokens with a single integer comparison instead
+    of a full string comparison. Each distinct token is hashed once per call, no matter how many times it is compared
+    in the dynamic programming.
+
+    Parameters
+    ----------
+    reference_tokens:
+        Iterable of tokens to align the predicted tokens against.
+    predicted_tokens:
+        Iterable of tokens to align against the reference tokens.
+    vocabulary : optional
+        Mapping from tokens to ids. Tokens that are not in the vocabulary are added to it (in-place) with the next
+        free id. Pass the same dictionary for several string pairs to intern a whole corpus with one shared
+        vocabulary. If not provided, a new vocabulary is created for this pair.
+
+    Returns
+    -------
+    reference_ids : np.ndarray
+        One dimensional ``uint32`` array with the token ids of the reference tokens.
+    predicted_ids : np.ndarray
+        One dimensional ``uint32`` array with the token ids of the predicted tokens.
+
+    Examples
+    --------
+    >>> reference_ids, predicted_ids = intern_tokens(["h", "e", "l", "l", "o"], ["h", "a", "l", "l", "o"])
+    >>> reference_ids
+    array([0, 1, 2, 2, 3], dtype=uint32)
+    >>> predicted_ids
+    array([0, 4, 2, 2, 3], dtype=uint32)
+    """
+    if vocabulary is None:
+        vocabulary = {}
+
+    def to_ids(tokens: Iterable[str]) -> np.ndarray:
+        return np.fromiter((vocabulary.setdefault(token, len(vocabulary)) for token in tokens), dtype=np.uint32)
+
+    return to_ids(reference_tokens), to_ids(predicted_tokens)
+
+
+def _token_id_arrays(reference: np.ndarray, predicted: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Convert integer token id arrays to the contiguous ``uint32`` arrays that the Rust extension reads.
+
+    Contiguous ``uint32`` arrays are passed on as they are, so the extension reads their buffers without a copy. Other
+    integer arrays are cast to ``uint32`` if all ids fit, and otherwise mapped to dense ids.
+    """
+    for token_ids in (reference, predicted):
+        if token_ids.ndim != 1 or not np.issubdtype(token_ids.dtype, np.integer):
+            raise ValueError(
+                f"Token id arrays must be one dimensional integer arrays, not {token_ids.ndim} dimensional"
+                f" {token_ids.dtype} arrays"
+            )
+
+    if reference.dtype == np.uint32 and predicted.dtype == np.uint32:
+        return np.ascontiguousarray(reference), np.ascontiguousarray(predicted)
+
+    max_id = np.iinfo(np.uint32).max
+    if all(
+        token_ids.size == 0 or 0 <= token_ids.min() <= token_ids.max() <= max_id for token_ids in (reference, predicted)
+    ):
+        return reference.astype(np.uint32), predicted.astype(np.uint32)
+
+    if np.issubdtype(np.result_type(reference.dtype, predicted.dtype), np.integer):
+        dense_ids = np.unique(np.concatenate([reference, predicted]), return_inverse=True)[1].astype(np.uint32)
+        return dense_ids[: len(reference)], dense_ids[len(reference) :]
+
+    # There is no integer type for both arrays (e.g. uint64 and int64), and concatenating them would round the ids to
+    # float64. Instead, we find the distinct ids of each array and map them to dense ids with exact Python integers.
+    reference_vocabulary, reference_inverse = np.unique(reference, return_inverse=True)
+    predicted_vocabulary, predicted_inverse = np.unique(predicted, return_inverse=True)
+    vocabulary = {
+        token_id: dense_id
+        for dense_id, token_id in enumerate(sorted({*reference_vocabulary.tolist(), *predicted_vocabulary.tolist()}))
+    }
+
+    def to_dense_ids(token_vocabulary: np.ndarray, inverse: np.ndarray) -> np.ndarray:
+        dense_vocabulary = np.fromiter(
+            (vocabulary[token_id] for token_id in token_vocabulary.tolist()),
+            dtype=np.uint32,
+            count=len(token_vocabulary),
+        )
+        return dense_vocabulary[inverse.reshape(-1)]
+
+    return to_dense_ids(reference_vocabulary, reference_inverse), to_dense_ids(predicted_vocabulary, predicted_inverse)
+
+
+def _tokenize(
+    reference: str | Sequence[str] | np.ndarray,
+    predicted: str | Sequence[str] | np.ndarray,
+    tokenizer: stringalign.tokenize.Tokenizer,
+) -> tuple[Sequence[str], Sequence[str]]:
+    """Tokenize a string pair or pass on a pair of token sequences, and reject a single token id array."""
+    if isinstance(reference, np.ndarray) or isinstance(predicted, np.ndarray):
+        raise TypeError("The reference and predicted tokens must either both be token id arrays or neither of them")
+
+    reference_tokens = tokenizer(reference) if isinstance(reference, str) else reference
+    predicted_tokens = tokenizer(predicted) if isinstance(predicted, str) else predicted
+    return reference_tokens, predicted_tokens
+
+
+def _token_ids(
+    reference: str | Sequence[str] | np.ndarray,
+    predicted: str | Sequence[str] | np.ndarray,
+    tokenizer: stringalign.tokenize.Tokenizer,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Find the token ids of a string pair, a pair of token sequences or a pair of token id arrays.
 
+    Unlike :func:`_tokenize_and_intern`, this does not create the tokens of token id arrays, so it is used where only
+    the token ids are needed, e.g. to compute distances.
+    """
+    if isinstance(reference, np.ndarray) and isinstance(predicted, np.ndarray):
+        return _token_id_arrays(reference, predicted)
+    return intern_tokens(*_tokenize(reference, predicted, tokenizer))
+
+
+def _tokenize_and_intern(
+    reference: str | Sequence[str] | np.ndarray,
+    predicted: str | Sequence[str] | np.ndarray,
+    tokenizer: stringalign.tokenize.Tokenizer,
+) -> tuple[Sequence[str], Sequence[str], np.ndarray, np.ndarray]:
+    """Find the tokens and token ids of a string pair, a pair of token sequences or a pair of token id arrays.
+
+    Strings are tokenized with the tokenizer, and token sequences are used as they are. Token id arrays are passed to
+    the Rust extension without interning, and their tokens are the decimal strings of the ids, which are needed to
+    create the alignment operations.
+    """
+    if isinstance(reference, np.ndarray) and isinstance(predicted, np.ndarray):
+        reference_ids, predicted_ids = _token_id_arrays(reference, predicted)
+        return reference.astype(str).tolist(), predicted.astype(str).tolist(), reference_ids, predicted_ids
 
-def create_cost_matrix(reference_tokens: Iterable[str], predicted_tokens: Iterable[str]) -> np.ndarray:
+    reference_tokens, predicted_tokens = _tokenize(reference, predicted, tokenizer)
+    return reference_tokens, predicted_tokens, *intern_tokens(reference_tokens, predicted_tokens)
+
+
+def create_cost_matrix(
+    reference_tokens: Iterable[str], predicted_tokens: Iterable[str], dtype: npt.DTypeLike | None = None
+) -> np.ndarray:
     """Create the alignment cost matrix for the reference tokens and predicted tokens.
 
     Element `(i, j)` of this matrix corresponds to the cost of aligning the token with index `i` in the reference
     string with the token with index `j` in the predicted string. For more information, see e.g.
     :cite:p:`navarro_guided_2001` or :cite:p:`needleman1970general`.
 
-    This is an internal function used by :func:`align_strings`, so you should probably not call this function directly.
+    The tokens are interned with :func:`intern_tokens` before the matrix is filled, so the dynamic programming only
+    compares integer ids. No entry of the matrix is larger than ``max(len(reference_tokens), len(predicted_tokens))``,
+    so by default, the matrix is stored with the narrowest unsigned integer type that can hold this value. For
+    ordinary line-length inputs, this is ``uint16``, which needs a quarter of the memory of ``uint64``.
+
+    When both token sequences are longer than about a hundred tokens, the matrix is filled along anti-diagonals in
+    strips of rows, which lets the CPU compute many entries with one SIMD instruction. The widest instruction set the
+    CPU supports (SSE4.1, AVX2 or AVX-512 on x86-64 and NEON on ARM) is chosen at runtime.
+
+    The alignment functions backtrack through packed predecessor masks instead of the cost matrix, so this function is
+    mainly useful for inspecting the alignment costs.
 
     Parameters
     ----------
@@ -211,30 +401,55 @@ def create_cost_matrix(reference_tokens: Iterable[str], predicted_tokens: Iterab
         Iterable of tokens to align the predicted tokens against.
     predicted_tokens:
         Iterable of tokens to align against the reference tokens.
+    dtype:
+        The dtype of the cost matrix, must be ``uint16``, ``uint32`` or ``uint64``. If None, the narrowest of these
+        that can store the matrix is used.
 
     Returns
     -------
     cost_matrix : np.ndarray
-        Two dimensional numpy array of ints with shape `(len(reference_tokens), len(predicted_tokens))`.
+        Two dimensional numpy array of unsigned ints with shape `(len(reference_tokens) + 1, len(predicted_tokens) + 1)`.
+
+    Raises
+    ------
+    ValueError
+        If the dtype is not ``uint16``, ``uint32`` or ``uint64``, or if it is too narrow for the token sequences.
     """
-    return _create_cost_matrix(list(reference_tokens), list(predicted_tokens))
+    dtype_name = None if dtype is None else np.dtype(dtype).name
+    return _create_cost_matrix(*intern_tokens(reference_tokens, predicted_tokens), dtype_name)
 
 
-_ALIGNMENT_DIRECTIONS = {Kept: (1, 1), Replaced: (1, 1), Deleted: (1, 0), Inserted: (0, 1)}
+def _create_predecessor_masks(reference_tokens: Iterable[str], predicted_tokens: Iterable[str]) -> np.ndarray:
+    """Create the optimal predecessor masks of the cost matrix cells, packed two cells per byte.
 
+    Bit ``op`` of the mask of a cell is set if the alignment operation with op code ``op`` ends an optimal alignment
+    path to that cell. The mask of cell ``(row, col)`` is stored in the low nibble of ``masks[row, col // 2]`` if
+    ``col`` is even and in the high nibble otherwise. This only uses half a byte per cell, compared to eight bytes per
+    cell for the cost matrix.
+    """
+    return _predecessor_masks(*intern_tokens(reference_tokens, predicted_tokens))
 
-def _backtrack(
-    row: int, col: int, reference_clusters: list[str], predicted_clusters: list[str], cost_matrix: np.ndarray
-) -> Generator[AlignmentOperation, None, None]:
-    """Generator that yields all optimal alignment operations at the current position in the cost matrix."""
-    if row > 0 and col > 0 and reference_clusters[row - 1] == predicted_clusters[col - 1]:
-        yield Kept(reference_clusters[row - 1])
-    if row > 0 and col > 0 and cost_matrix[row, col] == cost_matrix[row - 1, col - 1] + 1:
-        yield Replaced(reference_clusters[row - 1], predicted_clusters[col - 1])
-    if row > 0 and (col == 0 or cost_matrix[row, col] == cost_matrix[row - 1, col] + 1):
-        yield Deleted(reference_clusters[row - 1])
-    if col > 0 and (row == 0 or cost_matrix[row, col] == cost_matrix[row, col - 1] + 1):
-        yield Inserted(predicted_clusters[col - 1])
+
+def _decode_op_codes(
+    op_codes: np.ndarray,
+    reference_indices: np.ndarray,
+    predicted_indices: np.ndarray,
+    reference_tokens: Sequence[str],
+    predicted_tokens: Sequence[str],
+) -> AlignmentTuple:
+    """Convert the op codes and token indices from the Rust extension into a tuple of alignment operations."""
+    alignment: AlignmentList = []
+    for op_code, row, col in zip(op_codes.tolist(), reference_indices.tolist(), predicted_indices.tolist()):
+        if op_code == _KEPT:
+            alignment.append(Kept(reference_tokens[row]))
+        elif op_code == _REPLACED:
+            alignment.append(Replaced(reference_tokens[row], predicted_tokens[col]))
+        elif op_code == _DELETED:
+            alignment.append(Deleted(reference_tokens[row]))
+        else:
+            alignment.append(Inserted(predicted_tokens[col]))
+
+    return tuple(alignment)
 
 
 class InvalidRngError(TypeError):
@@ -243,36 +458,128 @@ class InvalidRngError(TypeError):
         super().__init__(f"Invalid random state. Should be a numpy random number generator, an int or None, not {t}")
 
 
+def _draw_seed(random_state: np.random.Generator | int | None) -> int:
+    """Draw a seed for the random number generator of the Rust extension from a NumPy random state."""
+    if random_state is None:
+        random_state = DEFAULT_RNG
+    elif isinstance(random_state, int):
+        random_state = np.random.default_rng(random_state)
+    if not isinstance(random_state, np.random.Generator):
+        raise InvalidRngError(random_state)
+
+    return int(random_state.integers(2**64, dtype=np.uint64))
+
+
+def _check_engine_arguments(engine: AlignmentEngine, randomize_alignment: bool, max_distance: int | None) -> None:
+    if engine not in {"auto", "needleman-wunsch", "hirschberg", "myers", "anchored"}:
+        raise ValueError(
+            f"Invalid alignment engine: {engine!r}. "
+            "Must be 'auto', 'needleman-wunsch', 'hirschberg', 'myers' or 'anchored'."
+        )
+    if randomize_alignment and engine == "hirschberg":
+        raise ValueError("The Hirschberg engine does not support randomized alignments.")
+    if randomize_alignment and engine == "anchored":
+        raise ValueError("The anchored engine does not support randomized alignments.")
+    if max_distance is not None and max_distance < 0:
+        raise ValueError(f"max_distance must be non-negative, not {max_distance}")
+
+
+def _select_engine(engine: AlignmentEngine, n_reference_tokens: int, n_predicted_tokens: int) -> AlignmentEngine:
+    """Resolve the automatic engine selection based on the size of the cost matrix.
+
+    For the Myers engine, this is the engine that is used if the strings are too different for the Myers engine.
+    """
+    if engine not in {"auto", "myers"}:
+        return engine
+    if (n_reference_tokens + 1) * (n_predicted_tokens + 1) > _HIRSCHBERG_MIN_CELLS:
+        return "hirschberg"
+    return "needleman-wunsch"
+
+
 def align_strings(
-    reference: str,
-    predicted: str,
+    reference: str | Sequence[str] | np.ndarray,
+    predicted: str | Sequence[str] | np.ndarray,
     tokenizer: stringalign.tokenize.Tokenizer | None = None,
     randomize_alignment: bool = False,
     random_state: np.random.Generator | int | None = None,
+    engine: AlignmentEngine = "auto",
+    max_distance: int | None = None,
 ) -> tuple[AlignmentTuple, bool]:
-    """Find one optimal alignment for the two strings and whether the alignment is unique or not.
+    r"""Find one optimal alignment for the two strings and whether the alignment is unique or not.
 
     It uses the Needleman-Wunsch algorithm for optimal string alignment :cite:p:`needleman1970general`, which is a
     dynamic programming algorithm with :math:`O(mn)` time and memory complexity, where :math:`m` and :math:`n` are the
     length of the reference and predicted strings. This algorithm has been discovered many times, for a more thorough
-    description, see e.g. :cite:p:`navarro_guided_2001`.
+    description, see e.g. :cite:p:`navarro_guided_2001`. To backtrack, we only need to know which of the neighbouring
+    cells are on an optimal path, so instead of storing the full cost matrix, we only store these directions as four
+    bits per cell.
+
+    Before aligning, the common prefix and suffix of the token sequences are trimmed, since they are always kept in
+    an optimal alignment. So identical strings are aligned without any dynamic programming, and strings that only differ
+    in a small region are aligned in time proportional to the size of that region. The trimming does not change which
+    optimal alignment is returned or whether it is unique.
+
+    For very long strings, even this may not fit in memory. In that case, we can use Hirschberg's divide and conquer
+    algorithm :cite:p:`hirschberg1975linear` instead, which finds an optimal alignment in :math:`O(m + n)` memory at
+    the cost of roughly twice as many operations. The Hirschberg engine breaks ties between optimal alignments the same
+    way as the Needleman-Wunsch engine for short strings, but it may return a different optimal alignment for long
+    strings. For a single huge pair, such as the transcripts of an audio book, the large sub-problems are split into
+    one strip of columns per CPU. The strips are computed in parallel, and each thread passes the last column of its
+    strip on to the next thread in blocks of rows. The alignment is the same as with one thread.
+
+    If the strings are similar, we can instead provide an upper bound for the Levenshtein distance with
+    ``max_distance``. Then, only the diagonal band of the cost matrix that can contain an alignment with at most this
+    cost is computed :cite:p:`UKKONEN1985100`, which needs :math:`O(km)` time and memory, where :math:`k` is the
+    maximum distance. If the distance is larger than ``max_distance``, then the band is doubled until it contains an
+    optimal alignment, so the result is always the same as with the full cost matrix.
+
+    For long, near-identical strings, such as full pages or books, the Myers engine finds the distance :math:`d` with
+    the greedy diagonal algorithm :cite:p:`myers1986ond,landau1989fast`, which only follows the furthest reaching
+    path on each diagonal of the cost matrix and runs in :math:`O((m + n)d)` time. Then, it aligns the strings in the
+    band of the cost matrix that contains all alignments with cost :math:`d`. This gives the same alignment as the
+    Needleman-Wunsch engine. If the distance is more than roughly :math:`\max(m, n) / 64`, the full cost matrix is
+    faster, so the Myers engine gives up and falls back to the engine that ``"auto"`` would use.
+
+    For book-length strings, even the Hirschberg algorithm is too slow, and splitting the strings at line breaks fails
+    when lines are merged or split. The anchored engine instead finds token n-grams that occur exactly once in both
+    strings, and keeps the longest chain of them that occurs in the same order in both strings. Only the gaps between
+    these anchors are aligned, each with the engine that ``"auto"`` would use, and in parallel with one thread per CPU.
+    The result is an optimal alignment if an optimal alignment keeps all anchors, which is almost always the case for
+    similar strings, but it is not guaranteed. The uniqueness flag is True if the alignment of every gap is unique.
+
+    If the strings are already tokenized, we can pass the token sequences instead of the strings. Token ids, such as
+    the phoneme or subword ids of a speech recognition model, can also be passed directly as one dimensional integer
+    NumPy arrays. Contiguous ``uint32`` arrays are read by the alignment kernels without copying, and the alignment
+    operations contain the decimal strings of the ids.
 
     Parameters
     ----------
     reference
-        The reference string, also known as gold standard or ground truth.
+        The reference string, also known as gold standard or ground truth. It can also be a sequence of tokens or a one
+        dimensional integer array of token ids, which are used without tokenizing.
     predicted
-        The string to align with the reference.
+        The string to align with the reference, or its tokens or token ids.
     tokenizer : optional
         A tokenizer that turns a string into an iterable of tokens. For this function, it is sufficient that it is a
         callable that turns a string into an iterable of tokens. If not provided, then
         ``stringalign.tokenize.DEFAULT_TOKENIZER`` is used instead, which by default is a grapheme cluster (character)
         tokenizer.
     randomize_alignment
-        If ``True``, then a random optimal alignment is chosen (slightly slower if enabled)
+        If ``True``, then an optimal alignment is drawn uniformly at random, see :func:`sample_alignments` (slightly
+        slower if enabled).
     random_state
-        The NumPy RNG or a seed to create a NumPy RNG used for picking the optimal alignment. If ``None``, then the
-        default RNG will be used instead.
+        The NumPy RNG or a seed to create a NumPy RNG used to seed the sampler for randomized alignments. If ``None``,
+        then the default RNG will be used instead.
+    engine
+        The alignment algorithm to use. ``"needleman-wunsch"`` stores four bits per cost matrix cell and
+        ``"hirschberg"`` uses linear memory. If ``"auto"``, then the Hirschberg algorithm is used if the cost matrix
+        would have more than ``2**29`` cells (256 MiB) and randomized alignments are not requested. ``"myers"`` is much
+        faster for long strings with few differences, and ``"anchored"`` aligns book-length strings, but may not return
+        an optimal alignment. The Hirschberg and anchored engines do not support randomized alignments.
+    max_distance : optional
+        An estimate of the largest expected Levenshtein distance between the strings, used to restrict the
+        Needleman-Wunsch algorithm to a band of the cost matrix. This only affects the running time, not the result.
+        It is ignored for randomized alignments and for the Hirschberg, Myers and anchored engines.
 
     Returns
     -------
@@ -283,54 +590,452 @@ def align_strings(
     """
     if tokenizer is None:
         tokenizer = stringalign.tokenize.DEFAULT_TOKENIZER
-    if randomize_alignment and random_state is None:
-        random_state = DEFAULT_RNG
-    elif randomize_alignment and isinstance(random_state, int):
-        random_state = np.random.default_rng(random_state)
-    if randomize_alignment and not isinstance(random_state, np.random.Generator):
-        raise InvalidRngError(random_state)
+    _check_engine_arguments(engine, randomize_alignment, max_distance)
+    seed = _draw_seed(random_state) if randomize_alignment else None
+
+    reference_clusters, predicted_clusters, reference_ids, predicted_ids = _tokenize_and_intern(
+        reference, predicted, tokenizer
+    )
+    if seed is not None:
+        op_codes, reference_indices, predicted_indices, _offsets, unique_flags = _sample_alignments(
+            reference_ids, predicted_ids, 1, seed
+        )
+        alignment = _decode_op_codes(
+            op_codes, reference_indices, predicted_indices, reference_clusters, predicted_clusters
+        )
+        return alignment, bool(unique_flags[0])
+
+    if engine == "auto" and max_distance is not None:
+        engine = "needleman-wunsch"
+    elif engine == "auto":
+        engine = _select_engine(engine, len(reference_clusters), len(predicted_clusters))
+
+    if engine == "myers":
+        fallback_engine = _select_engine(engine, len(reference_clusters), len(predicted_clusters))
+        result = _myers_alignment(reference_ids, predicted_ids, fallback_engine == "hirschberg")
+    elif engine == "anchored":
+        result = _anchored_alignment(
+            reference_ids, predicted_ids, _ANCHOR_LENGTH, _HIRSCHBERG_MIN_CELLS, os.cpu_count() or 1
+        )
+    elif engine == "hirschberg":
+        result = _hirschberg_alignment(reference_ids, predicted_ids, os.cpu_count() or 1)
+    elif max_distance is not None:
+        result = _banded_alignment(reference_ids, predicted_ids, max_distance)
+    else:
+        result = _needleman_wunsch_alignment(reference_ids, predicted_ids)
+
+    op_codes, reference_indices, predicted_indices, unique = result
+    alignment = _decode_op_codes(op_codes, reference_indices, predicted_indices, reference_clusters, predicted_clusters)
+    return alignment, unique
+
+
+def sample_alignments(
+    reference: str,
+    predicted: str,
+    n_samples: int = 1,
+    tokenizer: stringalign.tokenize.Tokenizer | None = None,
+    random_state: np.random.Generator | int | None = None,
+) -> list[AlignmentTuple]:
+    """Draw optimal alignments of the two strings uniformly at random.
+
+    We first count the number of optimal paths from the start of the cost matrix to each cell, which are the sums of the
+    counts of the optimal predecessors of each cell. Then, we backtrack from the last cell and choose each optimal
+    predecessor with probability proportional to its count, so every optimal alignment is equally likely. This is
+    different from choosing uniformly among the optimal predecessors in each step, which favours alignments with few
+    branching points.
+
+    The counts are computed once in :math:`O(mn)` time and memory, where :math:`m` and :math:`n` are the number of
+    reference and predicted tokens, and each sample is then drawn in :math:`O(m + n)` time by the Rust extension. The
+    extension uses its own pseudorandom number generator, which is seeded by ``random_state``.
+
+    Parameters
+    ----------
+    reference
+        The reference string, also known as gold standard or ground truth.
+    predicted
+        The string to align with the reference.
+    n_samples
+        The number of alignments to draw. The alignments are drawn independently, so the same alignment can be drawn
+        several times.
+    tokenizer : optional
+        A tokenizer that turns a string into an iterable of tokens. For this function, it is sufficient that it is a
+        callable that turns a string into an iterable of tokens. If not provided, then
+        ``stringalign.tokenize.DEFAULT_TOKENIZER`` is used instead, which by default is a grapheme cluster (character)
+        tokenizer.
+    random_state
+        The NumPy RNG or a seed to create a NumPy RNG used to seed the sampler. If ``None``, then the default RNG will
+        be used instead.
+
+    Returns
+    -------
+    list[AlignmentTuple]
+        The sampled alignments.
+
+    Examples
+    --------
+    There are two optimal alignments of ``"hello"`` and ``"helo"``, depending on which ``"l"`` is deleted:
+
+    >>> alignments = sample_alignments("hello", "helo", n_samples=100, random_state=0)
+    >>> len(alignments), len(set(alignments))
+    (100, 2)
+    """
+    if tokenizer is None:
+        tokenizer = stringalign.tokenize.DEFAULT_TOKENIZER
+    if n_samples < 0:
+        raise ValueError(f"n_samples must be non-negative, not {n_samples}")
+    seed = _draw_seed(random_state)
 
     reference_clusters, predicted_clusters = tokenizer(reference), tokenizer(predicted)
-    cost_matrix = create_cost_matrix(reference_clusters, predicted_clusters)
+    reference_ids, predicted_ids = intern_tokens(reference_clusters, predicted_clusters)
+    op_codes, reference_indices, predicted_indices, offsets, _unique = _sample_alignments(
+        reference_ids, predicted_ids, n_samples, seed
+    )
+    return [
+        _decode_op_codes(
+            op_codes[start:stop],
+            reference_indices[start:stop],
+            predicted_indices[start:stop],
+            reference_clusters,
+            predicted_clusters,
+        )
+        for start, stop in pairwise(offsets.tolist())
+    ]
 
-    alignment: AlignmentList = []
-    row, col = cost_matrix.shape[0] - 1, cost_matrix.shape[1] - 1
-    unique = True
-    while row > 0 or col > 0:
-        next_alignment_ops = _backtrack(row, col, reference_clusters, predicted_clusters, cost_matrix)
-
-        if randomize_alignment:
-            # Mypy doesn't understand that this is an RNG despite the exception throwing above, so we just cast it to
-            # silence the false positive type error.
-            random_state = cast(np.random.Generator, random_state)
-            next_op = random_state.choice(list(next_alignment_ops))
-        else:
-            next_op = next(next_alignment_ops)
 
-        alignment.append(next_op)
-        unique = unique and (next(next_alignment_ops, None) is None)
+@dataclass(frozen=True)
+class AlignmentBatch:
+    """Optimal alignments for many string pairs, stored in flat arrays.
 
-        # Decrement row and/or col
-        dr, dc = _ALIGNMENT_DIRECTIONS[next_op.__class__]
-        row, col = row - dr, col - dc
+    The op codes of all pairs are stored back to back, and the alignment of pair ``i`` is given by the op codes
+    ``op_codes[offsets[i]:offsets[i + 1]]``. Indexing or iterating over the batch gives the same
+    ``(alignment, unique)`` tuples as :func:`align_strings`, and the alignment operations of a pair are only created
+    when it is accessed.
 
-    return tuple(alignment[::-1]), unique
+    Parameters
+    ----------
+    reference_tokens
+        The tokens of each reference string.
+    predicted_tokens
+        The tokens of each predicted string.
+    op_codes
+        The op codes of all alignments (0 for kept, 1 for replaced, 2 for deleted and 3 for inserted tokens).
+    reference_indices
+        The index of the reference token at the start of each alignment operation.
+    predicted_indices
+        The index of the predicted token at the start of each alignment operation.
+    offsets
+        The start of the op codes of each pair, with the total number of op codes as the last element.
+    unique
+        Boolean array that is True for the pairs with a unique optimal alignment.
+    """
 
+    reference_tokens: tuple[list[str], ...]
+    predicted_tokens: tuple[list[str], ...]
+    op_codes: np.ndarray
+    reference_indices: np.ndarray
+    predicted_indices: np.ndarray
+    offsets: np.ndarray
+    unique: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.unique)
+
+    def __getitem__(self, index: int) -> tuple[AlignmentTuple, bool]:
+        index = range(len(self))[index]
+        start, stop = self.offsets[index], self.offsets[index + 1]
+        alignment = _decode_op_codes(
+            self.op_codes[start:stop],
+            self.reference_indices[start:stop],
+            self.predicted_indices[start:stop],
+            self.reference_tokens[index],
+            self.predicted_tokens[index],
+        )
+        return alignment, bool(self.unique[index])
+
+    def __iter__(self) -> Generator[tuple[AlignmentTuple, bool], None, None]:
+        for index in range(len(self)):
+            yield self[index]
+
+
+def _token_offsets(token_lists: Sequence[Sequence[str]]) -> np.ndarray:
+    """Compute the start of each token list in the concatenated tokens, with the total number of tokens at the end."""
+    offsets = np.zeros(len(token_lists) + 1, dtype=np.uintp)
+    np.cumsum([len(tokens) for tokens in token_lists], dtype=np.uintp, out=offsets[1:])
+    return offsets
+
+
+def _concatenate_alignments(
+    alignments: Sequence[tuple[np.ndarray, np.ndarray, np.ndarray, bool]],
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Store single alignments from the Rust extension back to back, like the batch alignments from :func:`align_many`."""
+    offsets = np.zeros(len(alignments) + 1, dtype=np.uintp)
+    np.cumsum([len(op_codes) for op_codes, *_ in alignments], dtype=np.uintp, out=offsets[1:])
+    return (
+        np.concatenate([np.empty(0, dtype=np.uint8), *(op_codes for op_codes, *_ in alignments)]),
+        np.concatenate([np.empty(0, dtype=np.uintp), *(indices for _, indices, _, _ in alignments)]),
+        np.concatenate([np.empty(0, dtype=np.uintp), *(indices for _, _, indices, _ in alignments)]),
+        offsets,
+        np.array([unique for *_, unique in alignments], dtype=np.bool_),
+    )
+
+
+def align_many(
+    references: Iterable[str],
+    predictions: Iterable[str],
+    tokenizer: stringalign.tokenize.Tokenizer | None = None,
+    n_threads: int | None = None,
+    engine: AlignmentEngine = "auto",
+    max_distance: int | None = None,
+) -> AlignmentBatch:
+    """Find one optimal alignment for each pair of reference and predicted strings.
 
-def find_all_alignments(
+    This gives the same alignments as calling :func:`align_strings` for each pair, but all pairs are aligned with one
+    call to the Rust extension, which distributes the pairs over a pool of threads.
+
+    Parameters
+    ----------
+    references
+        Iterable containing the reference strings.
+    predictions
+        Iterable containing the strings to align with the references.
+    tokenizer : optional
+        A tokenizer that turns a string into an iterable of tokens. For this function, it is sufficient that it is a
+        callable that turns a string into an iterable of tokens. If not provided, then
+        ``stringalign.tokenize.DEFAULT_TOKENIZER`` is used instead, which by default is a grapheme cluster (character)
+        tokenizer.
+    n_threads : optional
+        The number of threads used to align the string pairs. If not provided, then one thread per CPU is used.
+    engine
+        The alignment algorithm to use, see :func:`align_strings`.
+    max_distance : optional
+        An estimate of the largest expected Levenshtein distance between the strings, see :func:`align_strings`.
+
+    Returns
+    -------
+    alignments : AlignmentBatch
+        The alignments of all pairs.
+    """
+    if tokenizer is None:
+        tokenizer = stringalign.tokenize.DEFAULT_TOKENIZER
+    if n_threads is None:
+        n_threads = os.cpu_count() or 1
+    if n_threads < 1:
+        raise ValueError(f"n_threads must be positive, not {n_threads}")
+    _check_engine_arguments(engine, False, max_distance)
+    if max_distance is not None and engine == "auto":
+        engine = "needleman-wunsch"
+
+    tokenized_pairs = [(tokenizer(r), tokenizer(p)) for r, p in zip(references, predictions, strict=True)]
+    reference_tokens = tuple(reference_tokens for reference_tokens, _ in tokenized_pairs)
+    predicted_tokens = tuple(predicted_tokens for _, predicted_tokens in tokenized_pairs)
+    if engine == "anchored":
+        # The anchored engine is meant for a few very long pairs, so we parallelise over the gaps within each pair.
+        op_codes, reference_indices, predicted_indices, offsets, unique = _concatenate_alignments(
+            [
+                _anchored_alignment(*intern_tokens(r, p), _ANCHOR_LENGTH, _HIRSCHBERG_MIN_CELLS, n_threads)
+                for r, p in tokenized_pairs
+            ]
+        )
+    else:
+        use_hirschberg = np.array(
+            [_select_engine(engine, len(r), len(p)) == "hirschberg" for r, p in tokenized_pairs], dtype=np.bool_
+        )
+        reference_ids, predicted_ids = intern_tokens(
+            chain.from_iterable(reference_tokens), chain.from_iterable(predicted_tokens)
+        )
+        op_codes, reference_indices, predicted_indices, offsets, unique = _align_many(
+            reference_ids,
+            _token_offsets(reference_tokens),
+            predicted_ids,
+            _token_offsets(predicted_tokens),
+            use_hirschberg,
+            max_distance,
+            engine == "myers",
+            n_threads,
+        )
+    return AlignmentBatch(
+        reference_tokens=reference_tokens,
+        predicted_tokens=predicted_tokens,
+        op_codes=op_codes,
+        reference_indices=reference_indices,
+        predicted_indices=predicted_indices,
+        offsets=offsets,
+        unique=unique,
+    )
+
+
+def count_optimal_alignments(
     reference: str, predicted: str, tokenizer: stringalign.tokenize.Tokenizer | None = None
+) -> int:
+    """Count the optimal alignments of two strings.
+
+    This is the number of alignments yielded by :func:`find_all_alignments`, but instead of enumerating the
+    alignments, we count the paths through the optimal predecessors of each cell in the cost matrix. The number of
+    optimal alignments ending in a cell is the sum of the number of optimal alignments ending in its optimal
+    predecessors, so the count is computed in :math:`O(mn)` time and :math:`O(n)` memory, where :math:`m` and
+    :math:`n` are the number of reference and predicted tokens.
+
+    The number of optimal alignments can grow exponentially with the length of the strings, so the count saturates at
+    ``2**64 - 1``.
+
+    Parameters
+    ----------
+    reference
+        The reference string, also known as gold standard or ground truth.
+    predicted
+        The string to align with the reference.
+    tokenizer : optional
+        A tokenizer that turns a string into an iterable of tokens. For this function, it is sufficient that it is a
+        callable that turns a string into an iterable of tokens. If not provided, then
+        ``stringalign.tokenize.DEFAULT_TOKENIZER`` is used instead, which by default is a grapheme cluster (character)
+        tokenizer.
+
+    Returns
+    -------
+    int
+        The number of optimal alignments, which is 1 if and only if the alignment is unique.
+
+    Examples
+    --------
+    >>> count_optimal_alignments("hello", "helo")
+    2
+    >>> count_optimal_alignments("hello", "hallo")
+    1
+    """
+    if tokenizer is None:
+        tokenizer = stringalign.tokenize.DEFAULT_TOKENIZER
+
+    return _count_optimal_alignments(*intern_tokens(tokenizer(reference), tokenizer(predicted)))
+
+
+def expected_alignment_operation_counts(
+    reference: str | Sequence[str] | np.ndarray,
+    predicted: str | Sequence[str] | np.ndarray,
+    tokenizer: stringalign.tokenize.Tokenizer | None = None,
+) -> tuple[dict[AlignmentOperation, float], dict[AlignmentOperation, float]]:
+    """Compute the mean and variance of the number of times each alignment operation occurs in an optimal alignment.
+
+    If there are several optimal alignments, then statistics like the number of times each edit operation occurs depend
+    on which alignment we choose. This function computes the mean and variance of these counts for an optimal alignment
+    chosen uniformly at random, like the ones drawn by :func:`sample_alignments`, but exactly and without sampling.
+
+    The optimal predecessors of the cells in the cost matrix form a directed acyclic graph, and every path through this
+    graph from the first to the last cell is an optimal alignment. We count the paths from the first cell to each cell
+    and from each cell to the last cell. The probability that an alignment operation is used is then the number of
+    paths through it divided by the total number of paths, which is known as the forward-backward algorithm. It takes
+    :math:`O(mn)` time and memory, where :math:`m` and :math:`n` are the number of reference and predicted tokens, and
+    is several times slower than :func:`align_strings`.
+
+    The variances also depend on which operations occur together, so they are computed by propagating the first two
+    moments of the counts along the graph. The optimal alignments are split at the cells that all of them pass
+    through, and the parts between these cells are independent. So the moments are only propagated in the parts where
+    the optimal alignments differ, and only for the operations whose count differs there. For similar strings, these
+    parts are small and this adds little to the running time. In the worst case, where the optimal alignments only
+    share the first and last cell, it takes :math:`O(kmn)` time for the :math:`k` operations whose counts differ.
+
+    Parameters
+    ----------
+    reference
+        The reference string, also known as gold standard or ground truth. It can also be a sequence of tokens or a one
+        dimensional integer array of token ids, which are used without tokenizing.
+    predicted
+        The string to align with the reference, or its tokens or token ids.
+    tokenizer : optional
+        A tokenizer that turns a string into an iterable of tokens. For this function, it is sufficient that it is a
+        callable that turns a string into an iterable of tokens. If not provided, then
+        ``stringalign.tokenize.DEFAULT_TOKENIZER`` is used instead, which by default is a grapheme cluster (character)
+        tokenizer.
+
+    Returns
+    -------
+    expected_counts : dict[AlignmentOperation, float]
+        The mean number of times each alignment operation occurs, for the operations that occur in an optimal
+        alignment.
+    variances : dict[AlignmentOperation, float]
+        The variance of the number of times each alignment operation occurs, for the same operations.
+
+    Examples
+    --------
+    Either of the two ``"l"`` tokens can be deleted, and the other is kept, but there is always one of each:
+
+    >>> expected_counts, variances = expected_alignment_operation_counts("hello", "helo")
+    >>> expected_counts[Deleted("l")], variances[Deleted("l")]
+    (1.0, 0.0)
+
+    There are three optimal alignments of ``"ab"`` and ``"ba"``. We can replace both tokens, or keep one token and delete
+    and insert the other, so each operation occurs in one of the three alignments:
+
+    >>> expected_counts, variances = expected_alignment_operation_counts("ab", "ba")
+    >>> expected_counts[Replaced("b", "a")], variances[Replaced("b", "a")]  # doctest: +ELLIPSIS
+    (0.333..., 0.222...)
+    """
+    if tokenizer is None:
+        tokenizer = stringalign.tokenize.DEFAULT_TOKENIZER
+
+    reference_clusters, predicted_clusters, reference_ids, predicted_ids = _tokenize_and_intern(
+        reference, predicted, tokenizer
+    )
+    op_codes, reference_indices, predicted_indices, means, variances = _operation_moments(reference_ids, predicted_ids)
+    operations = _decode_op_codes(
+        op_codes, reference_indices, predicted_indices, reference_clusters, predicted_clusters
+    )
+    return dict(zip(operations, means.tolist())), dict(zip(operations, variances.tolist()))
+
+
+def _enumerate_alignments(
+    reference_clusters: Sequence[str], predicted_clusters: Sequence[str], skip: int, limit: int | None
+) -> Generator[AlignmentTuple, None, None]:
+    """Yield up to ``limit`` optimal alignments of the tokens, starting with the alignment with rank ``skip``.
+
+    The alignments are fetched from the Rust enumerator in pages that double in size, so the first alignments are
+    available immediately while long enumerations only cross the language boundary a few times.
+    """
+    enumerator = _AlignmentEnumerator(*intern_tokens(reference_clusters, predicted_clusters), skip)
+    page_size = 1
+    while limit is None or limit > 0:
+        n_alignments = page_size if limit is None else min(page_size, limit)
+        op_codes, reference_indices, predicted_indices, offsets, _unique = enumerator.take(n_alignments)
+        for start, stop in pairwise(offsets.tolist()):
+            yield _decode_op_codes(
+                op_codes[start:stop],
+                reference_indices[start:stop],
+                predicted_indices[start:stop],
+                reference_clusters,
+                predicted_clusters,
+            )
+
+        if len(offsets) - 1 < n_alignments:
+            return
+        if limit is not None:
+            limit -= n_alignments
+        page_size = min(2 * page_size, _MAX_ENUMERATION_PAGE_SIZE)
+
+
+def find_all_alignments(
+    reference: str,
+    predicted: str,
+    tokenizer: stringalign.tokenize.Tokenizer | None = None,
+    *,
+    skip: int = 0,
+    limit: int | None = None,
 ) -> Generator[AlignmentTuple, None, None]:
     """Works similarly to align_strings, but returns all possible alignments.
 
-    It's implemented as a generator that yields all possible alignments. It holds a queue of alignments
-    and every time the dynamic programming backtracking encounters a branching point, it creates adds
-    the new branches to the queue.
+    It's implemented as a lazy generator over the graph of optimal predecessors in the cost matrix. The Rust extension
+    only stores the traceback path of the current alignment, and consecutive alignments share the start of their
+    traceback (the end of the alignment), so the next alignment is found by changing the last branching choice and
+    backtracking greedily from there. The memory use is therefore :math:`O(mn)` for the predecessor masks plus
+    :math:`O(m + n)` for the path, no matter how many alignments are generated.
 
-    The backtracking is completed for one alignment before the next is started (with no caching, so the same
-    subpaths might be traversed multiple times).
+    The alignments are ordered by their operations in traceback order, with kept before replaced before deleted before
+    inserted tokens, so the first alignment is the one returned by :func:`align_strings`. To page through the
+    alignments, use ``skip`` and ``limit``. Skipping alignments counts the optimal paths to each cell of the cost
+    matrix, so it takes :math:`O(mn)` time no matter how many alignments are skipped.
 
-    This function has exponential worst-time time-complexity since the number of possible string alignments
-    grows exponentially with the length of the strings.
+    The number of optimal alignments can grow exponentially with the length of the strings, so exhausting this
+    generator can take a very long time. If you only need the number of optimal alignments, use
+    :func:`count_optimal_alignments` instead, and if you need a single alignment with a given rank, use
+    :func:`nth_alignment`.
 
     Parameters
     ----------
@@ -343,38 +1048,91 @@ def find_all_alignments(
         callable that turns a string into an iterable of tokens. If not provided, then
         ``stringalign.tokenize.DEFAULT_TOKENIZER`` is used instead, which by default is a grapheme cluster (character)
         tokenizer.
+    skip
+        The number of alignments to skip before the first yielded alignment.
+    limit : optional
+        The maximum number of alignments to yield. If ``None``, all remaining alignments are yielded.
 
-    Yields
+    Returns
+    -------
+    alignments : Generator[AlignmentTuple, None, None]
+        A lazy generator of the alignments, which are tuples of alignment operations.
+
+    Raises
     ------
-    alignment : AlignmentTuple
-        A tuple of alignment operations.
+    ValueError
+        If ``skip`` or ``limit`` is negative. The arguments are checked when the function is called, not when the
+        first alignment is generated.
+
+    Examples
+    --------
+    >>> for alignment in find_all_alignments("ab", "ba", skip=1, limit=2):
+    ...     print(alignment)
+    (Inserted(substring='b'), Kept(substring='a'), Deleted(substring='b'))
+    (Deleted(substring='a'), Kept(substring='b'), Inserted(substring='a'))
     """
     if tokenizer is None:
         tokenizer = stringalign.tokenize.DEFAULT_TOKENIZER
+    if skip < 0:
+        raise ValueError(f"skip must be non-negative, not {skip}")
+    if limit is not None and limit < 0:
+        raise ValueError(f"limit must be non-negative, not {limit}")
 
     reference_clusters, predicted_clusters = tokenizer(reference), tokenizer(predicted)
-    cost_matrix = create_cost_matrix(reference_clusters, predicted_clusters)
+    return _enumerate_alignments(reference_clusters, predicted_clusters, skip, limit)
+
+
+def nth_alignment(
+    reference: str, predicted: str, n: int, tokenizer: stringalign.tokenize.Tokenizer | None = None
+) -> AlignmentTuple:
+    """Get the optimal alignment with rank ``n`` in the order of :func:`find_all_alignments`.
+
+    The alignment is found without generating the alignments before it. We count the optimal paths from the start of
+    the cost matrix to each cell, and backtrack from the last cell, choosing the optimal predecessor whose paths
+    contain alignment number ``n``. This takes :math:`O(mn)` time and memory, where :math:`m` and :math:`n` are the
+    number of reference and predicted tokens.
 
-    alignment_queue: deque[AlignmentList] = deque([[]])
-    node_queue = deque([(cost_matrix.shape[0] - 1, cost_matrix.shape[1] - 1)])
-    while node_queue:
-        row, col = node_queue.popleft()
-        alignment = alignment_queue.popleft()
+    Parameters
+    ----------
+    reference
+        The reference string, also known as gold standard or ground truth.
+    predicted
+        The string to align with the reference.
+    n
+        The rank of the alignment, starting at zero.
+    tokenizer : optional
+        A tokenizer that turns a string into an iterable of tokens. For this function, it is sufficient that it is a
+        callable that turns a string into an iterable of tokens. If not provided, then
+        ``stringalign.tokenize.DEFAULT_TOKENIZER`` is used instead, which by default is a grapheme cluster (character)
+        tokenizer.
 
-        while row > 0 or col > 0:
-            next_alignment_ops = _backtrack(row, col, reference_clusters, predicted_clusters, cost_matrix)
-            next_op = next(next_alignment_ops)
+    Returns
+    -------
+    AlignmentTuple
+        A tuple of alignment operations.
 
-            for alignment_op in next_alignment_ops:
-                dr, dc = _ALIGNMENT_DIRECTIONS[alignment_op.__class__]
-                alignment_queue.append(alignment + [alignment_op])
-                node_queue.append((row - dr, col - dc))
+    Raises
+    ------
+    ValueError
+        If ``n`` is negative.
+    IndexError
+        If there are not more than ``n`` optimal alignments.
 
-            alignment.append(next_op)
-            dr, dc = _ALIGNMENT_DIRECTIONS[next_op.__class__]
-            row, col = row - dr, col - dc
+    Examples
+    --------
+    >>> nth_alignment("ab", "ba", 2)
+    (Deleted(substring='a'), Kept(substring='b'), Inserted(substring='a'))
+    """
+    if tokenizer is None:
+        tokenizer = stringalign.tokenize.DEFAULT_TOKENIZER
+    if n < 0:
+        raise ValueError(f"n must be non-negative, not {n}")
 
-        yield tuple(alignment[::-1])
+    reference_clusters, predicted_clusters = tokenizer(reference), tokenizer(predicted)
+    alignment = next(_enumerate_alignments(reference_clusters, predicted_clusters, n, 1), None)
+    if alignment is None:
+        raise IndexError(f"There are not more than {n} optimal alignments")
+    return alignment
 
 
 def compute_levenshtein_distance_from_alignment(alignment: Iterable[AlignmentOperation]) -> int:
@@ -395,35 +1153,181 @@ def compute_levenshtein_distance_from_alignment(alignment: Iterable[AlignmentOpe
     return len(tuple(op for op in alignment if not isinstance(op, Kept)))
 
 
+@overload
 def levenshtein_distance(
-    reference: str, predicted: str, tokenizer: stringalign.tokenize.Tokenizer | None = None
-) -> int:
-    """Compute the Levenshtein distance between two strings given a tokenizer.
+    reference: str | Sequence[str] | np.ndarray,
+    predicted: str | Sequence[str] | np.ndarray,
+    tokenizer: stringalign.tokenize.Tokenizer | None = None,
+    max_distance: None = None,
+    engine: DistanceEngine = "auto",
+) -> int: ...
+
+
+@overload
+def levenshtein_distance(
+    reference: str | Sequence[str] | np.ndarray,
+    predicted: str | Sequence[str] | np.ndarray,
+    tokenizer: stringalign.tokenize.Tokenizer | None = None,
+    *,
+    max_distance: int,
+    engine: DistanceEngine = "auto",
+) -> int | None: ...
+
+
+def levenshtein_distance(
+    reference: str | Sequence[str] | np.ndarray,
+    predicted: str | Sequence[str] | np.ndarray,
+    tokenizer: stringalign.tokenize.Tokenizer | None = None,
+    max_distance: int | None = None,
+    engine: DistanceEngine = "auto",
+) -> int | None:
+    r"""Compute the Levenshtein distance between two strings given a tokenizer.
 
     See :ref:`levenshtein_distance` for more information about the Levenshtein distance.
 
+    The distance is computed without aligning the strings, using the bit-parallel algorithm by Myers
+    :cite:p:`myers1999fast` in the block-based formulation by Hyyrö :cite:p:`hyyro2003bit`. It runs in
+    :math:`O(\lceil m/64 \rceil n)` time, where :math:`m` is the number of tokens in the shortest string and
+    :math:`n` is the number of tokens in the longest string.
+
+    If we only need to know the distance when it is small, we can provide ``max_distance``. Then, ``None`` is returned
+    if the distance is larger than ``max_distance``. Strings whose lengths differ by more than ``max_distance`` are
+    rejected without any dynamic programming. For small values of ``max_distance``, the distance is computed in a
+    diagonal band of the cost matrix :cite:p:`UKKONEN1985100`, which needs :math:`O(km)` time, where :math:`k` is the
+    maximum distance. Both this and the bit-parallel algorithm stop as soon as the distance is known to exceed
+    ``max_distance``.
+
+    For long, near-identical strings, the Myers engine is much faster. It computes the distance :math:`d` with the
+    greedy diagonal algorithm :cite:p:`myers1986ond,landau1989fast` in :math:`O((m + n)d)` time, and falls back to
+    the automatic selection above if the distance is more than roughly :math:`\max(m, n) / 64`.
+
     .. note::
 
-        This function will first align the strings and then compute the Levenshtein distance.
         If you already have computed the alignment, you can use :func:`compute_levenshtein_distance_from_alignment`
         instead.
 
     Parameters
     ----------
     reference
-        The reference string, also known as gold standard or ground truth.
+        The reference string, also known as gold standard or ground truth. It can also be a sequence of tokens or a one
+        dimensional integer array of token ids, which are used without tokenizing.
     predicted
-        The string to align with the reference.
+        The string to align with the reference, or its tokens or token ids.
     tokenizer
         A tokenizer that turns a string into an iterable of tokens. For this function, it is sufficient that it is a
         callable that turns a string into an iterable of tokens.
+    max_distance : optional
+        If provided, the largest distance we are interested in.
+    engine
+        The algorithm used to compute the distance, either ``"auto"`` or ``"myers"``.
 
     Returns
     -------
-    distance : int
-        The Levenshtein distance between the two strings.
+    distance : int or None
+        The Levenshtein distance between the two strings, or ``None`` if it is larger than ``max_distance``.
+    """
+    if tokenizer is None:
+        tokenizer = stringalign.tokenize.DEFAULT_TOKENIZER
+    if max_distance is not None and max_distance < 0:
+        raise ValueError(f"max_distance must be non-negative, not {max_distance}")
+    if engine not in {"auto", "myers"}:
+        raise ValueError(f"Invalid distance engine: {engine!r}. Must be 'auto' or 'myers'.")
+
+    reference_ids, predicted_ids = _token_ids(reference, predicted, tokenizer)
+    return _levenshtein_distance(reference_ids, predicted_ids, max_distance, myers=engine == "myers")
+
+
+@overload
+def levenshtein_distances(
+    references: Iterable[str],
+    predictions: Iterable[str],
+    tokenizer: stringalign.tokenize.Tokenizer | None = None,
+    max_distance: None = None,
+    engine: DistanceEngine = "auto",
+    n_threads: int | None = None,
+) -> list[int]: ...
+
+
+@overload
+def levenshtein_distances(
+    references: Iterable[str],
+    predictions: Iterable[str],
+    tokenizer: stringalign.tokenize.Tokenizer | None = None,
+    *,
+    max_distance: int,
+    engine: DistanceEngine = "auto",
+    n_threads: int | None = None,
+) -> list[int | None]: ...
+
+
+def levenshtein_distances(
+    references: Iterable[str],
+    predictions: Iterable[str],
+    tokenizer: stringalign.tokenize.Tokenizer | None = None,
+    max_distance: int | None = None,
+    engine: DistanceEngine = "auto",
+    n_threads: int | None = None,
+) -> list[int] | list[int | None]:
+    """Compute the Levenshtein distance for each pair of reference and predicted strings.
+
+    This gives the same distances as calling :func:`levenshtein_distance` for each pair, but all pairs are processed
+    with one call to the Rust extension, which distributes the pairs over a pool of threads. With ``max_distance``,
+    this is a fast filter for near-duplicates, since most pairs that are far apart are rejected early.
+
+    Parameters
+    ----------
+    references
+        Iterable containing the reference strings.
+    predictions
+        Iterable containing the strings to compare with the references.
+    tokenizer : optional
+        A tokenizer that turns a string into an iterable of tokens. For this function, it is sufficient that it is a
+        callable that turns a string into an iterable of tokens. If not provided, then
+        ``stringalign.tokenize.DEFAULT_TOKENIZER`` is used instead, which by default is a grapheme cluster (character)
+        tokenizer.
+    max_distance : optional
+        If provided, the largest distance we are interested in.
+    engine
+        The algorithm used to compute the distances, see :func:`levenshtein_distance`.
+    n_threads : optional
+        The number of threads used to compute the distances. If not provided, then one thread per CPU is used.
+
+    Returns
+    -------
+    distances : list[int | None]
+        The Levenshtein distance of each pair, or ``None`` for the pairs where it is larger than ``max_distance``.
+
+    Examples
+    --------
+    >>> levenshtein_distances(["kitten", "flaw", "saturday"], ["sitting", "lawn", "sunday"], max_distance=2)
+    [None, 2, None]
     """
-    return compute_levenshtein_distance_from_alignment(align_strings(reference, predicted, tokenizer)[0])
+    if tokenizer is None:
+        tokenizer = stringalign.tokenize.DEFAULT_TOKENIZER
+    if n_threads is None:
+        n_threads = os.cpu_count() or 1
+    if n_threads < 1:
+        raise ValueError(f"n_threads must be positive, not {n_threads}")
+    if max_distance is not None and max_distance < 0:
+        raise ValueError(f"max_distance must be non-negative, not {max_distance}")
+    if engine not in {"auto", "myers"}:
+        raise ValueError(f"Invalid distance engine: {engine!r}. Must be 'auto' or 'myers'.")
+
+    tokenized_pairs = [(tokenizer(r), tokenizer(p)) for r, p in zip(references, predictions, strict=True)]
+    reference_tokens = tuple(reference_tokens for reference_tokens, _ in tokenized_pairs)
+    predicted_tokens = tuple(predicted_tokens for _, predicted_tokens in tokenized_pairs)
+    reference_ids, predicted_ids = intern_tokens(
+        chain.from_iterable(reference_tokens), chain.from_iterable(predicted_tokens)
+    )
+    return _levenshtein_distances(
+        reference_ids,
+        _token_offsets(reference_tokens),
+        predicted_ids,
+        _token_offsets(predicted_tokens),
+        max_distance,
+        engine == "myers",
+        n_threads,
+    )
 
 
 def combine_alignment_ops(
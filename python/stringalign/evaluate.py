@@ -13,19 +13,23 @@ import numpy as np
 
 import stringalign
 from stringalign.align import (
+    AlignmentEngine,
     AlignmentOperation,
     AlignmentTuple,
     Kept,
     Replaced,
+    align_many,
     align_strings,
     combine_alignment_ops,
+    count_optimal_alignments,
+    expected_alignment_operation_counts,
 )
 from stringalign.error_classification.case_error import count_case_errors
 from stringalign.error_classification.confusable_error import count_confusable_errors
 from stringalign.error_classification.diacritic_error import count_diacritic_errors
 from stringalign.error_classification.duplication_error import check_ngram_duplication_errors
 from stringalign.normalize import StringNormalizer
-from stringalign.statistics import StringConfusionMatrix
+from stringalign.statistics import FractionalCounter, StringConfusionMatrix
 from stringalign.tokenize import Tokenizer
 from stringalign.utils import _indent
 from stringalign.visualize import HtmlString
@@ -443,6 +447,20 @@ class AlignmentAnalyzer:
             reference=self.reference, predicted=self.predicted, alignment=self.raw_alignment, tokenizer=self.tokenizer
         )
 
+    @cached_property
+    def optimal_alignment_count(self) -> int:
+        """The number of optimal alignments for this string pair.
+
+        This is more informative than :attr:`unique_alignment` when assessing how ambiguous an alignment is, e.g. a
+        doubled letter has as many optimal alignments as the length of the run it is in. The count saturates at
+        ``2**64 - 1``, see :func:`stringalign.align.count_optimal_alignments`.
+
+        Returns
+        -------
+        int
+        """
+        return count_optimal_alignments(self.reference, self.predicted, tokenizer=self.tokenizer)
+
     @classmethod
     def from_strings(
         cls,
@@ -452,6 +470,7 @@ class AlignmentAnalyzer:
         metadata: Mapping[Hashable, Hashable] | None = None,
         randomize_alignment: bool = False,
         random_state: np.random.Generator | int | None = None,
+        engine: AlignmentEngine = "auto",
     ) -> Self:
         """
         Create a AlignmentAnalyzer based on a reference string and a predicted string given a tokenizer.
@@ -462,8 +481,6 @@ class AlignmentAnalyzer:
             The reference string, also known as gold standard or ground truth.
         predicted
             The string to align with the reference.
-        alignment
-            An optimal alignment for these strings
         tokenizer : optional
             A tokenizer that turns a string into an iterable of tokens. For this function, it is sufficient that it is a
             callable that turns a string into an iterable of tokens. If not provided, then
@@ -476,6 +493,9 @@ class AlignmentAnalyzer:
         random_state
             The NumPy RNG or a seed to create a NumPy RNG used for picking the optimal alignment. If ``None``, then the
             default RNG will be used instead.
+        engine
+            The alignment algorithm to use, see :func:`stringalign.align.align_strings`. Use ``"anchored"`` for
+            document-level strings, such as whole books.
 
 
         Returns
@@ -492,7 +512,49 @@ class AlignmentAnalyzer:
             tokenizer=tokenizer,
             randomize_alignment=randomize_alignment,
             random_state=random_state,
+            engine=engine,
         )
+        return cls.from_strings_and_alignment(
+            reference, predicted, raw_alignment, unique_alignment, tokenizer=tokenizer, metadata=metadata
+        )
+
+    @classmethod
+    def from_strings_and_alignment(
+        cls,
+        reference: str,
+        predicted: str,
+        raw_alignment: AlignmentTuple,
+        unique_alignment: bool,
+        tokenizer: Tokenizer | None,
+        metadata: Mapping[Hashable, Hashable] | None = None,
+    ) -> Self:
+        """
+        Create a AlignmentAnalyzer based on a reference string, a predicted string and an optimal alignment.
+
+        Parameters
+        ----------
+        reference
+            The reference string, also known as gold standard or ground truth.
+        predicted
+            The string to align with the reference.
+        raw_alignment
+            An optimal alignment for these strings, e.g. from :func:`stringalign.align.align_strings`.
+        unique_alignment
+            Whether the alignment is the only optimal alignment for these strings.
+        tokenizer : optional
+            The tokenizer used to create the alignment. If not provided, then ``stringalign.tokenize.DEFAULT_TOKENIZER``
+            is used instead, which by default is a grapheme cluster (character) tokenizer.
+        metadata
+            Additional metadata about the sample, e.g. sample id.
+
+        Returns
+        -------
+        alignment_analyzer : AlignmentAnalyzer
+            The AlignmentAnalyzer object.
+        """
+        if tokenizer is None:
+            tokenizer = stringalign.tokenize.DEFAULT_TOKENIZER
+
         combined_alignment = tuple(combine_alignment_ops(raw_alignment, tokenizer=tokenizer))
         if metadata is not None:
             frozen_metadata = FrozenDict(metadata)
@@ -715,6 +777,65 @@ class MultiAlignmentAnalyzer:
             "raw": remove_kept_from_counter(self.alignment_operation_counts["raw"]),
         }
 
+    @cached_property
+    def _edit_count_moments(
+        self,
+    ) -> tuple[FractionalCounter[AlignmentOperation], FractionalCounter[AlignmentOperation]]:
+        expected_counts: FractionalCounter[AlignmentOperation] = FractionalCounter()
+        variances: FractionalCounter[AlignmentOperation] = FractionalCounter()
+        for analyzer in self.alignment_analyzers:
+            sample_expected_counts, sample_variances = expected_alignment_operation_counts(
+                analyzer.reference, analyzer.predicted, tokenizer=analyzer.tokenizer
+            )
+            for op, expected_count in sample_expected_counts.items():
+                if not isinstance(op, Kept):
+                    expected_counts[op] += expected_count
+                    variances[op] += sample_variances[op]
+
+        return expected_counts, variances
+
+    @property
+    def expected_edit_counts(self) -> FractionalCounter[AlignmentOperation]:
+        """The expected number of times each edit operation occurs if every sample is aligned with a random alignment.
+
+        The alignment of each sample is chosen uniformly at random among its optimal alignments. This is the exact
+        limit of averaging :attr:`edit_counts` over many analyzers created with ``randomize_alignment=True``, but it is
+        computed without sampling (see :func:`stringalign.align.expected_alignment_operation_counts`).
+
+        Returns
+        -------
+        FractionalCounter[AlignmentOperation]
+            The expected number of times each edit operation occurs.
+
+        See also
+        --------
+        edit_count_variances
+        """
+        return self._edit_count_moments[0]
+
+    @property
+    def edit_count_variances(self) -> FractionalCounter[AlignmentOperation]:
+        """The variance of the number of times each edit operation occurs if every sample is aligned randomly.
+
+        The alignments of the samples are chosen independently and uniformly at random among their optimal alignments,
+        so the variance is the sum of the variances for each sample. The square root of the variance is a measure of
+        how much the edit counts depend on the choice of optimal alignments.
+
+        The variances are computed with the expected counts, and only the parts of each cost matrix where the optimal
+        alignments differ add to the running time, see
+        :func:`stringalign.align.expected_alignment_operation_counts` for the worst case.
+
+        Returns
+        -------
+        FractionalCounter[AlignmentOperation]
+            The variance of the number of times each edit operation occurs.
+
+        See also
+        --------
+        expected_edit_counts
+        """
+        return self._edit_count_moments[1]
+
     @cached_property
     def confusion_matrix(self) -> StringConfusionMatrix:
         """The micro-averaged confusion matrix for all samples."""
@@ -830,6 +951,8 @@ class MultiAlignmentAnalyzer:
         metadata: Iterable[Mapping[Hashable, Hashable] | None] | None = None,
         randomize_alignment: bool = False,
         random_state: np.random.Generator | int | None = None,
+        n_threads: int = 1,
+        engine: AlignmentEngine = "auto",
     ) -> Self:
         """Creates a transcription evaluator from iterables containing references and predictions.
 
@@ -851,6 +974,14 @@ class MultiAlignmentAnalyzer:
         random_state
             The NumPy RNG or a seed to create a NumPy RNG used for picking the optimal alignment. If ``None``, then the
             default RNG will be used instead.
+        n_threads
+            The number of threads used to align the string pairs (see :func:`stringalign.align.align_many`).
+            Randomized alignments are always computed in a single thread, so the results are reproducible for a given
+            random state.
+        engine
+            The alignment algorithm to use, see :func:`stringalign.align.align_strings`. Use ``"anchored"`` for
+            document-level inputs, such as whole books, where the gaps between anchors of each document are aligned
+            with ``n_threads`` threads.
 
         Returns
         -------
@@ -860,18 +991,32 @@ class MultiAlignmentAnalyzer:
         predictions = tuple(predictions)
         if metadata is None:
             metadata = tuple(None for _ in references)
+        if tokenizer is None:
+            tokenizer = stringalign.tokenize.DEFAULT_TOKENIZER
 
-        alignment_analyzers = tuple(
-            AlignmentAnalyzer.from_strings(
-                reference,
-                prediction,
-                tokenizer,
-                metadata=metadata,
-                randomize_alignment=randomize_alignment,
-                random_state=random_state,
+        if randomize_alignment:
+            alignment_analyzers = tuple(
+                AlignmentAnalyzer.from_strings(
+                    reference,
+                    prediction,
+                    tokenizer,
+                    metadata=metadata,
+                    randomize_alignment=randomize_alignment,
+                    random_state=random_state,
+                    engine=engine,
+                )
+                for reference, prediction, metadata in zip(references, predictions, metadata, strict=True)
+            )
+        else:
+            alignments = align_many(references, predictions, tokenizer=tokenizer, n_threads=n_threads, engine=engine)
+            alignment_analyzers = tuple(
+                AlignmentAnalyzer.from_strings_and_alignment(
+                    reference, prediction, raw_alignment, unique_alignment, tokenizer, metadata=metadata
+                )
+                for reference, prediction, (raw_alignment, unique_alignment), metadata in zip(
+                    references, predictions, alignments, metadata, strict=True
+                )
             )
-            for reference, prediction, metadata in zip(references, predictions, metadata, strict=True)
-        )
 
         return cls(
             references=references,
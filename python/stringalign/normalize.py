@@ -1,10 +1,12 @@
-import json
 import re
 import unicodedata
-from functools import lru_cache
-from pathlib import Path
+from collections.abc import Callable
+from functools import lru_cache, partial
 from typing import Literal
 
+from stringalign._stringutils import ConfusableMatcher as _ConfusableMatcher
+from stringalign._stringutils import bundled_confusable_map as _bundled_confusable_map
+
 
 def normalize_whitespace(text: str) -> str:
     """Normalize whitespace in the text to a single space."""
@@ -21,22 +23,64 @@ def remove_non_word_characters(text: str) -> str:
     return re.sub(r"[^\w\s]|_", "", text)
 
 
+# The number of confusable maps whose compiled matchers are cached.
+_MAX_CACHED_CONFUSABLE_MAPS = 32
+
+# The compiled matchers of the confusable maps by the identity of the map. The map is stored with its matcher, so its id
+# cannot be reused by another dictionary while it is in the cache.
+_confusable_matchers: dict[int, tuple[dict[str, str], _ConfusableMatcher]] = {}
+
+
+def _compile_confusable_map(confusable_map: dict[str, str]) -> _ConfusableMatcher:
+    """Get the matcher of the confusable map, which is compiled the first time the map is used."""
+    cached = _confusable_matchers.get(id(confusable_map))
+    if cached is not None:
+        return cached[1]
+
+    matcher = _ConfusableMatcher(confusable_map)
+    if len(_confusable_matchers) >= _MAX_CACHED_CONFUSABLE_MAPS:
+        del _confusable_matchers[next(iter(_confusable_matchers))]
+    _confusable_matchers[id(confusable_map)] = (confusable_map, matcher)
+    return matcher
+
+
+def _resolve_confusables_in_python(text: str, confusable_map: dict[str, str]) -> str:
+    """Resolve the leftmost-longest confusables like the compiled matcher, for strings that cannot be passed to Rust."""
+    max_length = max(map(len, confusable_map), default=0)
+    resolved = []
+    position = 0
+    while position < len(text):
+        for length in range(min(max_length, len(text) - position), 0, -1):
+            replacement = confusable_map.get(text[position : position + length])
+            if replacement is not None:
+                resolved.append(replacement)
+                position += length
+                break
+        else:
+            resolved.append(text[position])
+            position += 1
+    return "".join(resolved)
+
+
 def resolve_confusables(text: str, confusable_map: dict[str, str]) -> str:
     r"""Resolve confusable characters in the text using the provided mapping.
 
-    Confusables are resolved by first resolving each single code point confusable, which has the computational
-    complexity :math:`O(n)`, with :math:`n` being the string length. Then, we iterate over all confusables that span
-    multiple code points and resolve them one-by-one, which has the computational complexity
-    :math:`O(|\text{len}(\text{conf}) > 2| n)`, where :math:`|\text{len}(\text{conf})| > 1|` is the number of
-    confusables with more than one code point.
-    """
-    out = "".join(confusable_map.get(char, char) for char in text)
+    The keys of the mapping are compiled into a trie in Rust the first time the mapping is used, and the text is
+    resolved in one pass. At each position, the longest key that starts there is replaced, and the search continues
+    after it, so the replacements never overlap and are never replaced again. This has the computational complexity
+    :math:`O(nk)`, with :math:`n` being the string length and :math:`k` being the number of code points in the longest
+    key, which is one for the Unicode confusables.
 
-    for k, v in confusable_map.items():
-        if len(k) > 1:
-            out = out.replace(k, v)
+    .. note::
 
-    return out
+        The compiled trie is cached by the identity of the mapping, so changes to a mapping after it has been used are
+        ignored. Create a new dictionary instead of changing it in-place.
+    """
+    try:
+        return _compile_confusable_map(confusable_map).resolve(text)
+    except UnicodeEncodeError:
+        # Strings with lone surrogates cannot be passed to Rust.
+        return _resolve_confusables_in_python(text, confusable_map)
 
 
 @lru_cache
@@ -69,16 +113,45 @@ def load_confusable_map(confusable_type: Literal["confusables", "intentional"])
     if not confusable_type in {"confusables", "intentional"}:
         raise ValueError(f"Invalid confusable type: {confusable_type}. Must be 'confusables' or 'intentional'.")
 
-    confusable_data = Path(__file__).with_name("unicode_data") / f"{confusable_type}.json"
-    assert confusable_data.exists(), (
-        f"Confusable data file not found: {confusable_data}. This is a bug and should be reported."
-    )
+    # The map is created from the precompiled table in the Rust extension, which is faster than parsing the JSON file.
+    return _bundled_confusable_map(confusable_type)
+
+
+@lru_cache
+def _bundled_confusable_matcher(confusable_type: Literal["confusables", "intentional"]) -> _ConfusableMatcher:
+    """Get the matcher of the Unicode confusables, which looks them up in the precompiled table without a map."""
+    return _ConfusableMatcher.bundled(confusable_type)
+
+
+def _resolve_bundled_confusables(text: str, confusable_type: Literal["confusables", "intentional"]) -> str:
+    """Resolve the Unicode confusables like ``resolve_confusables(text, load_confusable_map(confusable_type))``."""
+    try:
+        return _bundled_confusable_matcher(confusable_type).resolve(text)
+    except UnicodeEncodeError:
+        # Strings with lone surrogates cannot be passed to Rust.
+        return _resolve_confusables_in_python(text, load_confusable_map(confusable_type))
 
-    with confusable_data.open(encoding="utf-8") as f:
-        return json.load(f)
+
+def _normalize(form: Literal["NFC", "NFD", "NFKC", "NFKD"], text: str) -> str:
+    """Normalize the text with the given form, unless the (quick) check finds that it is already normalized."""
+    if unicodedata.is_normalized(form, text):
+        return text
+    return unicodedata.normalize(form, text)
+
+
+# The parameters of StringNormalizer, which determine its plan.
+_SETTINGS = frozenset(
+    {
+        "normalization",
+        "case_insensitive",
+        "normalize_whitespace",
+        "remove_whitespace",
+        "remove_non_word_characters",
+        "resolve_confusables",
+    }
+)
 
 
-#
 class StringNormalizer:
     r"""Simple string normalizer, used to remove "irrelevant" differences when comparing strings.
 
@@ -100,11 +173,10 @@ class StringNormalizer:
         occurence of a key in the text will be replaced with its corresponding value (so ``{"a": "b"}`` will replace all
         occurences of "a" with "b" in the text). If it's None, then no confusable characters will be resolved.
 
-        Confusables are resolved by first resolving each single code point confusable, which has the computational
-        complexity :math:`O(n)`, with :math:`n` being the string length. Then, we iterate over all confusables that span
-        multiple code points and resolve them one-by-one, which has the computational complexity
-        :math:`O(|\text{len}(\text{conf}) > 2| n)`, where :math:`|\text{len}(\text{conf})| > 1|` is the number of
-        confusables with more than one code point.
+        Confusables are resolved in one pass, where the longest key that starts at each position is replaced (see
+        :func:`resolve_confusables`). The keys are compiled into a trie once per dictionary, so a dictionary should not
+        be changed after it is used. The Unicode confusables are looked up in precompiled tables in the Rust extension,
+        so they are ready without loading their map.
 
     See also
     --------
@@ -113,8 +185,18 @@ class StringNormalizer:
     remove_non_word_characters
     resolve_confusables
     load_confusable_map
+
+    Notes
+    -----
+    The steps that are needed for the settings are compiled into a plan when the normalizer is created, so steps that
+    cannot change the text are skipped. For example, the text is only normalized a second time if a step after the
+    first normalization can make it unnormalized, and Unicode normalization is skipped for text that passes the quick
+    check of :func:`unicodedata.is_normalized`. If the plan is empty, then :attr:`is_identity` is true, and the
+    tokenizers skip calling the normalizer for every token.
     """
 
+    _plan: tuple[Callable[[str], str], ...] | None
+
     def __init__(
         self,
         normalization: Literal["NFC", "NFD", "NFKC", "NFKD", None] = "NFC",
@@ -130,42 +212,82 @@ class StringNormalizer:
         self.remove_whitespace = remove_whitespace
         self.remove_non_word_characters = remove_non_word_characters
         self.resolve_confusables = resolve_confusables
+        self._plan = self._compile_plan()
+
+    def __setattr__(self, name: str, value: object) -> None:
+        super().__setattr__(name, value)
+        # The plan is compiled again the next time the normalizer is used if a setting is changed.
+        if name in _SETTINGS:
+            super().__setattr__("_plan", None)
 
     def __repr__(self) -> str:
         out = f"{self.__class__.__name__}(\n"
         for key, value in self.__dict__.items():
-            out += f"    {key}={value!r},\n"
+            if key in _SETTINGS:
+                out += f"    {key}={value!r},\n"
         out += ")"
         return out
 
-    def __call__(self, text: str) -> str:
+    def _get_confusable_matcher(self) -> _ConfusableMatcher | None:
+        if self.resolve_confusables is None:
+            return None
+        if isinstance(self.resolve_confusables, dict):
+            return _compile_confusable_map(self.resolve_confusables)
+        return _bundled_confusable_matcher(self.resolve_confusables)
+
+    def _compile_plan(self) -> tuple[Callable[[str], str], ...]:
+        """Find the steps of the normalization that can change the text, in the order they are applied."""
+        steps: list[Callable[[str], str]] = []
+
         # First, we resolve confusables, to avoid resolving confusables that occur due to case-folding.
-        if self.resolve_confusables is not None:
-            if isinstance(self.resolve_confusables, dict):
-                confusable_map = self.resolve_confusables
-            else:
-                confusable_map = load_confusable_map(self.resolve_confusables)
-            text = resolve_confusables(text, confusable_map)
+        if isinstance(self.resolve_confusables, dict):
+            steps.append(partial(resolve_confusables, confusable_map=self.resolve_confusables))
+        elif self.resolve_confusables is not None:
+            # The Unicode confusables are resolved with the precompiled table, so their map is never loaded. Getting the
+            # matcher here raises a ValueError for invalid confusable types.
+            _bundled_confusable_matcher(self.resolve_confusables)
+            steps.append(partial(_resolve_bundled_confusables, confusable_type=self.resolve_confusables))
 
         # According to Unicode, strings should be we should case-folded + normalized + case-folded + normalized
         # See https://www.unicode.org/reports/tr21/tr21-5.html
         if self.case_insensitive:
-            text = text.casefold()
+            steps.append(str.casefold)
         if self.normalization is not None:
-            text = unicodedata.normalize(self.normalization, text)
+            steps.append(partial(_normalize, self.normalization))
         if self.case_insensitive:
-            text = text.casefold()
+            steps.append(str.casefold)
 
         if self.normalize_whitespace:
-            text = normalize_whitespace(text)
+            steps.append(normalize_whitespace)
         if self.remove_whitespace:
-            text = remove_whitespace(text)
+            steps.append(remove_whitespace)
         if self.remove_non_word_characters:
-            text = remove_non_word_characters(text)
+            steps.append(remove_non_word_characters)
 
         # Some of these operations, like casefolding, can make normalized text unnormalized.
-        # So we normalize again to ensure the text is in the correct form.
-        if self.normalization is not None:
-            text = unicodedata.normalize(self.normalization, text)
+        # So we normalize again to ensure the text is in the correct form. Without them, the text is already normalized.
+        changes_normalized_text = (
+            self.case_insensitive
+            or self.normalize_whitespace
+            or self.remove_whitespace
+            or self.remove_non_word_characters
+        )
+        if self.normalization is not None and changes_normalized_text:
+            steps.append(partial(_normalize, self.normalization))
+
+        return tuple(steps)
+
+    @property
+    def is_identity(self) -> bool:
+        """Whether the normalizer returns every string unchanged, so calling it can be skipped."""
+        return not self._get_plan()
+
+    def _get_plan(self) -> tuple[Callable[[str], str], ...]:
+        if self._plan is None:
+            self._plan = self._compile_plan()
+        return self._plan
 
+    def __call__(self, text: str) -> str:
+        for step in self._get_plan():
+            text = step(text)
         return text
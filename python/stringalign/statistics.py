@@ -1,17 +1,27 @@
 import warnings
 from collections import Counter, defaultdict
-from collections.abc import Iterable
+from collections.abc import Iterable, Mapping, MutableMapping, Sequence
 from dataclasses import dataclass
 from numbers import Number
-from typing import Self, cast
+from typing import Literal, Self, TypeVar, cast
 
 import numpy as np
 
 import stringalign
-from stringalign.align import AlignmentOperation, Kept, Replaced, align_strings
+from stringalign.align import (
+    AlignmentOperation,
+    Kept,
+    Replaced,
+    align_many,
+    align_strings,
+    expected_alignment_operation_counts,
+)
 from stringalign.tokenize import Tokenizer
 
-__all__ = ["CombinedAlignmentWarning", "StringConfusionMatrix"]
+__all__ = ["CombinedAlignmentWarning", "FractionalCounter", "StringConfusionMatrix"]
+
+T = TypeVar("T")
+Count = TypeVar("Count", int, float)
 
 
 def sort_by_values(d: dict[str, float], reverse=False) -> dict[str, float]:
@@ -35,6 +45,57 @@ def _is_combined_alignment(alignment: Iterable[AlignmentOperation], tokenizer: T
     return False
 
 
+class FractionalCounter(dict[T, float]):
+    """A counter with fractional counts, e.g. the expected number of times each token occurs.
+
+    Like a :class:`collections.Counter`, the count of a missing key is zero, and adding two counters adds the counts of
+    each key. A :class:`~collections.Counter` can also store fractional counts, but it is typed with integer counts, so
+    we use this counter where the counts are not integers in general.
+
+    Examples
+    --------
+    >>> counts = FractionalCounter({"a": 0.5})
+    >>> counts["b"]
+    0.0
+    >>> counts + Counter({"a": 1, "b": 2})
+    {'a': 1.5, 'b': 2.0}
+    """
+
+    def __missing__(self, key: T) -> float:
+        return 0.0
+
+    def __add__(self, other: Mapping[T, float]) -> "FractionalCounter[T]":
+        if not isinstance(other, Mapping):
+            return NotImplemented
+        total = FractionalCounter(self)
+        for key, count in other.items():
+            total[key] += count
+        return total
+
+    __radd__ = __add__
+
+
+def _count_operations(
+    operation_counts: Mapping[AlignmentOperation, Count],
+    true_positives: MutableMapping[str, Count],
+    false_positives: MutableMapping[str, Count],
+    false_negatives: MutableMapping[str, Count],
+    edit_counts: MutableMapping[AlignmentOperation, Count],
+) -> None:
+    """Add the number of times each single-token operation occurs to the counts of a confusion matrix."""
+    for op, count in operation_counts.items():
+        if isinstance(op, Kept):
+            true_positives[op.substring] += count
+            continue
+
+        edit_counts[op] += count
+        op = cast(Replaced, op.generalize())
+        if op.predicted:
+            false_positives[op.predicted] += count
+        if op.reference:
+            false_negatives[op.reference] += count
+
+
 def _compute_f1_from_tpr_and_ppv(tpr: float, ppv: float) -> float:
     # If either tpr or ppv is 0, then the F1-score is zero.
     # However, the ppv or tpr can be NAN if any of the computations would involve dividing by zero.
@@ -74,6 +135,10 @@ class StringConfusionMatrix:
     * **Edit count:** The number of edit operations (:class:`stringalign.align.Inserted`,
       :class:`stringalign.align.Deleted` or :class:`stringalign.align.Replaced`)
 
+    The counts are stored in :class:`collections.Counter` objects, except for confusion matrices created with
+    ``alignment="expected"`` (see :meth:`from_strings`), where they are the expected counts over all optimal alignments
+    and stored in :class:`FractionalCounter` objects. Adding the two kinds of confusion matrices gives fractional counts.
+
     In general, you should not initialize this class with the default constructor, but rather use some of the utility
     constructors:
 
@@ -83,10 +148,10 @@ class StringConfusionMatrix:
     * :meth:`get_empty`
     """
 
-    true_positives: Counter[str]
-    false_positives: Counter[str]  # Added tokens
-    false_negatives: Counter[str]  # Removed/missed tokens
-    edit_counts: Counter[AlignmentOperation]  # Count of each operation type
+    true_positives: Counter[str] | FractionalCounter[str]
+    false_positives: Counter[str] | FractionalCounter[str]  # Added tokens
+    false_negatives: Counter[str] | FractionalCounter[str]  # Removed/missed tokens
+    edit_counts: Counter[AlignmentOperation] | FractionalCounter[AlignmentOperation]  # Count of each operation type
     # There is no true negatives when we compare strings.
     # Either, a character is in the string or it is not.
 
@@ -172,11 +237,13 @@ class StringConfusionMatrix:
     @classmethod
     def from_strings(
         cls,
-        reference: str,
-        predicted: str,
+        reference: str | Sequence[str] | np.ndarray,
+        predicted: str | Sequence[str] | np.ndarray,
         tokenizer: Tokenizer | None = None,
         randomize_alignment: bool = False,
         random_state: np.random.Generator | int | None = None,
+        max_distance: int | None = None,
+        alignment: Literal["single", "expected"] = "single",
     ) -> Self:
         """Create confusion matrix based on a reference string and a predicted string.
 
@@ -189,9 +256,11 @@ class StringConfusionMatrix:
         Parameters
         ----------
         reference
-            The reference string, also known as gold standard or ground truth.
+            The reference string, also known as gold standard or ground truth. It can also be a sequence of tokens or a
+            one dimensional integer array of token ids, which are used without tokenizing. Then, the tokens of the
+            confusion matrix are the given tokens or the decimal strings of the token ids.
         predicted
-            The string to align with the reference.
+            The string to align with the reference, or its tokens or token ids.
         tokenizer : optional
             A tokenizer that turns a string into an iterable of tokens. For this function, it is sufficient that it is a
             callable that turns a string into an iterable of tokens. If not provided, then
@@ -202,6 +271,15 @@ class StringConfusionMatrix:
         random_state
             The NumPy RNG or a seed to create a NumPy RNG used for picking the optimal alignment. If ``None``, then the
             default RNG will be used instead.
+        max_distance : optional
+            An estimate of the largest expected Levenshtein distance between the strings, used to speed up the
+            alignment. See :func:`stringalign.align.align_strings` for more information.
+        alignment
+            If ``"single"``, then the confusion matrix is computed from one optimal alignment. If ``"expected"``, then
+            the counts are averaged over all optimal alignments (see
+            :func:`stringalign.align.expected_alignment_operation_counts`), so they are not integers in general and
+            are stored in :class:`FractionalCounter` objects. In that case, ``randomize_alignment``, ``random_state``
+            and ``max_distance`` are ignored.
 
         Returns
         -------
@@ -210,15 +288,55 @@ class StringConfusionMatrix:
         """
         if tokenizer is None:
             tokenizer = stringalign.tokenize.DEFAULT_TOKENIZER
+        if alignment not in {"single", "expected"}:
+            raise ValueError(f"Invalid alignment: {alignment!r}. Must be 'single' or 'expected'.")
+
+        if alignment == "expected":
+            expected_counts, _variances = expected_alignment_operation_counts(reference, predicted, tokenizer=tokenizer)
+            return cls._from_expected_alignment_operation_counts(expected_counts)
 
-        alignment = align_strings(
+        single_alignment = align_strings(
             reference,
             predicted,
             tokenizer=tokenizer,
             randomize_alignment=randomize_alignment,
             random_state=random_state,
+            max_distance=max_distance,
         )[0]
-        return cls.from_strings_and_alignment(reference, predicted, alignment, tokenizer=tokenizer)
+        if not isinstance(reference, str) or not isinstance(predicted, str):
+            # The alignment of tokens only has single-token operations, so we count them instead of re-tokenizing.
+            return cls._from_alignment_operation_counts(Counter(single_alignment))
+        return cls.from_strings_and_alignment(reference, predicted, single_alignment, tokenizer=tokenizer)
+
+    @classmethod
+    def _from_alignment_operation_counts(cls, operation_counts: Mapping[AlignmentOperation, int]) -> Self:
+        """Create confusion matrix from the number of times each single-token operation occurs."""
+        true_positives: Counter[str] = Counter()
+        false_positives: Counter[str] = Counter()
+        false_negatives: Counter[str] = Counter()
+        edit_counts: Counter[AlignmentOperation] = Counter()
+        _count_operations(operation_counts, true_positives, false_positives, false_negatives, edit_counts)
+        return cls(
+            true_positives=true_positives,
+            false_positives=false_positives,
+            false_negatives=false_negatives,
+            edit_counts=edit_counts,
+        )
+
+    @classmethod
+    def _from_expected_alignment_operation_counts(cls, expected_counts: Mapping[AlignmentOperation, float]) -> Self:
+        """Create confusion matrix from the expected number of times each single-token operation occurs."""
+        true_positives: FractionalCounter[str] = FractionalCounter()
+        false_positives: FractionalCounter[str] = FractionalCounter()
+        false_negatives: FractionalCounter[str] = FractionalCounter()
+        edit_counts: FractionalCounter[AlignmentOperation] = FractionalCounter()
+        _count_operations(expected_counts, true_positives, false_positives, false_negatives, edit_counts)
+        return cls(
+            true_positives=true_positives,
+            false_positives=false_positives,
+            false_negatives=false_negatives,
+            edit_counts=edit_counts,
+        )
 
     @classmethod
     def from_string_collections(
@@ -226,6 +344,7 @@ class StringConfusionMatrix:
         references: Iterable[str],
         predictions: Iterable[str],
         tokenizer: Tokenizer | None = None,
+        n_threads: int = 1,
     ) -> Self:
         """Create confusion matrix for many strings, summing statistics across pairs of references and predictions.
 
@@ -240,6 +359,8 @@ class StringConfusionMatrix:
             callable that turns a string into an iterable of tokens. If not provided, then
             ``stringalign.tokenize.DEFAULT_TOKENIZER`` is used instead, which by default is a grapheme cluster
             (character) tokenizer.
+        n_threads
+            The number of threads used to align the string pairs (see :func:`stringalign.align.align_many`).
 
         Returns
         -------
@@ -249,9 +370,11 @@ class StringConfusionMatrix:
         if tokenizer is None:
             tokenizer = stringalign.tokenize.DEFAULT_TOKENIZER
 
+        references, predictions = tuple(references), tuple(predictions)
+        alignments = align_many(references, predictions, tokenizer=tokenizer, n_threads=n_threads)
         confusion_matrices = (
-            cls.from_strings(reference, predicted, tokenizer=tokenizer)
-            for reference, predicted in zip(references, predictions, strict=True)
+            cls.from_strings_and_alignment(reference, predicted, alignment, tokenizer=tokenizer)
+            for reference, predicted, (alignment, _) in zip(references, predictions, alignments, strict=True)
         )
         return sum(confusion_matrices, start=cls.get_empty())
 
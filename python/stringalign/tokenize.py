@@ -1,7 +1,10 @@
+import re
 import string
-from collections.abc import Iterable
+from collections.abc import Iterable, Sequence
 from inspect import cleandoc
-from typing import Callable, Protocol
+from typing import Callable, Literal, Protocol
+
+import numpy as np
 
 import stringalign._stringutils
 from stringalign.normalize import StringNormalizer
@@ -22,6 +25,29 @@ class Tokenizer(Protocol):
         """
 
 
+class SpanTokenizer(Tokenizer, Protocol):
+    """Tokenizer that can also find the positions of the tokens in the text, without creating a string per token.
+
+    All built-in tokenizers are span tokenizers.
+    """
+
+    def spans(self, text: str) -> np.ndarray:
+        """Find the start and end offsets of the tokens as an ``(n_tokens, 2)`` array of ``int32``.
+
+        The offsets are code point indices into the text after the pre-tokenization normalizer, so if ``normalized`` is
+        that text, then token ``i`` is ``normalized[start:end]`` with ``start, end = spans[i]``, before the
+        post-tokenization normalizer is applied to it.
+
+        Examples
+        --------
+        >>> GraphemeClusterTokenizer().spans("abc🏳️‍🌈")
+        array([[0, 1],
+               [1, 2],
+               [2, 3],
+               [3, 7]], dtype=int32)
+        """
+
+
 def _add_join(tokenizer: Callable[[str], list[str]], sep: str = " ") -> Tokenizer:
     """Function that `join` method to a tokenizer function.
     This allows the tokenizer to be used with the Tokenizer protocol.
@@ -81,6 +107,95 @@ def add_join(sep: str = " ") -> Callable[[Callable[[str], list[str]]], Tokenizer
     return decorator
 
 
+_Segmentation = Literal["grapheme_clusters", "unicode_words", "word_boundaries", "whitespace"]
+
+_SEGMENTERS: dict[_Segmentation, Callable[[str], list[str]]] = {
+    "grapheme_clusters": stringalign._stringutils.grapheme_clusters,
+    "unicode_words": stringalign._stringutils.unicode_words,
+    "word_boundaries": stringalign._stringutils.split_at_word_boundaries,
+    "whitespace": str.split,
+}
+
+
+def _rust_normalizer_arguments(
+    normalizer: StringNormalizer,
+) -> tuple[stringalign._stringutils.ConfusableMatcher | None, str | None, bool, bool, bool, bool]:
+    """The settings of the normalizer as the arguments of the Rust functions that normalize tokens."""
+    return (
+        normalizer._get_confusable_matcher(),
+        normalizer.normalization,
+        normalizer.case_insensitive,
+        normalizer.normalize_whitespace,
+        normalizer.remove_whitespace,
+        normalizer.remove_non_word_characters,
+    )
+
+
+def _normalized_tokens(text: str, segmentation: _Segmentation, normalizer: StringNormalizer) -> list[str]:
+    """Split the text into tokens and normalize each token.
+
+    The segmentation and the normalization of the tokens are done in one pass in Rust. The Rust extension may use
+    another Unicode version than the :mod:`unicodedata` module, so it leaves the tokens whose normalization depends on
+    the Unicode version to the Python normalizer. Confusables are resolved with the same matcher as in the Python
+    normalizer. Subclasses of :class:`stringalign.normalize.StringNormalizer` are applied to every token in Python, and
+    so are the normalizers of text that cannot be encoded as UTF-8. Normalizers that do nothing are skipped.
+    """
+    if type(normalizer) is not StringNormalizer:
+        return [normalizer(token) for token in _SEGMENTERS[segmentation](text)]
+    if normalizer.is_identity:
+        return _SEGMENTERS[segmentation](text)
+
+    try:
+        tokens, fallback_indices = stringalign._stringutils.normalized_tokens(
+            text, segmentation, *_rust_normalizer_arguments(normalizer)
+        )
+    except UnicodeEncodeError:
+        # Strings with lone surrogates cannot be passed to Rust, but splitting at whitespace is done with str.split.
+        return [normalizer(token) for token in _SEGMENTERS[segmentation](text)]
+    for index in fallback_indices:
+        tokens[index] = normalizer(tokens[index])
+    return tokens
+
+
+def _segment_spans(text: str, segmentation: _Segmentation) -> np.ndarray:
+    """The start and end code point offsets of the segments of the text as an ``(n_segments, 2)`` array of ``int32``."""
+    try:
+        return stringalign._stringutils.segment_spans(text, segmentation)
+    except UnicodeEncodeError:
+        if segmentation != "whitespace":
+            raise
+        # Strings with lone surrogates cannot be passed to Rust, but splitting at whitespace is done with str.split.
+        spans = [match.span() for match in re.finditer(r"\S+", text)]
+        return np.array(spans, dtype=np.int32).reshape(-1, 2)
+
+
+def _non_whitespace_token_spans(text: str, segmentation: _Segmentation, normalizer: StringNormalizer) -> np.ndarray:
+    """The spans of the segments of the text that are not only whitespace after they are normalized.
+
+    Like :func:`_normalized_tokens`, the segments are normalized in Rust, but no strings are created for them. Only the
+    segments that the Rust extension cannot normalize are sliced from the text and normalized in Python, and so are all
+    segments for subclasses of :class:`stringalign.normalize.StringNormalizer` and text that cannot be encoded as UTF-8.
+    """
+    fallback_indices: Sequence[int]
+    if type(normalizer) is not StringNormalizer:
+        spans = _segment_spans(text, segmentation)
+        fallback_indices = range(len(spans))
+    else:
+        try:
+            spans, fallback_indices = stringalign._stringutils.non_whitespace_token_spans(
+                text, segmentation, *_rust_normalizer_arguments(normalizer)
+            )
+        except UnicodeEncodeError:
+            spans = _segment_spans(text, segmentation)
+            fallback_indices = range(len(spans))
+
+    fallback_spans = np.asarray(fallback_indices, dtype=np.intp)
+    is_whitespace = np.array(
+        [not normalizer(text[start:end]).strip() for start, end in spans[fallback_spans].tolist()], dtype=bool
+    )
+    return np.delete(spans, fallback_spans[is_whitespace], axis=0)
+
+
 class TokenizerReprMixin:
     def __repr__(self) -> str:
         # We include these assertions to stop mypy from complaining. This is a mixin class, and all classes that inherit
@@ -133,9 +248,10 @@ class GraphemeClusterTokenizer(TokenizerReprMixin):
 
     def __call__(self, text: str) -> list[str]:
         text = self.pre_tokenization_normalizer(text)
-        clusters = stringalign._stringutils.grapheme_clusters(text)
-        clusters = [self.post_tokenization_normalizer(cluster) for cluster in clusters]
-        return clusters
+        return _normalized_tokens(text, "grapheme_clusters", self.post_tokenization_normalizer)
+
+    def spans(self, text: str) -> np.ndarray:
+        return _segment_spans(self.pre_tokenization_normalizer(text), "grapheme_clusters")
 
     def join(self, tokens: Iterable[str]) -> str:
         return "".join(tokens)
@@ -175,9 +291,10 @@ class UnicodeWordTokenizer(TokenizerReprMixin):
 
     def __call__(self, text: str) -> list[str]:
         text = self.pre_tokenization_normalizer(text)
-        clusters = stringalign._stringutils.unicode_words(text)
-        clusters = [self.post_tokenization_normalizer(cluster) for cluster in clusters]
-        return clusters
+        return _normalized_tokens(text, "unicode_words", self.post_tokenization_normalizer)
+
+    def spans(self, text: str) -> np.ndarray:
+        return _segment_spans(self.pre_tokenization_normalizer(text), "unicode_words")
 
     def join(self, tokens: Iterable[str]) -> str:
         return " ".join(tokens)
@@ -225,13 +342,18 @@ class SplitAtWordBoundaryTokenizer(TokenizerReprMixin):
 
     def __call__(self, text: str) -> list[str]:
         text = self.pre_tokenization_normalizer(text)
-        clusters: Iterable[str] = stringalign._stringutils.split_at_word_boundaries(text)
-        clusters = (self.post_tokenization_normalizer(cluster) for cluster in clusters)
+        clusters = _normalized_tokens(text, "word_boundaries", self.post_tokenization_normalizer)
 
         if self.remove_whitespace:
-            clusters = (cluster for cluster in clusters if cluster.strip())
+            clusters = [cluster for cluster in clusters if cluster.strip()]
 
-        return list(clusters)
+        return clusters
+
+    def spans(self, text: str) -> np.ndarray:
+        text = self.pre_tokenization_normalizer(text)
+        if self.remove_whitespace:
+            return _non_whitespace_token_spans(text, "word_boundaries", self.post_tokenization_normalizer)
+        return _segment_spans(text, "word_boundaries")
 
     def join(self, tokens: Iterable[str]) -> str:
         return "".join(tokens)
@@ -270,9 +392,10 @@ class SplitAtWhitespaceTokenizer(TokenizerReprMixin):
 
     def __call__(self, text: str) -> list[str]:
         text = self.pre_tokenization_normalizer(text)
-        clusters = text.split()
-        clusters = [self.post_tokenization_normalizer(cluster) for cluster in clusters]
-        return clusters
+        return _normalized_tokens(text, "whitespace", self.post_tokenization_normalizer)
+
+    def spans(self, text: str) -> np.ndarray:
+        return _segment_spans(self.pre_tokenization_normalizer(text), "whitespace")
 
     def join(self, tokens: Iterable[str]) -> str:
         return " ".join(tokens)
@@ -0,0 +1,173 @@
+//! Anchored alignment of very long token id sequences, such as whole books.
+//!
+//! The cost matrix of two book-length sequences has trillions of cells, and splitting the sequences at line breaks
+//! fails when lines are merged or split. Instead, we look for anchors: n-grams of tokens that occur exactly once in
+//! both sequences. The anchors that are consistent with one alignment are the longest chain of anchors whose positions
+//! increase in both sequences, which we find as a longest increasing subsequence. The anchors are kept, and the gaps
+//! between them are aligned independently and in parallel with the regular kernels (see [`batch::align_many`]).
+//!
+//! The result is an optimal alignment if there is an optimal alignment that keeps all anchors. This is not guaranteed,
+//! but a long n-gram that occurs once in each of two similar sequences is almost always a part of the same text.
+
+use crate::batch::{self, Pairs};
+use std::cmp::max;
+
+/// Multiplier of the polynomial rolling hash of the n-grams.
+const HASH_BASE: u64 = 0x9E37_79B9_7F4A_7C15;
+
+/// The hash and start of every n-gram of `tokens` that occurs once, sorted by hash.
+///
+/// Different n-grams can have equal hashes, but equal n-grams always have equal hashes, so a hash that occurs once
+/// belongs to an n-gram that occurs once.
+fn unique_ngrams(tokens: &[u32], n: usize) -> Vec<(u64, usize)> {
+    if tokens.len() < n {
+        return Vec::new();
+    }
+    // The hash of the n-gram starting at `i` is the sum of `tokens[i + t] * HASH_BASE^(n - 1 - t)`.
+    let leading_power = (1..n).fold(1u64, |power, _| power.wrapping_mul(HASH_BASE));
+    let mut hash = tokens[..n].iter().fold(0u64, |hash, &token| {
+        hash.wrapping_mul(HASH_BASE).wrapping_add(u64::from(token))
+    });
+    let mut ngrams = Vec::with_capacity(tokens.len() - n + 1);
+    ngrams.push((hash, 0));
+    for start in 1..=tokens.len() - n {
+        hash = hash.wrapping_sub(u64::from(tokens[start - 1]).wrapping_mul(leading_power));
+        hash = hash
+            .wrapping_mul(HASH_BASE)
+            .wrapping_add(u64::from(tokens[start + n - 1]));
+        ngrams.push((hash, start));
+    }
+    ngrams.sort_unstable();
+
+    let mut unique = Vec::new();
+    for group in ngrams.chunk_by(|a, b| a.0 == b.0) {
+        if let [ngram] = group {
+            unique.push(*ngram);
+        }
+    }
+    unique
+}
+
+/// The start of each anchor in the reference and predicted tokens, sorted by position.
+fn find_anchors(reference: &[u32], predicted: &[u32], n: usize) -> Vec<(usize, usize)> {
+    let (reference_ngrams, predicted_ngrams) =
+        (unique_ngrams(reference, n), unique_ngrams(predicted, n));
+
+    let mut candidates = Vec::new();
+    let (mut i, mut j) = (0, 0);
+    while i < reference_ngrams.len() && j < predicted_ngrams.len() {
+        let ((reference_hash, row), (predicted_hash, col)) =
+            (reference_ngrams[i], predicted_ngrams[j]);
+        if reference_hash < predicted_hash {
+            i += 1;
+        } else if predicted_hash < reference_hash {
+            j += 1;
+        } else {
+            if reference[row..row + n] == predicted[col..col + n] {
+                candidates.push((row, col));
+            }
+            i += 1;
+            j += 1;
+        }
+    }
+    candidates.sort_unstable();
+    longest_increasing_chain(&candidates)
+}
+
+/// The longest subsequence of `candidates`, which are sorted by reference position, with increasing predicted
+/// positions.
+///
+/// This is the patience sorting algorithm, which runs in `O(k log k)` time for `k` candidates.
+fn longest_increasing_chain(candidates: &[(usize, usize)]) -> Vec<(usize, usize)> {
+    // `tails[l]` is the candidate that ends the chain of length `l + 1` with the smallest predicted position.
+    let mut tails: Vec<usize> = Vec::new();
+    let mut previous = vec![usize::MAX; candidates.len()];
+    for (index, &(_, col)) in candidates.iter().enumerate() {
+        let length = tails.partition_point(|&tail| candidates[tail].1 < col);
+        if length > 0 {
+            previous[index] = tails[length - 1];
+        }
+        if length == tails.len() {
+            tails.push(index);
+        } else {
+            tails[length] = index;
+        }
+    }
+
+    let mut chain = Vec::with_capacity(tails.len());
+    let mut index = tails.last().copied().unwrap_or(usize::MAX);
+    while index != usize::MAX {
+        chain.push(candidates[index]);
+        index = previous[index];
+    }
+    chain.reverse();
+    chain
+}
+
+/// Merge overlapping anchors on the same diagonal into blocks of kept tokens, and drop anchors that overlap the
+/// previous block on another diagonal. Returns the start in the reference and predicted tokens and the length of each
+/// block.
+fn anchor_blocks(anchors: &[(usize, usize)], n: usize) -> Vec<(usize, usize, usize)> {
+    let mut blocks: Vec<(usize, usize, usize)> = Vec::new();
+    for &(row, col) in anchors {
+        if let Some((block_row, block_col, length)) = blocks.last_mut() {
+            let (end_row, end_col) = (*block_row + *length, *block_col + *length);
+            if row - *block_row == col - *block_col && row <= end_row {
+                *length = max(*length, row + n - *block_row);
+                continue;
+            }
+            if row < end_row || col < end_col {
+                continue;
+            }
+        }
+        blocks.push((row, col, n));
+    }
+    blocks
+}
+
+/// Align two token id sequences by keeping the anchors of length `anchor_length` and aligning the gaps between them in
+/// parallel with `n_threads` threads.
+///
+/// Gaps with more than `hirschberg_min_cells` cost matrix cells are aligned in linear memory. Returns the op codes in
+/// alignment order and whether the alignment of every gap is unique.
+pub fn align(
+    reference: &[u32],
+    predicted: &[u32],
+    anchor_length: usize,
+    hirschberg_min_cells: usize,
+    n_threads: usize,
+) -> (Vec<u8>, bool) {
+    let anchor_length = max(anchor_length, 1);
+    let blocks = anchor_blocks(
+        &find_anchors(reference, predicted, anchor_length),
+        anchor_length,
+    );
+
+    // The gaps and blocks alternate, and the blocks are aligned without any dynamic programming since they are equal.
+    let mut reference_offsets = vec![0];
+    let mut predicted_offsets = vec![0];
+    for &(row, col, length) in &blocks {
+        reference_offsets.extend([row, row + length]);
+        predicted_offsets.extend([col, col + length]);
+    }
+    reference_offsets.push(reference.len());
+    predicted_offsets.push(predicted.len());
+
+    let pairs = Pairs {
+        reference_ids: reference,
+        reference_offsets: &reference_offsets,
+        predicted_ids: predicted,
+        predicted_offsets: &predicted_offsets,
+    };
+    let use_hirschberg: Vec<bool> = reference_offsets
+        .windows(2)
+        .zip(predicted_offsets.windows(2))
+        .map(|(rows, cols)| {
+            (rows[1] - rows[0] + 1).saturating_mul(cols[1] - cols[0] + 1) > hirschberg_min_cells
+        })
+        .collect();
+
+    let alignments = batch::align_many(&pairs, &use_hirschberg, None, false, n_threads);
+    let unique = alignments.unique.iter().all(|&unique| unique);
+    (alignments.ops, unique)
+}
@@ -0,0 +1,185 @@
+//! Banded dynamic programming for the Levenshtein alignment of similar token sequences.
+//!
+//! An alignment path that passes through diagonal `d = j - i` of the cost matrix has a cost of at least
+//! `|d| + |n - m - d|`, since it must first get to the diagonal and then back to the diagonal of the last cell. So if
+//! we know that the distance is at most `k`, we only need to fill the diagonals where this bound is at most `k`
+//! (Ukkonen's algorithm). The band has width `O(k)`, which gives `O(k * m)` time and memory instead of `O(mn)`.
+//!
+//! Cells outside the band are treated as infinitely expensive, so the banded cost of a cell is never smaller than its
+//! true cost. If the banded distance is at most `k`, every optimal path lies inside the band and the banded costs are
+//! exact along these paths. Hence, the backtracking finds the same optimal predecessors as with the full cost matrix.
+
+use crate::dp;
+use std::cmp::{max, min};
+
+/// The cost of cells outside the band. It is small enough that adding one does not overflow.
+const OUTSIDE: u64 = u64::MAX / 2;
+
+/// The diagonals `j - i` covered by a band for sequences of length `m` and `n` and a maximum distance `k >= |n - m|`.
+#[derive(Clone, Copy)]
+struct Band {
+    lowest_diagonal: isize,
+    width: usize,
+}
+
+impl Band {
+    fn new(m: usize, n: usize, max_distance: usize) -> Self {
+        let max_distance = min(max_distance, m + n);
+        let (m, n) = (m as isize, n as isize);
+        let delta = n - m;
+        let slack = (max_distance as isize - delta.abs()).max(0) / 2;
+        let lowest_diagonal = max(min(0, delta) - slack, -m);
+        let highest_diagonal = min(max(0, delta) + slack, n);
+        Self {
+            lowest_diagonal,
+            width: (highest_diagonal - lowest_diagonal + 1) as usize,
+        }
+    }
+
+    /// Whether the band covers the full cost matrix.
+    fn is_full(&self, m: usize, n: usize) -> bool {
+        self.lowest_diagonal == -(m as isize) && self.width == m + n + 1
+    }
+
+    /// The position of cell `(row, col)` within its row of the band, if the cell is inside the band.
+    #[inline]
+    fn offset(&self, row: usize, col: usize) -> Option<usize> {
+        let offset = col as isize - row as isize - self.lowest_diagonal;
+        (0..self.width as isize)
+            .contains(&offset)
+            .then_some(offset as usize)
+    }
+}
+
+/// Fill the band row by row and call `on_row` with each row.
+///
+/// Entry `t` of row `i` is the cost of cell `(i, i + lowest_diagonal + t)`. If `on_row` returns `false`, the fill is
+/// stopped early.
+fn fill_band<F: FnMut(usize, &[u64]) -> bool>(
+    reference: &[u32],
+    predicted: &[u32],
+    band: Band,
+    mut on_row: F,
+) {
+    let n = predicted.len() as isize;
+    // The rows have an extra cell outside the band, so the upper neighbour of the last cell in a row always exists.
+    let mut previous_row = vec![OUTSIDE; band.width + 1];
+    let mut row = vec![OUTSIDE; band.width + 1];
+
+    for i in 0..=reference.len() {
+        // The cells of the row that are inside the cost matrix are `row[start..end]`.
+        let first_col = i as isize + band.lowest_diagonal;
+        let start = (-first_col).max(0) as usize;
+        let end = (n - first_col + 1).clamp(start as isize, band.width as isize) as usize;
+        row[..start].fill(OUTSIDE);
+        row[end..].fill(OUTSIDE);
+
+        let mut t = start;
+        if i == 0 {
+            for (j, cost) in row[start..end].iter_mut().enumerate() {
+                *cost = j as u64;
+            }
+            t = end;
+        } else if first_col + start as isize == 0 {
+            row[start] = i as u64;
+            t += 1;
+        }
+
+        if t < end {
+            // The diagonal neighbour has the same offset in the previous row, the upper neighbour is one to the right
+            // in the previous row and the left neighbour is one to the left in the current row.
+            let mut left = if t > 0 { row[t - 1] } else { OUTSIDE };
+            let reference_token = reference[i - 1];
+            let first_predicted = (first_col + t as isize - 1) as usize;
+            let predicted_tokens = &predicted[first_predicted..first_predicted + end - t];
+            let (diagonals, ups) = (&previous_row[t..end], &previous_row[t + 1..end + 1]);
+
+            for (((cost, &predicted_token), &diagonal), &up) in row[t..end]
+                .iter_mut()
+                .zip(predicted_tokens)
+                .zip(diagonals)
+                .zip(ups)
+            {
+                left = if reference_token == predicted_token {
+                    diagonal
+                } else {
+                    1 + min(min(diagonal, up), left)
+                };
+                *cost = left;
+            }
+        }
+
+        if !on_row(i, &row[..band.width]) {
+            return;
+        }
+        std::mem::swap(&mut previous_row, &mut row);
+    }
+}
+
+/// Whether the banded distance is expected to be faster than the bit-parallel distance for the given sequence lengths.
+///
+/// The bit-parallel kernel processes 64 cells per word update, while the banded kernel processes one cell at a time,
+/// but it only needs the cells inside the band. In benchmarks, the banded kernel is faster when the band is narrower
+/// than roughly twice the number of words.
+pub fn is_faster_than_bitparallel(m: usize, n: usize, max_distance: usize) -> bool {
+    Band::new(m, n, max_distance).width < 2 * min(m, n).div_ceil(64)
+}
+
+/// Compute the Levenshtein distance if it is at most `max_distance`, otherwise return `None`.
+///
+/// Only two rows of the band are kept in memory, and the computation stops as soon as every cell of a row is more
+/// expensive than `max_distance`, since the costs never decrease along a path.
+pub fn levenshtein_distance(
+    reference: &[u32],
+    predicted: &[u32],
+    max_distance: usize,
+) -> Option<usize> {
+    let (m, n) = (reference.len(), predicted.len());
+    if m.abs_diff(n) > max_distance {
+        return None;
+    }
+
+    let band = Band::new(m, n, max_distance);
+    let mut distance = None;
+    fill_band(reference, predicted, band, |i, row| {
+        if i == m {
+            distance = band.offset(m, n).map(|t| row[t] as usize);
+        }
+        row.iter().any(|&cost| cost <= max_distance as u64)
+    });
+
+    distance.filter(|&distance| distance <= max_distance)
+}
+
+/// Align two token id sequences with a banded cost matrix.
+///
+/// The band initially covers all paths with cost at most `max_distance`. If the distance is larger than that, the band
+/// is doubled until it contains an optimal path, so the result is always the same as with the full cost matrix
+/// (see [`dp::align`]). Returns the op codes in alignment order and whether the alignment is unique.
+pub fn align(reference: &[u32], predicted: &[u32], max_distance: usize) -> (Vec<u8>, bool) {
+    let (m, n) = (reference.len(), predicted.len());
+    let mut max_distance = max(max_distance, m.abs_diff(n));
+
+    loop {
+        let band = Band::new(m, n, max_distance);
+        let mut cost = Vec::with_capacity((m + 1) * band.width);
+        fill_band(reference, predicted, band, |_, row| {
+            cost.extend_from_slice(row);
+            true
+        });
+
+        let distance = band
+            .offset(m, n)
+            .map_or(OUTSIDE, |t| cost[m * band.width + t]);
+        if distance <= max_distance as u64 || band.is_full(m, n) {
+            let banded_cost = |row: usize, col: usize| {
+                band.offset(row, col)
+                    .map_or(OUTSIDE, |t| cost[row * band.width + t])
+            };
+            return dp::traceback(m, n, |row, col| {
+                dp::optimal_ops(reference, predicted, row, col, banded_cost)
+            });
+        }
+        max_distance = max(max_distance.saturating_mul(2), 1);
+    }
+}
@@ -0,0 +1,172 @@
+//! Align many pairs of token id sequences, or compute their distances, in parallel.
+//!
+//! The token ids of all pairs are stored back to back in one array per side, and the pairs are delimited by offsets,
+//! so a whole corpus crosses the language boundary as a handful of arrays. The pairs are aligned by a pool of scoped
+//! threads that take the next unaligned pair from a shared counter. This balances the load dynamically, which matters
+//! since the cost of a pair grows with the product of its lengths.
+
+use crate::{banded, diagonal, distance, dp, hirschberg, trim};
+use std::sync::atomic::{AtomicUsize, Ordering};
+use std::thread;
+
+/// Token id sequences for many string pairs, delimited by offsets.
+pub struct Pairs<'a> {
+    pub reference_ids: &'a [u32],
+    pub reference_offsets: &'a [usize],
+    pub predicted_ids: &'a [u32],
+    pub predicted_offsets: &'a [usize],
+}
+
+impl Pairs<'_> {
+    /// Check that the offsets delimit the token ids of the same number of pairs.
+    pub fn validate(&self) -> Result<(), String> {
+        for (offsets, ids, name) in [
+            (self.reference_offsets, self.reference_ids, "reference"),
+            (self.predicted_offsets, self.predicted_ids, "predicted"),
+        ] {
+            if offsets.first() != Some(&0) || offsets.last() != Some(&ids.len()) {
+                return Err(format!(
+                    "The {name} offsets must start at 0 and end at the number of {name} tokens"
+                ));
+            }
+            if offsets.windows(2).any(|window| window[0] > window[1]) {
+                return Err(format!("The {name} offsets must be non-decreasing"));
+            }
+        }
+        if self.reference_offsets.len() != self.predicted_offsets.len() {
+            return Err(
+                "The reference and predicted offsets must have the same length".to_string(),
+            );
+        }
+        Ok(())
+    }
+
+    pub fn n_pairs(&self) -> usize {
+        self.reference_offsets.len().saturating_sub(1)
+    }
+
+    fn get(&self, pair: usize) -> (&[u32], &[u32]) {
+        let range = |offsets: &[usize]| offsets[pair]..offsets[pair + 1];
+        (
+            &self.reference_ids[range(self.reference_offsets)],
+            &self.predicted_ids[range(self.predicted_offsets)],
+        )
+    }
+}
+
+/// The alignments of many pairs, with the op codes of all pairs stored back to back.
+pub struct Alignments {
+    pub ops: Vec<u8>,
+    pub offsets: Vec<usize>,
+    pub unique: Vec<bool>,
+}
+
+impl Alignments {
+    /// The reference and predicted token index of each op code (see [`dp::token_indices`]), counted from the start of
+    /// each pair.
+    pub fn token_indices(&self) -> (Vec<usize>, Vec<usize>) {
+        let mut reference_indices = Vec::with_capacity(self.ops.len());
+        let mut predicted_indices = Vec::with_capacity(self.ops.len());
+        for window in self.offsets.windows(2) {
+            let (reference, predicted) = dp::token_indices(&self.ops[window[0]..window[1]]);
+            reference_indices.extend(reference);
+            predicted_indices.extend(predicted);
+        }
+        (reference_indices, predicted_indices)
+    }
+}
+
+/// Apply `f` to every pair index with `n_threads` threads, which take the next pair from a shared counter.
+fn map_pairs<T, F>(n_pairs: usize, n_threads: usize, f: F) -> Vec<T>
+where
+    T: Send,
+    F: Fn(usize) -> T + Sync,
+{
+    let next_pair = AtomicUsize::new(0);
+    let mut results: Vec<Option<T>> = (0..n_pairs).map(|_| None).collect();
+    thread::scope(|scope| {
+        let workers: Vec<_> = (0..n_threads.clamp(1, n_pairs.max(1)))
+            .map(|_| {
+                scope.spawn(|| {
+                    let mut done = Vec::new();
+                    loop {
+                        let pair = next_pair.fetch_add(1, Ordering::Relaxed);
+                        if pair >= n_pairs {
+                            return done;
+                        }
+                        done.push((pair, f(pair)));
+                    }
+                })
+            })
+            .collect();
+
+        for worker in workers {
+            for (pair, result) in worker.join().expect("worker thread panicked") {
+                results[pair] = Some(result);
+            }
+        }
+    });
+    results.into_iter().flatten().collect()
+}
+
+/// Align all pairs with `n_threads` threads.
+///
+/// The common prefix and suffix of each pair is trimmed (see [`trim::align`]). If `myers` is set, the pairs are first
+/// aligned with the greedy diagonal algorithm (see [`diagonal::align`]). Pairs where `use_hirschberg` is set are
+/// otherwise aligned in linear memory, and the other pairs are aligned with the banded kernel if `max_distance` is
+/// given and with the full cost matrix otherwise.
+pub fn align_many(
+    pairs: &Pairs,
+    use_hirschberg: &[bool],
+    max_distance: Option<usize>,
+    myers: bool,
+    n_threads: usize,
+) -> Alignments {
+    let align_pair = |pair: usize| {
+        let (reference, predicted) = pairs.get(pair);
+        trim::align(reference, predicted, |reference, predicted| {
+            if myers {
+                if let Some(alignment) = diagonal::align(reference, predicted) {
+                    return alignment;
+                }
+            }
+            if use_hirschberg[pair] {
+                return hirschberg::align(reference, predicted);
+            }
+            match max_distance {
+                Some(max_distance) => banded::align(reference, predicted, max_distance),
+                None => dp::align(reference, predicted),
+            }
+        })
+    };
+
+    let n_pairs = pairs.n_pairs();
+    let results = map_pairs(n_pairs, n_threads, align_pair);
+
+    let mut alignments = Alignments {
+        ops: Vec::new(),
+        offsets: Vec::with_capacity(n_pairs + 1),
+        unique: Vec::with_capacity(n_pairs),
+    };
+    alignments.offsets.push(0);
+    for (ops, unique) in results {
+        alignments.ops.extend_from_slice(&ops);
+        alignments.offsets.push(alignments.ops.len());
+        alignments.unique.push(unique);
+    }
+    alignments
+}
+
+/// Compute the Levenshtein distance of all pairs with `n_threads` threads, or `None` for the pairs where it is larger
+/// than `max_distance` (see [`distance::levenshtein_distance`]).
+pub fn levenshtein_distances(
+    pairs: &Pairs,
+    max_distance: Option<usize>,
+    myers: bool,
+    n_threads: usize,
+) -> Vec<Option<usize>> {
+    map_pairs(pairs.n_pairs(), n_threads, |pair| {
+        let (reference, predicted) = pairs.get(pair);
+        distance::levenshtein_distance(reference, predicted, max_distance, myers)
+    })
+}
@@ -0,0 +1,161 @@
+//! Bit-parallel Levenshtein distance for interned token sequences.
+//!
+//! This is the block-based variant by Hyyrö of Myers' bit-vector algorithm. The columns of the dynamic programming
+//! matrix are encoded as vertical and horizontal deltas packed into 64-bit words, so each word of the shorter sequence
+//! is processed in a constant number of bit operations per token of the longer sequence. This gives
+//! `O(ceil(m / 64) * n)` time, and the only memory used is the match vectors of the shorter sequence.
+
+use std::collections::HashMap;
+
+const WORD_SIZE: usize = 64;
+
+/// Lookup from token ids to rows of the pattern match vector table.
+///
+/// Interned ids are dense, so we normally index a plain vector with the token id. If the ids are large and sparse
+/// (e.g. token ids from an external vocabulary), we fall back to a hash map.
+enum TokenRows {
+    Dense(Vec<u32>),
+    Sparse(HashMap<u32, u32>),
+}
+
+impl TokenRows {
+    const ABSENT: u32 = u32::MAX;
+
+    fn get(&self, token: u32) -> Option<usize> {
+        match self {
+            Self::Dense(rows) => match rows.get(token as usize) {
+                Some(&row) if row != Self::ABSENT => Some(row as usize),
+                _ => None,
+            },
+            Self::Sparse(rows) => rows.get(&token).map(|&row| row as usize),
+        }
+    }
+}
+
+/// The match vectors of a pattern: bit `i` of the vector for token `t` is set if `pattern[i] == t`.
+struct PatternMatchVectors {
+    n_words: usize,
+    rows: TokenRows,
+    vectors: Vec<u64>,
+}
+
+impl PatternMatchVectors {
+    fn new(pattern: &[u32]) -> Self {
+        let n_words = pattern.len().div_ceil(WORD_SIZE);
+        let max_token = pattern.iter().copied().max().unwrap_or(0) as usize;
+
+        let mut rows = if max_token < (1 << 16) || max_token <= 8 * pattern.len() {
+            TokenRows::Dense(vec![TokenRows::ABSENT; max_token + 1])
+        } else {
+            TokenRows::Sparse(HashMap::with_capacity(pattern.len()))
+        };
+        let mut vectors = Vec::new();
+
+        for (i, &token) in pattern.iter().enumerate() {
+            let row = match rows.get(token) {
+                Some(row) => row,
+                None => {
+                    let row = vectors.len() / n_words;
+                    match &mut rows {
+                        TokenRows::Dense(dense) => dense[token as usize] = row as u32,
+                        TokenRows::Sparse(sparse) => {
+                            sparse.insert(token, row as u32);
+                        }
+                    }
+                    vectors.resize(vectors.len() + n_words, 0);
+                    row
+                }
+            };
+            vectors[row * n_words + i / WORD_SIZE] |= 1 << (i % WORD_SIZE);
+        }
+
+        Self {
+            n_words,
+            rows,
+            vectors,
+        }
+    }
+
+    /// The match vector words for `token`, or `None` if the token does not occur in the pattern.
+    fn get(&self, token: u32) -> Option<&[u64]> {
+        self.rows
+            .get(token)
+            .map(|row| &self.vectors[row * self.n_words..(row + 1) * self.n_words])
+    }
+}
+
+/// Compute the Levenshtein distance between two token id sequences.
+pub fn levenshtein_distance(reference: &[u32], predicted: &[u32]) -> usize {
+    levenshtein_distance_bounded(reference, predicted, usize::MAX)
+        .expect("every distance is at most usize::MAX")
+}
+
+/// Compute the Levenshtein distance if it is at most `max_distance`, otherwise return `None`.
+///
+/// Each column of the text changes the cost in the last row by at most one, so the distance is at least the cost in
+/// the last row of the current column minus the number of remaining columns. We stop as soon as this lower bound is
+/// larger than `max_distance`.
+pub fn levenshtein_distance_bounded(
+    reference: &[u32],
+    predicted: &[u32],
+    max_distance: usize,
+) -> Option<usize> {
+    // The distance is symmetric, so we use the shortest sequence as the pattern to minimise the number of words.
+    let (pattern, text) = if reference.len() <= predicted.len() {
+        (reference, predicted)
+    } else {
+        (predicted, reference)
+    };
+    if pattern.is_empty() {
+        return Some(text.len()).filter(|&distance| distance <= max_distance);
+    }
+
+    let match_vectors = PatternMatchVectors::new(pattern);
+    let n_words = match_vectors.n_words;
+    let last = 1u64 << ((pattern.len() - 1) % WORD_SIZE);
+    let no_matches = vec![0; n_words];
+
+    // Vertical positive and negative deltas for each word of the current column
+    let mut vp = vec![!0u64; n_words];
+    let mut vn = vec![0u64; n_words];
+    let mut distance = pattern.len();
+
+    for (&token, remaining) in text.iter().zip((0..text.len()).rev()) {
+        let peq = match_vectors.get(token).unwrap_or(&no_matches);
+
+        // The first row of the cost matrix is 0, 1, 2, ..., so the horizontal delta into the first word is always +1.
+        let mut hp_carry = 1u64;
+        let mut hn_carry = 0u64;
+        for word in 0..n_words {
+            let x = peq[word] | hn_carry;
+            let d0 = (((x & vp[word]).wrapping_add(vp[word])) ^ vp[word]) | x | vn[word];
+
+            let mut hp = vn[word] | !(d0 | vp[word]);
+            let mut hn = d0 & vp[word];
+
+            let (hp_carry_in, hn_carry_in) = (hp_carry, hn_carry);
+            if word + 1 < n_words {
+                hp_carry = hp >> (WORD_SIZE - 1);
+                hn_carry = hn >> (WORD_SIZE - 1);
+            } else {
+                hp_carry = u64::from(hp & last != 0);
+                hn_carry = u64::from(hn & last != 0);
+            }
+
+            hp = (hp << 1) | hp_carry_in;
+            hn = (hn << 1) | hn_carry_in;
+
+            vp[word] = hn | !(d0 | hp);
+            vn[word] = hp & d0;
+        }
+
+        // The carries out of the last word are the horizontal delta in the last row of the cost matrix.
+        distance += hp_carry as usize;
+        distance -= hn_carry as usize;
+        if distance.saturating_sub(remaining) > max_distance {
+            return None;
+        }
+    }
+
+    Some(distance)
+}
@@ -0,0 +1,175 @@
+//! Resolution of confusable characters in one pass with a trie of the confusable strings.
+//!
+//! At every position of the text, we follow the characters of the text down the trie and replace the longest
+//! confusable string that starts at that position. Then we continue after the replaced string, or after the first
+//! character if no confusable string starts there. So the replacements never overlap and are never replaced again, and
+//! the time is linear in the length of the text times the length of the longest confusable string, which is one code
+//! point for the Unicode confusables.
+//!
+//! The Unicode confusables are not compiled into a trie. Their keys are single code points, so they are looked up in
+//! the precompiled tables that `unicode_downloader/setup_unicode_data.py` writes next to the JSON files. The tables are
+//! embedded in the extension, so they are ready without any parsing and are shared by all processes that load it.
+
+use std::borrow::Cow;
+use std::collections::HashMap;
+
+/// The root node of the trie.
+const ROOT: usize = 0;
+
+/// The precompiled table of the Unicode confusables.
+pub static CONFUSABLES: Table = Table::new(include_bytes!(
+    "../python/stringalign/unicode_data/confusables.bin"
+));
+/// The precompiled table of the Unicode intentional confusables.
+pub static INTENTIONAL: Table = Table::new(include_bytes!(
+    "../python/stringalign/unicode_data/intentional.bin"
+));
+
+/// A precompiled table of confusables with single code point keys.
+///
+/// The table is an array of little-endian 32-bit words with the number of confusables, the sorted code points of the
+/// confusables and the byte offsets of their replacements, followed by the UTF-8 encoded replacements. The replacement
+/// of the i-th confusable is the bytes from offset i to offset i + 1.
+#[derive(Debug)]
+pub struct Table {
+    bytes: &'static [u8],
+    len: usize,
+}
+
+impl Table {
+    const fn new(bytes: &'static [u8]) -> Self {
+        let len = u32::from_le_bytes([bytes[0], bytes[1], bytes[2], bytes[3]]) as usize;
+        Table { bytes, len }
+    }
+
+    fn word(&self, index: usize) -> u32 {
+        let start = 4 * index;
+        u32::from_le_bytes(self.bytes[start..start + 4].try_into().unwrap())
+    }
+
+    /// The replacement of the i-th confusable.
+    fn replacement(&self, index: usize) -> &'static str {
+        let replacements = 4 * (2 * self.len + 2);
+        let start = replacements + self.word(1 + self.len + index) as usize;
+        let end = replacements + self.word(2 + self.len + index) as usize;
+        std::str::from_utf8(&self.bytes[start..end])
+            .expect("The confusable table should be valid UTF-8")
+    }
+
+    /// The replacement of the character, with a binary search in the sorted code points.
+    pub fn get(&self, c: char) -> Option<&'static str> {
+        let (mut low, mut high) = (0, self.len);
+        while low < high {
+            let middle = low + (high - low) / 2;
+            match self.word(1 + middle).cmp(&u32::from(c)) {
+                std::cmp::Ordering::Less => low = middle + 1,
+                std::cmp::Ordering::Greater => high = middle,
+                std::cmp::Ordering::Equal => return Some(self.replacement(middle)),
+            }
+        }
+        None
+    }
+
+    /// The confusables and their replacements, sorted by the confusables.
+    pub fn iter(&self) -> impl Iterator<Item = (char, &'static str)> + '_ {
+        (0..self.len).map(|index| {
+            let confusable = char::from_u32(self.word(1 + index))
+                .expect("The confusable table should only have valid code points");
+            (confusable, self.replacement(index))
+        })
+    }
+}
+
+/// Resolves confusables with a trie of the confusable strings or with a precompiled table.
+#[derive(Debug)]
+pub enum Matcher {
+    Trie(Trie),
+    Table(&'static Table),
+}
+
+/// A trie of confusable strings, which maps each confusable string to its replacement.
+#[derive(Debug, Default)]
+pub struct Trie {
+    /// The child of a node for the next character.
+    children: HashMap<(usize, char), usize>,
+    /// The replacement of the confusable string that ends at each node, if any.
+    replacements: Vec<Option<String>>,
+}
+
+impl Trie {
+    /// Create the trie of the confusable strings and their replacements. Empty confusable strings are ignored.
+    pub fn new<'a>(confusables: impl IntoIterator<Item = (&'a str, &'a str)>) -> Self {
+        let mut matcher = Trie {
+            children: HashMap::new(),
+            replacements: vec![None],
+        };
+        for (confusable, replacement) in confusables {
+            if confusable.is_empty() {
+                continue;
+            }
+            let mut node = ROOT;
+            for c in confusable.chars() {
+                let next = matcher.replacements.len();
+                node = *matcher.children.entry((node, c)).or_insert(next);
+                if node == next {
+                    matcher.replacements.push(None);
+                }
+            }
+            matcher.replacements[node] = Some(replacement.to_owned());
+        }
+        matcher
+    }
+
+    /// The length in bytes and the replacement of the longest confusable string at the start of the text.
+    fn longest_match(&self, text: &str) -> Option<(usize, &str)> {
+        let mut longest = None;
+        let mut node = ROOT;
+        for (start, c) in text.char_indices() {
+            let Some(&child) = self.children.get(&(node, c)) else {
+                break;
+            };
+            node = child;
+            if let Some(replacement) = &self.replacements[node] {
+                longest = Some((start + c.len_utf8(), replacement.as_str()));
+            }
+        }
+        longest
+    }
+}
+
+impl Matcher {
+    /// The length in bytes and the replacement of the longest confusable string at the start of the text.
+    fn longest_match(&self, text: &str) -> Option<(usize, &str)> {
+        match self {
+            Matcher::Trie(trie) => trie.longest_match(text),
+            Matcher::Table(table) => {
+                let c = text.chars().next()?;
+                table.get(c).map(|replacement| (c.len_utf8(), replacement))
+            }
+        }
+    }
+
+    /// Replace the leftmost-longest confusable strings of the text.
+    pub fn resolve<'a>(&self, text: &'a str) -> Cow<'a, str> {
+        let mut resolved = String::new();
+        // The part of the text before `copied` is resolved, and the part from `copied` to `position` has no matches.
+        let mut copied = 0;
+        let mut position = 0;
+        while let Some(c) = text[position..].chars().next() {
+            if let Some((length, replacement)) = self.longest_match(&text[position..]) {
+                resolved.push_str(&text[copied..position]);
+                resolved.push_str(replacement);
+                position += length;
+                copied = position;
+            } else {
+                position += c.len_utf8();
+            }
+        }
+
+        if copied == 0 {
+            return Cow::Borrowed(text);
+        }
+        resolved.push_str(&text[copied..]);
+        Cow::Owned(resolved)
+    }
+}
@@ -0,0 +1,90 @@
+//! Greedy diagonal algorithm for the Levenshtein distance of near-identical token sequences.
+//!
+//! For each cost `e = 0, 1, ...`, we store the furthest row that can be reached with cost at most `e` on each diagonal
+//! `k = j - i` of the cost matrix. From the furthest rows for cost `e - 1`, a replacement, deletion or insertion takes
+//! us to diagonal `k`, and we then slide along the diagonal for as long as the tokens are equal, since kept tokens are
+//! free. The distance is the first cost for which the furthest row on the diagonal of the last cell is the last row.
+//! This is Myers' greedy O(ND) algorithm, with replacements as in the algorithms by Ukkonen and by Landau and Vishkin.
+//! It takes `O((m + n) d)` time and `O(d)` memory, where `d` is the distance, and usually much less, since the
+//! slides of neighbouring diagonals rarely overlap.
+//!
+//! To align the sequences, we restrict the cost matrix to the band of diagonals that can contain a path with cost `d`
+//! (see [`crate::banded`]), which gives the same alignment as the full cost matrix.
+
+use crate::banded;
+use std::cmp::{max, min};
+
+/// The smallest distance for which the greedy algorithm is used before falling back to the full cost matrix.
+const MIN_CUTOFF: usize = 16;
+
+/// Marks diagonals that have not been reached. It is small enough that adding one does not overflow.
+const UNREACHED: isize = isize::MIN / 2;
+
+/// The largest distance for which we use the greedy algorithm for sequences of length `m` and `n`.
+///
+/// Above this distance, the bit-parallel distance and the full cost matrix are as fast as the greedy algorithm and the
+/// band of the alignment, which stores eight bytes per cell instead of the half byte per cell of the predecessor masks.
+pub fn cutoff(m: usize, n: usize) -> usize {
+    max(MIN_CUTOFF, max(m, n) / 64)
+}
+
+/// Compute the Levenshtein distance if it is at most `max_distance`, otherwise return `None`.
+pub fn levenshtein_distance(
+    reference: &[u32],
+    predicted: &[u32],
+    max_distance: usize,
+) -> Option<usize> {
+    let (m, n) = (reference.len() as isize, predicted.len() as isize);
+    if m.abs_diff(n) > max_distance {
+        return None;
+    }
+    let slide = |row: isize, diagonal: isize| {
+        let (row, col) = (row as usize, (row + diagonal) as usize);
+        let equal = reference[row..]
+            .iter()
+            .zip(&predicted[col..])
+            .take_while(|(r, p)| r == p)
+            .count();
+        row as isize + equal as isize
+    };
+
+    // Entry `k + offset` is the furthest row on diagonal `k`, with an unreached diagonal on each side of the range.
+    let max_distance = min(max_distance, (m + n) as usize) as isize;
+    let offset = max_distance + 1;
+    let mut previous = vec![UNREACHED; 2 * max_distance as usize + 3];
+    let mut current = previous.clone();
+    previous[offset as usize] = slide(0, 0);
+    if n - m == 0 && previous[offset as usize] == m {
+        return Some(0);
+    }
+
+    for distance in 1..=max_distance {
+        for diagonal in max(-distance, -m)..=min(distance, n) {
+            let index = (diagonal + offset) as usize;
+            let replaced = previous[index] + 1;
+            let deleted = previous[index + 1] + 1;
+            let inserted = previous[index - 1];
+            let row = min(max(max(replaced, deleted), inserted), min(m, n - diagonal));
+            current[index] = if row < 0 || row + diagonal < 0 {
+                UNREACHED
+            } else {
+                slide(row, diagonal)
+            };
+        }
+        if current[(n - m + offset) as usize] == m {
+            return Some(distance as usize);
+        }
+        std::mem::swap(&mut previous, &mut current);
+    }
+    None
+}
+
+/// Align two token id sequences with the greedy algorithm and a band of the cost matrix if their distance is at most
+/// [`cutoff`], otherwise return `None`.
+///
+/// Returns the op codes in alignment order and whether the alignment is unique.
+pub fn align(reference: &[u32], predicted: &[u32]) -> Option<(Vec<u8>, bool)> {
+    let cutoff = cutoff(reference.len(), predicted.len());
+    levenshtein_distance(reference, predicted, cutoff)
+        .map(|distance| banded::align(reference, predicted, distance))
+}
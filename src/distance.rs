@@ -0,0 +1,54 @@
+//! Levenshtein distance with the fastest kernel for the sequence lengths and the maximum distance.
+//!
+//! Without a maximum distance, the bit-parallel kernel is used. With a maximum distance `k`, pairs whose lengths differ
+//! by more than `k` are rejected before any dynamic programming, since every token of the length difference must be
+//! inserted or deleted. The other pairs are computed in a band of the cost matrix if the band is narrow, and with the
+//! bit-parallel kernel otherwise. Both kernels stop as soon as the distance is known to be larger than `k`.
+//!
+//! The common prefix and suffix of the sequences are removed first, since they do not change the distance.
+
+use crate::{banded, bitparallel, diagonal, trim};
+
+/// Compute the Levenshtein distance if it is at most `max_distance`, otherwise return `None`.
+///
+/// If `myers` is set, the distance is first computed with the greedy diagonal algorithm (see
+/// [`diagonal::levenshtein_distance`]), which is much faster for near-identical sequences.
+pub fn levenshtein_distance(
+    reference: &[u32],
+    predicted: &[u32],
+    max_distance: Option<usize>,
+    myers: bool,
+) -> Option<usize> {
+    if let Some(max_distance) = max_distance {
+        if reference.len().abs_diff(predicted.len()) > max_distance {
+            return None;
+        }
+    }
+    let (reference, predicted) = trim::trimmed(reference, predicted);
+    let (m, n) = (reference.len(), predicted.len());
+
+    if myers {
+        let cutoff = diagonal::cutoff(m, n);
+        match max_distance {
+            Some(max_distance) if max_distance <= cutoff => {
+                return diagonal::levenshtein_distance(reference, predicted, max_distance);
+            }
+            _ => {
+                let distance = diagonal::levenshtein_distance(reference, predicted, cutoff);
+                if distance.is_some() {
+                    return distance;
+                }
+            }
+        }
+    }
+
+    match max_distance {
+        None => Some(bitparallel::levenshtein_distance(reference, predicted)),
+        Some(max_distance) if banded::is_faster_than_bitparallel(m, n, max_distance) => {
+            banded::levenshtein_distance(reference, predicted, max_distance)
+        }
+        Some(max_distance) => {
+            bitparallel::levenshtein_distance_bounded(reference, predicted, max_distance)
+        }
+    }
+}
@@ -0,0 +1,337 @@
+//! Dynamic programming kernels for the Levenshtein alignment of interned token sequences.
+//!
+//! All kernels work on slices of `u32` token ids, so comparing two tokens is a single integer comparison, no matter
+//! how long the tokens are. The matrices are stored row-major in flat vectors with `predicted.len() + 1` columns.
+
+use crate::wavefront;
+use std::cmp::min;
+
+/// Unsigned integer types that can store the entries of a cost matrix.
+pub trait Cost: Copy + Ord + std::ops::Add<Output = Self> {
+    const ONE: Self;
+    const MAX: usize;
+
+    /// Convert an index to a cost, which must be at most `Self::MAX`.
+    fn from_index(index: usize) -> Self;
+}
+
+macro_rules! impl_cost {
+    ($($t:ty),*) => {$(
+        impl Cost for $t {
+            const ONE: Self = 1;
+            const MAX: usize = <$t>::MAX as usize;
+
+            #[inline]
+            fn from_index(index: usize) -> Self {
+                index as $t
+            }
+        }
+    )*};
+}
+
+impl_cost!(u16, u32, u64);
+
+/// Create the Levenshtein cost matrix with shape `(reference.len() + 1, predicted.len() + 1)`.
+///
+/// No entry is larger than `max(reference.len(), predicted.len())`, so the matrix can be stored with any cost type
+/// where this maximum is at most `T::MAX`.
+pub fn cost_matrix<T: Cost>(reference: &[u32], predicted: &[u32]) -> Vec<T> {
+    debug_assert!(reference.len().max(predicted.len()) <= T::MAX);
+    let n_cols = predicted.len() + 1;
+    let mut cost = vec![T::from_index(0); (reference.len() + 1) * n_cols];
+
+    for (j, c) in cost[..n_cols].iter_mut().enumerate() {
+        *c = T::from_index(j);
+    }
+    for (i, &reference_token) in reference.iter().enumerate() {
+        let (previous_row, row) = cost[i * n_cols..(i + 2) * n_cols].split_at_mut(n_cols);
+        row[0] = T::from_index(i + 1);
+        for (j, &predicted_token) in predicted.iter().enumerate() {
+            row[j + 1] = if reference_token == predicted_token {
+                previous_row[j]
+            } else {
+                T::ONE + min(min(previous_row[j], previous_row[j + 1]), row[j])
+            };
+        }
+    }
+
+    cost
+}
+
+/// Op codes for the alignment operations. The op code is also the bit index of the operation in predecessor masks.
+pub const KEPT: u8 = 0;
+pub const REPLACED: u8 = 1;
+pub const DELETED: u8 = 2;
+pub const INSERTED: u8 = 3;
+
+/// Compute the bit mask of optimal alignment operations ending in cell `(row, col)`.
+///
+/// Bit `op` is set if the operation with op code `op` is optimal, and the `cost` closure must return the cost matrix
+/// entry for a given cell. The conditions are the same as in the Python backtracking in `stringalign.align`.
+#[inline]
+pub fn optimal_ops<F: Fn(usize, usize) -> u64>(
+    reference: &[u32],
+    predicted: &[u32],
+    row: usize,
+    col: usize,
+    cost: F,
+) -> u8 {
+    let current = cost(row, col);
+    let mut mask = 0;
+    if row > 0 && col > 0 {
+        if reference[row - 1] == predicted[col - 1] {
+            mask |= 1 << KEPT;
+        } else if current == cost(row - 1, col - 1) + 1 {
+            mask |= 1 << REPLACED;
+        }
+    }
+    if row > 0 && (col == 0 || current == cost(row - 1, col) + 1) {
+        mask |= 1 << DELETED;
+    }
+    if col > 0 && (row == 0 || current == cost(row, col - 1) + 1) {
+        mask |= 1 << INSERTED;
+    }
+    mask
+}
+
+/// Backtrack one optimal alignment from cell `(row, col)` to the origin.
+///
+/// The `optimal_ops` closure must return the predecessor mask of a cell (see [`optimal_ops`]). At each step, the
+/// operation with the lowest op code is chosen, i.e. kept, then replaced, then deleted and finally inserted. Returns the
+/// op codes in alignment order and whether the alignment is unique, i.e. whether every visited cell had only one
+/// optimal predecessor.
+pub fn traceback<F: Fn(usize, usize) -> u8>(
+    mut row: usize,
+    mut col: usize,
+    optimal_ops: F,
+) -> (Vec<u8>, bool) {
+    let mut ops = Vec::with_capacity(row + col);
+    let mut unique = true;
+
+    while row > 0 || col > 0 {
+        let mask = optimal_ops(row, col);
+        let op = mask.trailing_zeros() as u8;
+        unique &= mask.count_ones() == 1;
+        ops.push(op);
+
+        match op {
+            KEPT | REPLACED => {
+                row -= 1;
+                col -= 1;
+            }
+            DELETED => row -= 1,
+            _ => col -= 1,
+        }
+    }
+
+    ops.reverse();
+    (ops, unique)
+}
+
+/// Compute the positions in the reference and predicted sequences at the start of each alignment operation.
+///
+/// For kept, replaced and deleted tokens, the reference position is the index of the reference token, and for kept,
+/// replaced and inserted tokens, the predicted position is the index of the predicted token.
+pub fn token_indices(ops: &[u8]) -> (Vec<usize>, Vec<usize>) {
+    let mut reference_indices = Vec::with_capacity(ops.len());
+    let mut predicted_indices = Vec::with_capacity(ops.len());
+    let (mut row, mut col) = (0, 0);
+    for &op in ops {
+        reference_indices.push(row);
+        predicted_indices.push(col);
+        match op {
+            KEPT | REPLACED => {
+                row += 1;
+                col += 1;
+            }
+            DELETED => row += 1,
+            _ => col += 1,
+        }
+    }
+    (reference_indices, predicted_indices)
+}
+
+/// The predecessor masks (see [`optimal_ops`]) of all cells in the cost matrix, packed two cells per byte.
+///
+/// The masks are all we need to backtrack, so we only keep a few rows of costs while filling the matrix: two rows in
+/// the row-major kernel and one strip in the wavefront kernel (see [`wavefront::predecessor_masks`]). This uses four
+/// bits per cell instead of the 16 to 64 bits per cell of the cost matrix. Each row is padded to a whole number of bytes, and
+/// the mask of cell `(row, col)` is stored in the low nibble of byte `col / 2` of the row if `col` is even and in the
+/// high nibble otherwise.
+pub struct PredecessorMasks {
+    pub masks: Vec<u8>,
+    pub row_stride: usize,
+}
+
+impl PredecessorMasks {
+    /// Compute the predecessor masks with the fastest kernel for the sequence lengths.
+    pub fn new(reference: &[u32], predicted: &[u32]) -> Self {
+        let (m, n) = (reference.len(), predicted.len());
+        if wavefront::is_faster_than_row_major(m, n) {
+            if wavefront::fits::<u16>(m, n) {
+                return wavefront::predecessor_masks::<u16>(reference, predicted);
+            }
+            if wavefront::fits::<u32>(m, n) {
+                return wavefront::predecessor_masks::<u32>(reference, predicted);
+            }
+        }
+        Self::row_major(reference, predicted)
+    }
+
+    /// The masks of the first row and the first column, with all other masks set to zero.
+    pub fn empty(m: usize, n: usize) -> Self {
+        let row_stride = (n + 1).div_ceil(2);
+        let mut masks = vec![0; (m + 1) * row_stride];
+        for col in 1..=n {
+            masks[col / 2] |= (1 << INSERTED) << (4 * (col % 2));
+        }
+        for row in 1..=m {
+            masks[row * row_stride] = 1 << DELETED;
+        }
+        Self { masks, row_stride }
+    }
+
+    /// Compute the predecessor masks row by row, keeping only two rows of costs.
+    pub fn row_major(reference: &[u32], predicted: &[u32]) -> Self {
+        let n_cols = predicted.len() + 1;
+        let Self {
+            mut masks,
+            row_stride,
+        } = Self::empty(reference.len(), predicted.len());
+
+        let mut previous_row: Vec<u64> = (0..n_cols as u64).collect();
+        let mut row = vec![0; n_cols];
+
+        for (i, &reference_token) in reference.iter().enumerate() {
+            let row_masks = &mut masks[(i + 1) * row_stride..(i + 2) * row_stride];
+            row[0] = (i + 1) as u64;
+
+            for (j, &predicted_token) in predicted.iter().enumerate() {
+                let (diagonal, up, left) = (previous_row[j], previous_row[j + 1], row[j]);
+                let (cost, mut mask) = if reference_token == predicted_token {
+                    (diagonal, 1 << KEPT)
+                } else {
+                    let cost = 1 + min(min(diagonal, up), left);
+                    (cost, u8::from(cost == diagonal + 1) << REPLACED)
+                };
+                mask |= u8::from(cost == up + 1) << DELETED;
+                mask |= u8::from(cost == left + 1) << INSERTED;
+
+                row[j + 1] = cost;
+                row_masks[j.div_ceil(2)] |= mask << (4 * ((j + 1) % 2));
+            }
+            std::mem::swap(&mut previous_row, &mut row);
+        }
+
+        Self { masks, row_stride }
+    }
+
+    /// Set the masks of row `row > 0` from its costs and the costs of the previous row.
+    ///
+    /// No cost depends on the cells to its left here, so the masks of the row are computed independently into
+    /// `cell_masks`, which must have one element per column, and then packed two cells per byte.
+    #[inline(always)]
+    pub fn set_row<T: Cost>(
+        &mut self,
+        row: usize,
+        reference_token: u32,
+        predicted: &[u32],
+        previous_row: &[T],
+        row_costs: &[T],
+        cell_masks: &mut [u8],
+    ) {
+        let n = predicted.len();
+        cell_masks[0] = 1 << DELETED;
+        for ((((mask, &predicted_token), &cost), &left), (&diagonal, &up)) in cell_masks[1..]
+            .iter_mut()
+            .zip(predicted)
+            .zip(&row_costs[1..])
+            .zip(&row_costs[..n])
+            .zip(previous_row[..n].iter().zip(&previous_row[1..]))
+        {
+            let kept = reference_token == predicted_token;
+            *mask = u8::from(kept) << KEPT
+                | u8::from(!kept && cost == diagonal + T::ONE) << REPLACED
+                | u8::from(cost == up + T::ONE) << DELETED
+                | u8::from(cost == left + T::ONE) << INSERTED;
+        }
+
+        let row_masks = &mut self.masks[row * self.row_stride..(row + 1) * self.row_stride];
+        let pairs = cell_masks.chunks_exact(2);
+        if let [last] = pairs.remainder() {
+            row_masks[n / 2] = *last;
+        }
+        for (byte, pair) in row_masks.iter_mut().zip(pairs) {
+            *byte = pair[0] | pair[1] << 4;
+        }
+    }
+
+    #[inline]
+    pub fn get(&self, row: usize, col: usize) -> u8 {
+        (self.masks[row * self.row_stride + col / 2] >> (4 * (col % 2))) & 0b1111
+    }
+}
+
+/// Align two token id sequences with the Needleman-Wunsch algorithm.
+///
+/// Returns the op codes in alignment order and whether the alignment is unique.
+pub fn align(reference: &[u32], predicted: &[u32]) -> (Vec<u8>, bool) {
+    let masks = PredecessorMasks::new(reference, predicted);
+    traceback(reference.len(), predicted.len(), |row, col| {
+        masks.get(row, col)
+    })
+}
+
+/// The cost of a cell and the number of optimal paths to it, saturating at `limit`, given whether its tokens are equal
+/// and the costs and counts of its diagonal, upper and left neighbours.
+#[inline]
+pub fn cost_and_count(
+    equal: bool,
+    (diagonal_cost, diagonal_count): (u64, u64),
+    (up_cost, up_count): (u64, u64),
+    (left_cost, left_count): (u64, u64),
+    limit: u64,
+) -> (u64, u64) {
+    let cost = if equal {
+        diagonal_cost
+    } else {
+        1 + min(min(diagonal_cost, up_cost), left_cost)
+    };
+    let mut count = 0u64;
+    if equal || diagonal_cost + 1 == cost {
+        count = diagonal_count;
+    }
+    if up_cost + 1 == cost {
+        count = count.saturating_add(up_count);
+    }
+    if left_cost + 1 == cost {
+        count = count.saturating_add(left_count);
+    }
+    (cost, min(count, limit))
+}
+
+/// Count the optimal alignments of two token id sequences, saturating at `limit`.
+///
+/// The count is computed by summing the number of paths over the optimal predecessors of each cell, keeping only
+/// one row of costs and counts in memory.
+pub fn count_optimal_alignments(reference: &[u32], predicted: &[u32], limit: u64) -> u64 {
+    let mut row: Vec<(u64, u64)> = (0..=predicted.len() as u64).map(|j| (j, 1)).collect();
+
+    for (i, &reference_token) in reference.iter().enumerate() {
+        let mut diagonal = row[0];
+        row[0] = ((i + 1) as u64, 1);
+        for (j, &predicted_token) in predicted.iter().enumerate() {
+            let up = row[j + 1];
+            row[j + 1] = cost_and_count(
+                reference_token == predicted_token,
+                diagonal,
+                up,
+                row[j],
+                limit,
+            );
+            diagonal = up;
+        }
+    }
+
+    row[predicted.len()].1
+}
@@ -0,0 +1,154 @@
+//! Enumerate the optimal alignments lazily.
+//!
+//! The optimal alignments are the paths from the last cell to the origin in the graph of optimal predecessors (see
+//! [`crate::paths`]). We order them lexicographically by their op codes in traceback order, so the first alignment is
+//! the one [`dp::traceback`] finds. Instead of storing the alignments, the enumerator stores the path of the current
+//! alignment as a stack of cells and the op codes chosen in them. Consecutive alignments share the start of the
+//! traceback, which is the end of the alignment, so we find the next alignment by advancing the last choice with an
+//! untried alternative and completing the path to the origin greedily. Every cell except the origin has an optimal
+//! predecessor, so the greedy completion never gets stuck, and the amortised cost of each alignment is proportional to
+//! the part of the path that changes.
+//!
+//! To start at an arbitrary rank, we count the optimal paths from the origin to each cell and choose the predecessors
+//! like in an unranking of a mixed radix number. The counts saturate at `u128::MAX`, which does not change the choices,
+//! since a saturated count is still larger than any rank we can be asked for.
+
+use crate::batch::Alignments;
+use crate::dp;
+use crate::paths::{ops_in, predecessor};
+
+/// A step of the traceback: the cell we backtrack from and the op code we backtrack with.
+#[derive(Clone, Copy)]
+struct Step {
+    row: usize,
+    col: usize,
+    op: u8,
+}
+
+/// Lazy enumerator over the optimal alignments of two token id sequences.
+pub struct Enumerator {
+    masks: dp::PredecessorMasks,
+    n_rows: usize,
+    n_cols: usize,
+    /// The traceback of the next alignment, or `None` if all alignments have been enumerated.
+    path: Option<Vec<Step>>,
+    /// Whether there is only one optimal alignment. An enumerator that skips alignments is only non-empty if there
+    /// are several.
+    unique: bool,
+}
+
+impl Enumerator {
+    /// Create an enumerator that starts at the alignment with rank `skip`.
+    ///
+    /// If `skip` is at least the number of optimal alignments, the enumerator is empty.
+    pub fn new(reference: &[u32], predicted: &[u32], skip: u128) -> Self {
+        let mut enumerator = Self {
+            masks: dp::PredecessorMasks::new(reference, predicted),
+            n_rows: reference.len() + 1,
+            n_cols: predicted.len() + 1,
+            path: None,
+            unique: false,
+        };
+
+        if skip == 0 {
+            let mut path = Vec::with_capacity(reference.len() + predicted.len());
+            enumerator.complete(&mut path, reference.len(), predicted.len());
+            // Any other alignment leaves this path in a cell with several optimal predecessors.
+            enumerator.unique = path
+                .iter()
+                .all(|step| enumerator.masks.get(step.row, step.col).count_ones() == 1);
+            enumerator.path = Some(path);
+        } else {
+            enumerator.path = enumerator.unrank(skip);
+        }
+        enumerator
+    }
+
+    /// Extend `path` from cell `(row, col)` to the origin, always choosing the lowest op code.
+    fn complete(&self, path: &mut Vec<Step>, mut row: usize, mut col: usize) {
+        while row > 0 || col > 0 {
+            let op = self.masks.get(row, col).trailing_zeros() as u8;
+            path.push(Step { row, col, op });
+            (row, col) = predecessor(row, col, op);
+        }
+    }
+
+    /// The traceback of the alignment with rank `rank`, or `None` if there are not that many optimal alignments.
+    fn unrank(&self, mut rank: u128) -> Option<Vec<Step>> {
+        let n_cols = self.n_cols;
+        let mut counts = vec![1u128; self.n_rows * n_cols];
+        for row in 0..self.n_rows {
+            for col in (0..n_cols).skip(usize::from(row == 0)) {
+                counts[row * n_cols + col] = ops_in(self.masks.get(row, col))
+                    .map(|op| {
+                        let (row, col) = predecessor(row, col, op);
+                        counts[row * n_cols + col]
+                    })
+                    .fold(0, u128::saturating_add);
+            }
+        }
+        if rank >= counts[counts.len() - 1] {
+            return None;
+        }
+
+        let (mut row, mut col) = (self.n_rows - 1, n_cols - 1);
+        let mut path = Vec::with_capacity(row + col);
+        while row > 0 || col > 0 {
+            for op in ops_in(self.masks.get(row, col)) {
+                let (previous_row, previous_col) = predecessor(row, col, op);
+                let count = counts[previous_row * n_cols + previous_col];
+                if rank < count {
+                    path.push(Step { row, col, op });
+                    (row, col) = (previous_row, previous_col);
+                    break;
+                }
+                rank -= count;
+            }
+        }
+        Some(path)
+    }
+
+    /// Advance `path` to the traceback of the next alignment, or return `false` if it is the last one.
+    fn advance(&self, path: &mut Vec<Step>) -> bool {
+        while let Some(step) = path.pop() {
+            let mask = self.masks.get(step.row, step.col);
+            let untried = mask & !((2 << step.op) - 1);
+            if untried != 0 {
+                let op = untried.trailing_zeros() as u8;
+                path.push(Step { op, ..step });
+                let (row, col) = predecessor(step.row, step.col, op);
+                self.complete(path, row, col);
+                return true;
+            }
+        }
+        false
+    }
+
+    /// Return the op codes of the next alignment in alignment order.
+    pub fn next_ops(&mut self) -> Option<Vec<u8>> {
+        let mut path = self.path.take()?;
+        let ops = path.iter().rev().map(|step| step.op).collect();
+        if self.advance(&mut path) {
+            self.path = Some(path);
+        }
+        Some(ops)
+    }
+
+    /// Return the next `n_alignments` alignments, or fewer if the enumerator runs out of alignments.
+    pub fn take(&mut self, n_alignments: usize) -> Alignments {
+        let mut alignments = Alignments {
+            ops: Vec::new(),
+            offsets: vec![0],
+            unique: Vec::new(),
+        };
+        for _ in 0..n_alignments {
+            let Some(ops) = self.next_ops() else {
+                break;
+            };
+            alignments.ops.extend(ops);
+            alignments.offsets.push(alignments.ops.len());
+            alignments.unique.push(self.unique);
+        }
+        alignments
+    }
+}
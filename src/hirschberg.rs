@@ -0,0 +1,172 @@
+//! Linear-space alignment with Hirschberg's divide and conquer algorithm.
+//!
+//! The reference is split in the middle, and we compute the last row of the cost matrix for the top half and (on the
+//! reversed sequences) for the bottom half. The column where the sum of these rows is smallest is a cell on an optimal
+//! alignment path, so we can align the two halves independently and concatenate the results. This needs `O(m + n)`
+//! memory instead of `O(mn)` and roughly twice as many cell updates as the full cost matrix.
+//!
+//! For a single huge pair, such as the transcript of an audio book, the rows of the large sub-problems are computed
+//! with several threads by a tiled wavefront sweep (see [`tiled::last_row`]).
+
+use crate::{dp, tiled};
+use std::cmp::min;
+
+/// Sub-problems with at most this many cost matrix cells are aligned with the full cost matrix.
+const BASE_CASE_CELLS: usize = 1 << 16;
+
+/// Sub-problems with fewer cost matrix cells than this are swept with one thread, since starting the threads of a
+/// tiled sweep takes longer than sweeping a small matrix.
+const PARALLEL_MIN_CELLS: usize = 1 << 24;
+
+/// Whether a matrix with `n_cells` cells is swept with several threads.
+fn is_parallel(n_cells: usize, n_threads: usize) -> bool {
+    n_threads > 1 && n_cells >= PARALLEL_MIN_CELLS
+}
+
+/// The cost of a cell from its neighbours, for [`tiled::last_row`].
+#[inline]
+fn cell_cost(equal: bool, diagonal: u64, up: u64, left: u64) -> u64 {
+    if equal {
+        diagonal
+    } else {
+        1 + min(min(diagonal, up), left)
+    }
+}
+
+/// Compute the last row of the cost matrix for two token sequences, given as iterators.
+///
+/// Using iterators lets us compute the row for the reversed sequences without copying them. The `row` slice must have
+/// length `predicted.len() + 1`.
+fn last_row<'a, R, P>(reference: R, predicted: P, row: &mut [u64])
+where
+    R: Iterator<Item = &'a u32>,
+    P: Iterator<Item = &'a u32> + Clone,
+{
+    for (j, c) in row.iter_mut().enumerate() {
+        *c = j as u64;
+    }
+    for (i, reference_token) in reference.enumerate() {
+        let mut diagonal = row[0];
+        row[0] = (i + 1) as u64;
+        for (j, predicted_token) in predicted.clone().enumerate() {
+            let up = row[j + 1];
+            row[j + 1] = if reference_token == predicted_token {
+                diagonal
+            } else {
+                1 + min(min(diagonal, up), row[j])
+            };
+            diagonal = up;
+        }
+    }
+}
+
+fn align_into(
+    reference: &[u32],
+    predicted: &[u32],
+    ops: &mut Vec<u8>,
+    forward: &mut [u64],
+    backward: &mut [u64],
+    n_threads: usize,
+) {
+    let n_cells = (reference.len() + 1) * (predicted.len() + 1);
+    if reference.len() <= 1 || n_cells <= BASE_CASE_CELLS {
+        ops.extend(dp::align(reference, predicted).0);
+        return;
+    }
+
+    let middle = reference.len() / 2;
+    let n = predicted.len();
+    if is_parallel(n_cells, n_threads) {
+        let boundary = |k: usize| k as u64;
+        forward[..=n].copy_from_slice(&tiled::last_row(
+            &reference[..middle],
+            predicted,
+            boundary,
+            cell_cost,
+            n_threads,
+        ));
+        // The tiles are indexed, so the bottom half is reversed by copying instead of with iterators.
+        let reversed_reference: Vec<u32> = reference[middle..].iter().rev().copied().collect();
+        let reversed_predicted: Vec<u32> = predicted.iter().rev().copied().collect();
+        backward[..=n].copy_from_slice(&tiled::last_row(
+            &reversed_reference,
+            &reversed_predicted,
+            boundary,
+            cell_cost,
+            n_threads,
+        ));
+    } else {
+        last_row(
+            reference[..middle].iter(),
+            predicted.iter(),
+            &mut forward[..=n],
+        );
+        last_row(
+            reference[middle..].iter().rev(),
+            predicted.iter().rev(),
+            &mut backward[..=n],
+        );
+    }
+
+    // backward[k] is the cost of aligning reference[middle..] with the last k predicted tokens.
+    let split = (0..=n)
+        .min_by_key(|&j| forward[j] + backward[n - j])
+        .unwrap_or(0);
+
+    align_into(
+        &reference[..middle],
+        &predicted[..split],
+        ops,
+        forward,
+        backward,
+        n_threads,
+    );
+    align_into(
+        &reference[middle..],
+        &predicted[split..],
+        ops,
+        forward,
+        backward,
+        n_threads,
+    );
+}
+
+/// Align two token id sequences in linear memory.
+///
+/// Returns the op codes in alignment order and whether the alignment is unique.
+pub fn align(reference: &[u32], predicted: &[u32]) -> (Vec<u8>, bool) {
+    align_parallel(reference, predicted, 1)
+}
+
+/// Align two token id sequences in linear memory, sweeping large sub-problems with `n_threads` threads.
+///
+/// The result is the same as for [`align`]. Returns the op codes in alignment order and whether the alignment is
+/// unique.
+pub fn align_parallel(reference: &[u32], predicted: &[u32], n_threads: usize) -> (Vec<u8>, bool) {
+    let mut ops = Vec::with_capacity(reference.len() + predicted.len());
+    let mut forward = vec![0; predicted.len() + 1];
+    let mut backward = vec![0; predicted.len() + 1];
+    align_into(
+        reference,
+        predicted,
+        &mut ops,
+        &mut forward,
+        &mut backward,
+        n_threads,
+    );
+
+    let n_cells = (reference.len() + 1) * (predicted.len() + 1);
+    let unique = if is_parallel(n_cells, n_threads) {
+        let counts = tiled::last_row(
+            reference,
+            predicted,
+            |k| (k as u64, 1),
+            |equal, diagonal, up, left| dp::cost_and_count(equal, diagonal, up, left, 2),
+            n_threads,
+        );
+        counts[predicted.len()].1 == 1
+    } else {
+        dp::count_optimal_alignments(reference, predicted, 2) == 1
+    };
+    (ops, unique)
+}
@@ -1,76 +1,608 @@
 use numpy::ndarray::Array2;
-use numpy::{IntoPyArray, PyArray2};
+use numpy::{Element, IntoPyArray, PyArray1, PyArray2, PyReadonlyArray1};
+use pyo3::exceptions::PyValueError;
 use pyo3::prelude::*;
-use std::cmp::min;
+use pyo3::types::PyDict;
+use std::borrow::Cow;
+use std::collections::HashMap;
 use unicode_segmentation::*;
 
+mod anchored;
+mod banded;
+mod batch;
+mod bitparallel;
+mod confusables;
+mod diagonal;
+mod distance;
+mod dp;
+mod enumerate;
+mod hirschberg;
+mod marginals;
+mod paths;
+mod sample;
+mod tiled;
+mod tokenize;
+mod trim;
+mod wavefront;
+
 #[pyfunction]
 #[pyo3(signature = (s, extended=true, /))]
-fn grapheme_clusters(s: &str, extended: bool) -> PyResult<Vec<&str>> {
-    let g = UnicodeSegmentation::graphemes(s, extended).collect::<Vec<&str>>();
+fn grapheme_clusters<'a>(py: Python<'_>, s: &'a str, extended: bool) -> PyResult<Vec<&'a str>> {
+    let g = py.detach(|| UnicodeSegmentation::graphemes(s, extended).collect::<Vec<&str>>());
 
     Ok(g)
 }
 
 #[pyfunction]
-fn unicode_words(s: &str) -> PyResult<Vec<&str>> {
-    let g = UnicodeSegmentation::unicode_words(s).collect::<Vec<&str>>();
+fn unicode_words<'a>(py: Python<'_>, s: &'a str) -> PyResult<Vec<&'a str>> {
+    let g = py.detach(|| UnicodeSegmentation::unicode_words(s).collect::<Vec<&str>>());
 
     Ok(g)
 }
 
 #[pyfunction]
-fn split_at_word_boundaries(s: &str) -> PyResult<Vec<&str>> {
-    let g = UnicodeSegmentation::split_word_bounds(s).collect::<Vec<&str>>();
+fn split_at_word_boundaries<'a>(py: Python<'_>, s: &'a str) -> PyResult<Vec<&'a str>> {
+    let g = py.detach(|| UnicodeSegmentation::split_word_bounds(s).collect::<Vec<&str>>());
 
     Ok(g)
 }
 
 #[pyfunction]
-fn unicode_sentences(s: &str) -> PyResult<Vec<&str>> {
-    let g = UnicodeSegmentation::unicode_sentences(s).collect::<Vec<&str>>();
+fn unicode_sentences<'a>(py: Python<'_>, s: &'a str) -> PyResult<Vec<&'a str>> {
+    let g = py.detach(|| UnicodeSegmentation::unicode_sentences(s).collect::<Vec<&str>>());
 
     Ok(g)
 }
 
 #[pyfunction]
-fn split_unicode_sentence_bounds(s: &str) -> PyResult<Vec<&str>> {
-    let g = UnicodeSegmentation::split_sentence_bounds(s).collect::<Vec<&str>>();
+fn split_unicode_sentence_bounds<'a>(py: Python<'_>, s: &'a str) -> PyResult<Vec<&'a str>> {
+    let g = py.detach(|| UnicodeSegmentation::split_sentence_bounds(s).collect::<Vec<&str>>());
 
     Ok(g)
 }
 
+#[pyclass(module = "stringalign._stringutils", frozen)]
+struct ConfusableMatcher(confusables::Matcher);
+
+#[pymethods]
+impl ConfusableMatcher {
+    #[new]
+    #[pyo3(signature = (confusable_map, /))]
+    fn new(confusable_map: HashMap<String, String>) -> Self {
+        Self(confusables::Matcher::Trie(confusables::Trie::new(
+            confusable_map
+                .iter()
+                .map(|(confusable, replacement)| (confusable.as_str(), replacement.as_str())),
+        )))
+    }
+
+    /// The matcher of the Unicode confusables or intentional confusables, which uses the precompiled table.
+    #[staticmethod]
+    #[pyo3(signature = (confusable_type, /))]
+    fn bundled(confusable_type: &str) -> PyResult<Self> {
+        Ok(Self(confusables::Matcher::Table(bundled_confusable_table(
+            confusable_type,
+        )?)))
+    }
+
+    #[pyo3(signature = (s, /))]
+    fn resolve<'a>(&self, py: Python<'_>, s: &'a str) -> Cow<'a, str> {
+        py.detach(|| self.0.resolve(s))
+    }
+}
+
+fn bundled_confusable_table(confusable_type: &str) -> PyResult<&'static confusables::Table> {
+    match confusable_type {
+        "confusables" => Ok(&confusables::CONFUSABLES),
+        "intentional" => Ok(&confusables::INTENTIONAL),
+        _ => Err(PyValueError::new_err(format!(
+            "Invalid confusable type: {confusable_type}. Must be 'confusables' or 'intentional'."
+        ))),
+    }
+}
+
+#[pyfunction]
+#[pyo3(signature = (confusable_type, /))]
+fn bundled_confusable_map<'py>(
+    py: Python<'py>,
+    confusable_type: &str,
+) -> PyResult<Bound<'py, PyDict>> {
+    let confusable_map = PyDict::new(py);
+    for (confusable, replacement) in bundled_confusable_table(confusable_type)?.iter() {
+        confusable_map.set_item(confusable, replacement)?;
+    }
+    Ok(confusable_map)
+}
+
+fn parse_segmentation(segmentation: &str) -> PyResult<tokenize::Segmentation> {
+    match segmentation {
+        "grapheme_clusters" => Ok(tokenize::Segmentation::GraphemeClusters),
+        "unicode_words" => Ok(tokenize::Segmentation::UnicodeWords),
+        "word_boundaries" => Ok(tokenize::Segmentation::WordBoundaries),
+        "whitespace" => Ok(tokenize::Segmentation::Whitespace),
+        _ => Err(PyValueError::new_err(format!(
+            "Invalid segmentation: {segmentation}"
+        ))),
+    }
+}
+
+fn parse_normalization(normalization: Option<&str>) -> PyResult<Option<tokenize::Form>> {
+    match normalization {
+        None => Ok(None),
+        Some("NFC") => Ok(Some(tokenize::Form::Nfc)),
+        Some("NFD") => Ok(Some(tokenize::Form::Nfd)),
+        Some("NFKC") => Ok(Some(tokenize::Form::Nfkc)),
+        Some("NFKD") => Ok(Some(tokenize::Form::Nfkd)),
+        // The same message as `unicodedata.normalize`.
+        Some(_) => Err(PyValueError::new_err("invalid normalization form")),
+    }
+}
+
+fn spans_array(py: Python<'_>, spans: Vec<(usize, usize)>) -> PyResult<Bound<'_, PyArray2<i32>>> {
+    if spans
+        .last()
+        .is_some_and(|&(_, end)| i32::try_from(end).is_err())
+    {
+        return Err(PyValueError::new_err(
+            "The string is too long to store its spans as int32",
+        ));
+    }
+
+    let shape = (spans.len(), 2);
+    #[allow(clippy::cast_possible_truncation, clippy::cast_possible_wrap)]
+    let offsets: Vec<i32> = spans
+        .into_iter()
+        .flat_map(|(start, end)| [start as i32, end as i32])
+        .collect();
+    let spans =
+        Array2::from_shape_vec(shape, offsets).map_err(|e| PyValueError::new_err(e.to_string()))?;
+    Ok(spans.into_pyarray(py))
+}
+
+#[pyfunction]
+#[pyo3(signature = (s, segmentation, /))]
+fn segment_spans<'py>(
+    py: Python<'py>,
+    s: &str,
+    segmentation: &str,
+) -> PyResult<Bound<'py, PyArray2<i32>>> {
+    let segmentation = parse_segmentation(segmentation)?;
+    let spans = py.detach(|| tokenize::segment_spans(s, segmentation));
+    spans_array(py, spans)
+}
+
+#[pyfunction]
+#[pyo3(signature = (s, segmentation, confusables, normalization, case_insensitive, normalize_whitespace, remove_whitespace, remove_non_word_characters, /))]
+#[allow(clippy::too_many_arguments, clippy::fn_params_excessive_bools)]
+fn non_whitespace_token_spans<'py>(
+    py: Python<'py>,
+    s: &str,
+    segmentation: &str,
+    confusables: Option<PyRef<'_, ConfusableMatcher>>,
+    normalization: Option<&str>,
+    case_insensitive: bool,
+    normalize_whitespace: bool,
+    remove_whitespace: bool,
+    remove_non_word_characters: bool,
+) -> PyResult<(Bound<'py, PyArray2<i32>>, Vec<usize>)> {
+    let segmentation = parse_segmentation(segmentation)?;
+    let normalizer = tokenize::Normalizer {
+        confusables: confusables.as_deref().map(|confusables| &confusables.0),
+        normalization: parse_normalization(normalization)?,
+        case_insensitive,
+        normalize_whitespace,
+        remove_whitespace,
+        remove_non_word_characters,
+    };
+
+    let (spans, fallback_indices) =
+        py.detach(|| tokenize::non_whitespace_token_spans(s, segmentation, &normalizer));
+    Ok((spans_array(py, spans)?, fallback_indices))
+}
+
+#[pyfunction]
+#[pyo3(signature = (s, segmentation, confusables, normalization, case_insensitive, normalize_whitespace, remove_whitespace, remove_non_word_characters, /))]
+#[allow(clippy::too_many_arguments, clippy::fn_params_excessive_bools)]
+fn normalized_tokens<'a>(
+    py: Python<'_>,
+    s: &'a str,
+    segmentation: &str,
+    confusables: Option<PyRef<'_, ConfusableMatcher>>,
+    normalization: Option<&str>,
+    case_insensitive: bool,
+    normalize_whitespace: bool,
+    remove_whitespace: bool,
+    remove_non_word_characters: bool,
+) -> PyResult<(Vec<Cow<'a, str>>, Vec<usize>)> {
+    let segmentation = parse_segmentation(segmentation)?;
+    let normalizer = tokenize::Normalizer {
+        confusables: confusables.as_deref().map(|confusables| &confusables.0),
+        normalization: parse_normalization(normalization)?,
+        case_insensitive,
+        normalize_whitespace,
+        remove_whitespace,
+        remove_non_word_characters,
+    };
+
+    Ok(py.detach(|| tokenize::normalized_tokens(s, segmentation, &normalizer)))
+}
+
+fn cost_matrix_array<'py, T: dp::Cost + From<bool> + Element + Send>(
+    py: Python<'py>,
+    reference: &[u32],
+    predicted: &[u32],
+    wavefront: Option<bool>,
+) -> PyResult<Bound<'py, PyAny>> {
+    let (m, n) = (reference.len(), predicted.len());
+    if m.max(n) > T::MAX {
+        return Err(PyValueError::new_err(format!(
+            "The token sequences are too long to store the cost matrix as {}",
+            std::any::type_name::<T>()
+        )));
+    }
+
+    let shape = (m + 1, n + 1);
+    let use_wavefront = wavefront.unwrap_or_else(|| wavefront::is_faster_than_row_major(m, n))
+        && wavefront::fits::<T>(m, n);
+    let cost = py.detach(|| {
+        if use_wavefront {
+            wavefront::cost_matrix::<T>(reference, predicted)
+        } else {
+            dp::cost_matrix::<T>(reference, predicted)
+        }
+    });
+    let cost =
+        Array2::from_shape_vec(shape, cost).map_err(|e| PyValueError::new_err(e.to_string()))?;
+
+    Ok(cost.into_pyarray(py).into_any())
+}
+
+#[pyfunction]
+#[pyo3(signature = (reference, predicted, /, dtype=None, wavefront=None))]
+fn create_cost_matrix<'py>(
+    py: Python<'py>,
+    reference: PyReadonlyArray1<'py, u32>,
+    predicted: PyReadonlyArray1<'py, u32>,
+    dtype: Option<&str>,
+    wavefront: Option<bool>,
+) -> PyResult<Bound<'py, PyAny>> {
+    let reference = reference.as_slice()?;
+    let predicted = predicted.as_slice()?;
+
+    // No cost is larger than the length of the longest sequence, so we use the narrowest type that can store it.
+    let max_cost = reference.len().max(predicted.len());
+    let dtype = dtype.unwrap_or(if max_cost <= u16::MAX as usize {
+        "uint16"
+    } else if max_cost <= u32::MAX as usize {
+        "uint32"
+    } else {
+        "uint64"
+    });
+
+    match dtype {
+        "uint16" => cost_matrix_array::<u16>(py, reference, predicted, wavefront),
+        "uint32" => cost_matrix_array::<u32>(py, reference, predicted, wavefront),
+        "uint64" => cost_matrix_array::<u64>(py, reference, predicted, wavefront),
+        _ => Err(PyValueError::new_err(format!(
+            "Invalid cost matrix dtype: {dtype}. Must be 'uint16', 'uint32' or 'uint64'."
+        ))),
+    }
+}
+
 #[pyfunction]
 #[pyo3(signature = (reference, predicted, /))]
-fn create_cost_matrix(
+fn predecessor_masks<'py>(
+    py: Python<'py>,
+    reference: PyReadonlyArray1<'py, u32>,
+    predicted: PyReadonlyArray1<'py, u32>,
+) -> PyResult<Bound<'py, PyArray2<u8>>> {
+    let reference = reference.as_slice()?;
+    let predicted = predicted.as_slice()?;
+
+    let masks = py.detach(|| dp::PredecessorMasks::new(reference, predicted));
+    let shape = (reference.len() + 1, masks.row_stride);
+    let masks = Array2::from_shape_vec(shape, masks.masks)
+        .map_err(|e| PyValueError::new_err(e.to_string()))?;
+
+    Ok(masks.into_pyarray(py))
+}
+
+#[pyfunction]
+#[pyo3(signature = (reference, predicted, /, max_distance=None, myers=false))]
+fn levenshtein_distance(
+    py: Python<'_>,
+    reference: PyReadonlyArray1<'_, u32>,
+    predicted: PyReadonlyArray1<'_, u32>,
+    max_distance: Option<usize>,
+    myers: bool,
+) -> PyResult<Option<usize>> {
+    let reference = reference.as_slice()?;
+    let predicted = predicted.as_slice()?;
+
+    Ok(py.detach(|| distance::levenshtein_distance(reference, predicted, max_distance, myers)))
+}
+
+#[pyfunction]
+#[pyo3(signature = (reference_ids, reference_offsets, predicted_ids, predicted_offsets, max_distance, myers, n_threads, /))]
+#[allow(clippy::too_many_arguments)]
+fn levenshtein_distances<'py>(
+    py: Python<'py>,
+    reference_ids: PyReadonlyArray1<'py, u32>,
+    reference_offsets: PyReadonlyArray1<'py, usize>,
+    predicted_ids: PyReadonlyArray1<'py, u32>,
+    predicted_offsets: PyReadonlyArray1<'py, usize>,
+    max_distance: Option<usize>,
+    myers: bool,
+    n_threads: usize,
+) -> PyResult<Vec<Option<usize>>> {
+    let pairs = batch::Pairs {
+        reference_ids: reference_ids.as_slice()?,
+        reference_offsets: reference_offsets.as_slice()?,
+        predicted_ids: predicted_ids.as_slice()?,
+        predicted_offsets: predicted_offsets.as_slice()?,
+    };
+    pairs.validate().map_err(PyValueError::new_err)?;
+
+    Ok(py.detach(|| batch::levenshtein_distances(&pairs, max_distance, myers, n_threads)))
+}
+
+#[pyfunction]
+#[pyo3(signature = (reference, predicted, /))]
+fn count_optimal_alignments(
     py: Python<'_>,
-    reference: Vec<String>,
-    predicted: Vec<String>,
-) -> PyResult<Bound<'_, PyArray2<u64>>> {
-    let n1 = reference.len() + 1;
-    let n2 = predicted.len() + 1;
-    let mut cost = Array2::zeros((n1, n2));
-
-    for i in 0..n1 {
-        cost[[i, 0]] = i as u64;
+    reference: PyReadonlyArray1<'_, u32>,
+    predicted: PyReadonlyArray1<'_, u32>,
+) -> PyResult<u64> {
+    let (reference, predicted) = (reference.as_slice()?, predicted.as_slice()?);
+    Ok(py.detach(|| dp::count_optimal_alignments(reference, predicted, u64::MAX)))
+}
+
+/// An alignment as op codes, the reference and predicted token index of each op code, and the uniqueness flag.
+type Alignment<'py> = (
+    Bound<'py, PyArray1<u8>>,
+    Bound<'py, PyArray1<usize>>,
+    Bound<'py, PyArray1<usize>>,
+    bool,
+);
+
+/// Convert the op codes from an alignment kernel into Python objects. This needs the GIL, so it is called after the
+/// kernel has run.
+fn into_alignment(py: Python<'_>, ops: Vec<u8>, unique: bool) -> Alignment<'_> {
+    let (reference_indices, predicted_indices) = dp::token_indices(&ops);
+    (
+        ops.into_pyarray(py),
+        reference_indices.into_pyarray(py),
+        predicted_indices.into_pyarray(py),
+        unique,
+    )
+}
+
+#[pyfunction]
+#[pyo3(signature = (reference, predicted, /))]
+fn needleman_wunsch_alignment<'py>(
+    py: Python<'py>,
+    reference: PyReadonlyArray1<'py, u32>,
+    predicted: PyReadonlyArray1<'py, u32>,
+) -> PyResult<Alignment<'py>> {
+    let (reference, predicted) = (reference.as_slice()?, predicted.as_slice()?);
+    let (ops, unique) = py.detach(|| trim::align(reference, predicted, dp::align));
+    Ok(into_alignment(py, ops, unique))
+}
+
+#[pyfunction]
+#[pyo3(signature = (reference, predicted, n_threads=1, /))]
+fn hirschberg_alignment<'py>(
+    py: Python<'py>,
+    reference: PyReadonlyArray1<'py, u32>,
+    predicted: PyReadonlyArray1<'py, u32>,
+    n_threads: usize,
+) -> PyResult<Alignment<'py>> {
+    let (reference, predicted) = (reference.as_slice()?, predicted.as_slice()?);
+    let (ops, unique) = py.detach(|| {
+        trim::align(reference, predicted, |reference, predicted| {
+            hirschberg::align_parallel(reference, predicted, n_threads)
+        })
+    });
+    Ok(into_alignment(py, ops, unique))
+}
+
+#[pyfunction]
+#[pyo3(signature = (reference, predicted, max_distance, /))]
+fn banded_alignment<'py>(
+    py: Python<'py>,
+    reference: PyReadonlyArray1<'py, u32>,
+    predicted: PyReadonlyArray1<'py, u32>,
+    max_distance: usize,
+) -> PyResult<Alignment<'py>> {
+    let (reference, predicted) = (reference.as_slice()?, predicted.as_slice()?);
+    let (ops, unique) = py.detach(|| {
+        trim::align(reference, predicted, |reference, predicted| {
+            banded::align(reference, predicted, max_distance)
+        })
+    });
+    Ok(into_alignment(py, ops, unique))
+}
+
+#[pyfunction]
+#[pyo3(signature = (reference, predicted, use_hirschberg, /))]
+fn myers_alignment<'py>(
+    py: Python<'py>,
+    reference: PyReadonlyArray1<'py, u32>,
+    predicted: PyReadonlyArray1<'py, u32>,
+    use_hirschberg: bool,
+) -> PyResult<Alignment<'py>> {
+    let (reference, predicted) = (reference.as_slice()?, predicted.as_slice()?);
+    let (ops, unique) = py.detach(|| {
+        trim::align(reference, predicted, |reference, predicted| {
+            diagonal::align(reference, predicted).unwrap_or_else(|| {
+                if use_hirschberg {
+                    hirschberg::align(reference, predicted)
+                } else {
+                    dp::align(reference, predicted)
+                }
+            })
+        })
+    });
+    Ok(into_alignment(py, ops, unique))
+}
+
+#[pyfunction]
+#[pyo3(signature = (reference, predicted, anchor_length, hirschberg_min_cells, n_threads, /))]
+fn anchored_alignment<'py>(
+    py: Python<'py>,
+    reference: PyReadonlyArray1<'py, u32>,
+    predicted: PyReadonlyArray1<'py, u32>,
+    anchor_length: usize,
+    hirschberg_min_cells: usize,
+    n_threads: usize,
+) -> PyResult<Alignment<'py>> {
+    let (reference, predicted) = (reference.as_slice()?, predicted.as_slice()?);
+    let (ops, unique) = py.detach(|| {
+        anchored::align(
+            reference,
+            predicted,
+            anchor_length,
+            hirschberg_min_cells,
+            n_threads,
+        )
+    });
+    Ok(into_alignment(py, ops, unique))
+}
+
+/// Many alignments as op codes, the token indices of each op code within its alignment, the offsets of each
+/// alignment's op codes and the uniqueness flags.
+type Alignments<'py> = (
+    Bound<'py, PyArray1<u8>>,
+    Bound<'py, PyArray1<usize>>,
+    Bound<'py, PyArray1<usize>>,
+    Bound<'py, PyArray1<usize>>,
+    Bound<'py, PyArray1<bool>>,
+);
+
+fn into_alignments(
+    py: Python<'_>,
+    alignments: batch::Alignments,
+    (reference_indices, predicted_indices): (Vec<usize>, Vec<usize>),
+) -> Alignments<'_> {
+    (
+        alignments.ops.into_pyarray(py),
+        reference_indices.into_pyarray(py),
+        predicted_indices.into_pyarray(py),
+        alignments.offsets.into_pyarray(py),
+        alignments.unique.into_pyarray(py),
+    )
+}
+
+#[pyfunction]
+#[pyo3(signature = (reference_ids, reference_offsets, predicted_ids, predicted_offsets, use_hirschberg, max_distance, myers, n_threads, /))]
+#[allow(clippy::too_many_arguments)]
+fn align_many<'py>(
+    py: Python<'py>,
+    reference_ids: PyReadonlyArray1<'py, u32>,
+    reference_offsets: PyReadonlyArray1<'py, usize>,
+    predicted_ids: PyReadonlyArray1<'py, u32>,
+    predicted_offsets: PyReadonlyArray1<'py, usize>,
+    use_hirschberg: PyReadonlyArray1<'py, bool>,
+    max_distance: Option<usize>,
+    myers: bool,
+    n_threads: usize,
+) -> PyResult<Alignments<'py>> {
+    let pairs = batch::Pairs {
+        reference_ids: reference_ids.as_slice()?,
+        reference_offsets: reference_offsets.as_slice()?,
+        predicted_ids: predicted_ids.as_slice()?,
+        predicted_offsets: predicted_offsets.as_slice()?,
+    };
+    let use_hirschberg = use_hirschberg.as_slice()?;
+    pairs.validate().map_err(PyValueError::new_err)?;
+    if use_hirschberg.len() != pairs.n_pairs() {
+        return Err(PyValueError::new_err(
+            "There must be one Hirschberg flag per string pair",
+        ));
     }
-    for j in 0..n2 {
-        cost[[0, j]] = j as u64;
+
+    let (alignments, token_indices) = py.detach(|| {
+        let alignments = batch::align_many(&pairs, use_hirschberg, max_distance, myers, n_threads);
+        let token_indices = alignments.token_indices();
+        (alignments, token_indices)
+    });
+    Ok(into_alignments(py, alignments, token_indices))
+}
+
+#[pyfunction]
+#[pyo3(signature = (reference, predicted, n_samples, seed, /))]
+fn sample_alignments<'py>(
+    py: Python<'py>,
+    reference: PyReadonlyArray1<'py, u32>,
+    predicted: PyReadonlyArray1<'py, u32>,
+    n_samples: usize,
+    seed: u64,
+) -> PyResult<Alignments<'py>> {
+    let (reference, predicted) = (reference.as_slice()?, predicted.as_slice()?);
+    let (alignments, token_indices) = py.detach(|| {
+        let alignments = sample::sample_alignments(reference, predicted, n_samples, seed);
+        let token_indices = alignments.token_indices();
+        (alignments, token_indices)
+    });
+    Ok(into_alignments(py, alignments, token_indices))
+}
+
+/// Lazily enumerate the optimal alignments of two token id sequences, see [`enumerate::Enumerator`].
+#[pyclass(module = "stringalign._stringutils")]
+struct AlignmentEnumerator(enumerate::Enumerator);
+
+#[pymethods]
+impl AlignmentEnumerator {
+    #[new]
+    #[pyo3(signature = (reference, predicted, skip, /))]
+    fn new(
+        py: Python<'_>,
+        reference: PyReadonlyArray1<'_, u32>,
+        predicted: PyReadonlyArray1<'_, u32>,
+        skip: u128,
+    ) -> PyResult<Self> {
+        let (reference, predicted) = (reference.as_slice()?, predicted.as_slice()?);
+        Ok(Self(py.detach(|| {
+            enumerate::Enumerator::new(reference, predicted, skip)
+        })))
     }
 
-    // Populate the cost matrix
-    for i in 0..n1 - 1 {
-        for j in 0..n2 - 1 {
-            if reference[i] == predicted[j] {
-                cost[[i + 1, j + 1]] = cost[[i, j]];
-            } else {
-                cost[[i + 1, j + 1]] =
-                    1 + min(min(cost[[i, j]], cost[[i, j + 1]]), cost[[i + 1, j]]);
-            }
-        }
+    #[pyo3(signature = (n_alignments, /))]
+    fn take<'py>(&mut self, py: Python<'py>, n_alignments: usize) -> Alignments<'py> {
+        let (alignments, token_indices) = py.detach(|| {
+            let alignments = self.0.take(n_alignments);
+            let token_indices = alignments.token_indices();
+            (alignments, token_indices)
+        });
+        into_alignments(py, alignments, token_indices)
     }
+}
 
-    Ok(cost.into_pyarray(py))
+/// The op code, reference and predicted token index, mean count and count variance of each alignment operation.
+type OperationMoments<'py> = (
+    Bound<'py, PyArray1<u8>>,
+    Bound<'py, PyArray1<usize>>,
+    Bound<'py, PyArray1<usize>>,
+    Bound<'py, PyArray1<f64>>,
+    Bound<'py, PyArray1<f64>>,
+);
+
+#[pyfunction]
+#[pyo3(signature = (reference, predicted, /))]
+fn operation_moments<'py>(
+    py: Python<'py>,
+    reference: PyReadonlyArray1<'py, u32>,
+    predicted: PyReadonlyArray1<'py, u32>,
+) -> PyResult<OperationMoments<'py>> {
+    let (reference, predicted) = (reference.as_slice()?, predicted.as_slice()?);
+    let moments = py.detach(|| marginals::operation_moments(reference, predicted));
+    Ok((
+        moments.ops.into_pyarray(py),
+        moments.reference_indices.into_pyarray(py),
+        moments.predicted_indices.into_pyarray(py),
+        moments.means.into_pyarray(py),
+        moments.variances.into_pyarray(py),
+    ))
 }
 
 #[pymodule]
@@ -80,7 +612,25 @@ fn _stringutils(m: &Bound<'_, PyModule>) -> PyResult<()> {
     m.add_function(wrap_pyfunction!(split_at_word_boundaries, m)?)?;
     m.add_function(wrap_pyfunction!(unicode_sentences, m)?)?;
     m.add_function(wrap_pyfunction!(split_unicode_sentence_bounds, m)?)?;
+    m.add_function(wrap_pyfunction!(bundled_confusable_map, m)?)?;
+    m.add_function(wrap_pyfunction!(normalized_tokens, m)?)?;
+    m.add_function(wrap_pyfunction!(segment_spans, m)?)?;
+    m.add_function(wrap_pyfunction!(non_whitespace_token_spans, m)?)?;
     m.add_function(wrap_pyfunction!(create_cost_matrix, m)?)?;
+    m.add_function(wrap_pyfunction!(predecessor_masks, m)?)?;
+    m.add_function(wrap_pyfunction!(levenshtein_distance, m)?)?;
+    m.add_function(wrap_pyfunction!(levenshtein_distances, m)?)?;
+    m.add_function(wrap_pyfunction!(count_optimal_alignments, m)?)?;
+    m.add_function(wrap_pyfunction!(needleman_wunsch_alignment, m)?)?;
+    m.add_function(wrap_pyfunction!(hirschberg_alignment, m)?)?;
+    m.add_function(wrap_pyfunction!(banded_alignment, m)?)?;
+    m.add_function(wrap_pyfunction!(myers_alignment, m)?)?;
+    m.add_function(wrap_pyfunction!(anchored_alignment, m)?)?;
+    m.add_function(wrap_pyfunction!(align_many, m)?)?;
+    m.add_function(wrap_pyfunction!(sample_alignments, m)?)?;
+    m.add_function(wrap_pyfunction!(operation_moments, m)?)?;
+    m.add_class::<AlignmentEnumerator>()?;
+    m.add_class::<ConfusableMatcher>()?;
 
     Ok(())
 }
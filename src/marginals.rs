@@ -0,0 +1,254 @@
+//! The mean and variance of the number of times each alignment operation occurs in a uniformly random optimal alignment.
+//!
+//! Let `F(c)` be the number of optimal paths from the origin to cell `c` (see [`PathCounts`]) and `B(c)` the number of
+//! optimal paths from `c` to the last cell. An edge from `p` to `c` in the graph of optimal predecessors is then used by
+//! `F(p) B(c)` of the `F(m, n)` optimal alignments. So the expected number of times an operation occurs is the sum of
+//! `F(p) B(c) / F(m, n)` over the edges of the operation, which is the forward-backward algorithm.
+//!
+//! The variance depends on which edges occur together. We propagate the first two moments of the operation counts over
+//! uniformly random optimal paths from the origin to each cell, which is the same distribution as the one we sample
+//! from (see [`crate::sample`]). Propagating the moments of every operation over the whole cost matrix would take
+//! `O(mn)` time per operation, so we split the optimal paths at the cells that all optimal paths pass through. The
+//! parts of a uniformly random optimal path between two such cells are independent, so the variance of a count is the
+//! sum of the variances of its counts in each part. Only the parts where the paths differ, that is, the parts with an
+//! edge that is on some, but not all, optimal paths, can have a variance. So we only propagate the moments of the
+//! operations with such an edge in the part, and only in the rectangle of cells between the two cells that start and
+//! end the part. For similar strings, these rectangles are small, and the time is dominated by the `O(mn)`
+//! forward-backward pass. In the worst case, where the optimal paths only meet at the first and last cell, it is
+//! `O(kmn)` for `k` operations with such edges.
+
+use crate::dp;
+use crate::paths::{log2_add, ops_in, predecessor, PathCounts};
+use std::collections::HashMap;
+
+/// Edges that are used by more than this fraction of the optimal alignments are assumed to be used by all of them.
+const CERTAIN: f64 = 1.0 - 1e-9;
+
+/// Variances below this fraction of the second moment are rounding errors from computing `E[X^2] - E[X]^2`.
+const ROUNDING_ERROR: f64 = 1e-12;
+
+/// Token id used for the missing token of deleted and inserted tokens.
+const NO_TOKEN: u32 = u32::MAX;
+
+/// An alignment operation, identified by its op code and token ids.
+#[derive(Clone, Copy, PartialEq, Eq, Hash)]
+struct Operation {
+    op: u8,
+    reference_token: u32,
+    predicted_token: u32,
+}
+
+impl Operation {
+    /// The operation of the edge for op code `op` that ends in cell `(row, col)`.
+    #[inline]
+    fn at(reference: &[u32], predicted: &[u32], row: usize, col: usize, op: u8) -> Self {
+        let (reference_token, predicted_token) = match op {
+            dp::KEPT | dp::REPLACED => (reference[row - 1], predicted[col - 1]),
+            dp::DELETED => (reference[row - 1], NO_TOKEN),
+            _ => (NO_TOKEN, predicted[col - 1]),
+        };
+        Self {
+            op,
+            reference_token,
+            predicted_token,
+        }
+    }
+}
+
+/// The mean and variance of the number of times each alignment operation occurs in a uniformly random optimal
+/// alignment.
+///
+/// Each operation is given by its op code and the reference and predicted token index of one of its occurrences,
+/// counted in the same way as in [`dp::token_indices`].
+pub struct OperationMoments {
+    pub ops: Vec<u8>,
+    pub reference_indices: Vec<usize>,
+    pub predicted_indices: Vec<usize>,
+    pub means: Vec<f64>,
+    pub variances: Vec<f64>,
+}
+
+/// The logarithm of the number of optimal paths from each cell to the last cell, row-major.
+fn backward_log_counts(forward: &PathCounts) -> Vec<f64> {
+    let n_cols = forward.n_cols();
+    let mut log_counts = vec![f64::NEG_INFINITY; forward.n_rows() * n_cols];
+    let last = log_counts.len() - 1;
+    log_counts[last] = 0.0;
+
+    for row in (0..forward.n_rows()).rev() {
+        for col in (0..n_cols).rev() {
+            let log_count = log_counts[row * n_cols + col];
+            if log_count == f64::NEG_INFINITY {
+                continue;
+            }
+            for op in ops_in(forward.masks.get(row, col)) {
+                let (row, col) = predecessor(row, col, op);
+                let index = row * n_cols + col;
+                log_counts[index] = log2_add(log_counts[index], log_count);
+            }
+        }
+    }
+    log_counts
+}
+
+/// A part of the optimal paths between two cells that all optimal paths pass through, given by its first and last cell.
+struct Part {
+    start: (usize, usize),
+    end: (usize, usize),
+    /// The indices of the operations with an edge in the part that is on some, but not all, optimal paths.
+    operations: Vec<usize>,
+}
+
+/// The first two moments of the number of times each operation occurs on the part of a uniformly random optimal path.
+///
+/// All optimal paths to the cells of the part pass through its first cell, so the moments are propagated from the
+/// first cell, and the paths to the last cell of the part are all optimal paths.
+fn part_moments(
+    forward: &PathCounts,
+    backward: &[f64],
+    reference: &[u32],
+    predicted: &[u32],
+    operations: &[Operation],
+    part: &Part,
+) -> Vec<(f64, f64)> {
+    let n_operations = part.operations.len();
+    let (first_row, first_col) = part.start;
+    let (last_row, last_col) = part.end;
+    let width = last_col - first_col + 1;
+    // The first and second moment of the operation counts on uniformly random optimal paths to each cell of a row,
+    // with one block of moments per column.
+    let mut previous_row = vec![(0.0, 0.0); width * n_operations];
+    let mut row_moments = vec![(0.0, 0.0); width * n_operations];
+    let mut counts = vec![0.0; n_operations];
+
+    for row in first_row..=last_row {
+        for col in first_col..=last_col {
+            let block = (col - first_col) * n_operations;
+            row_moments[block..block + n_operations].fill((0.0, 0.0));
+            // The moments of the first cell are zero, and cells that are not on an optimal path do not contribute.
+            if (row, col) == part.start
+                || backward[row * forward.n_cols() + col] == f64::NEG_INFINITY
+            {
+                continue;
+            }
+            for op in ops_in(forward.masks.get(row, col)) {
+                let (previous_row_index, previous_col) = predecessor(row, col, op);
+                // Only an edge that is on less than a fraction `1 - CERTAIN` of the paths can skip the first cell.
+                if previous_row_index < first_row || previous_col < first_col {
+                    continue;
+                }
+                let probability = forward.step_probability(row, col, op);
+                let operation = Operation::at(reference, predicted, row, col, op);
+                for (count, &index) in counts.iter_mut().zip(&part.operations) {
+                    *count = f64::from(u8::from(operation == operations[index]));
+                }
+
+                let previous_block = (previous_col - first_col) * n_operations;
+                for (index, &count) in counts.iter().enumerate() {
+                    let (previous_mean, previous_second) = if previous_row_index == row {
+                        row_moments[previous_block + index]
+                    } else {
+                        previous_row[previous_block + index]
+                    };
+                    let (mean, second) = &mut row_moments[block + index];
+                    *mean += probability * (previous_mean + count);
+                    *second +=
+                        probability * (previous_second + 2.0 * count * previous_mean + count);
+                }
+            }
+        }
+        std::mem::swap(&mut previous_row, &mut row_moments);
+    }
+    let block = (last_col - first_col) * n_operations;
+    previous_row[block..block + n_operations].to_vec()
+}
+
+/// Compute the mean and variance of the number of times each alignment operation occurs in a uniformly random optimal
+/// alignment of two token id sequences.
+pub fn operation_moments(reference: &[u32], predicted: &[u32]) -> OperationMoments {
+    let forward = PathCounts::new(reference, predicted);
+    let backward = backward_log_counts(&forward);
+    let (n_cols, log_total) = (forward.n_cols(), forward.log_total());
+
+    let mut moments = OperationMoments {
+        ops: Vec::new(),
+        reference_indices: Vec::new(),
+        predicted_indices: Vec::new(),
+        means: Vec::new(),
+        variances: Vec::new(),
+    };
+    let mut operations = Vec::new();
+    let mut indices = HashMap::new();
+    // The cells that all optimal paths pass through, in the order of the paths, and the last cell and operation index
+    // of the edges that are on some, but not all, optimal paths.
+    let mut meeting_cells = Vec::new();
+    let mut uncertain_edges = Vec::new();
+
+    for row in 0..forward.n_rows() {
+        for col in 0..n_cols {
+            let log_backward = backward[row * n_cols + col];
+            if log_backward == f64::NEG_INFINITY {
+                continue;
+            }
+            if (forward.log_count(row, col) + log_backward - log_total).exp2() >= CERTAIN {
+                meeting_cells.push((row, col));
+            }
+            for op in ops_in(forward.masks.get(row, col)) {
+                let (previous_row, previous_col) = predecessor(row, col, op);
+                let log_forward = forward.log_count(previous_row, previous_col);
+                let probability = (log_forward + log_backward - log_total).exp2();
+
+                let operation = Operation::at(reference, predicted, row, col, op);
+                let index = *indices.entry(operation).or_insert_with(|| {
+                    operations.push(operation);
+                    moments.ops.push(op);
+                    moments.reference_indices.push(previous_row);
+                    moments.predicted_indices.push(previous_col);
+                    moments.means.push(0.0);
+                    operations.len() - 1
+                });
+                moments.means[index] += probability;
+                if probability < CERTAIN {
+                    uncertain_edges.push((row, col, index));
+                }
+            }
+        }
+    }
+
+    // The cells that all paths pass through are on every path, so they are sorted both by row and by column. An edge
+    // belongs to the part that ends at the first of these cells that is below and to the right of its last cell.
+    let mut parts: Vec<Part> = meeting_cells
+        .windows(2)
+        .map(|cells| Part {
+            start: cells[0],
+            end: cells[1],
+            operations: Vec::new(),
+        })
+        .collect();
+    let mut part_operations: Vec<(usize, usize)> = uncertain_edges
+        .into_iter()
+        .map(|(row, col, index)| {
+            let end =
+                meeting_cells.partition_point(|&(end_row, end_col)| end_row < row || end_col < col);
+            (end - 1, index)
+        })
+        .collect();
+    part_operations.sort_unstable();
+    part_operations.dedup();
+    for (part, index) in part_operations {
+        parts[part].operations.push(index);
+    }
+
+    moments.variances = vec![0.0; operations.len()];
+    for part in parts.iter().filter(|part| !part.operations.is_empty()) {
+        let part_moments =
+            part_moments(&forward, &backward, reference, predicted, &operations, part);
+        for (&index, (mean, second)) in part.operations.iter().zip(part_moments) {
+            let variance = second - mean * mean;
+            if variance > ROUNDING_ERROR * second {
+                moments.variances[index] += variance;
+            }
+        }
+    }
+    moments
+}
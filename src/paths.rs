@@ -0,0 +1,99 @@
+//! Count the optimal alignment paths through the cost matrix.
+//!
+//! The optimal predecessors of the cells (see [`dp::optimal_ops`]) form a directed acyclic graph, and every path from
+//! the origin to the last cell in this graph is an optimal alignment. The number of optimal paths grows exponentially
+//! with the sequence lengths, so we store the base two logarithm of the counts instead of the counts themselves.
+
+use crate::dp;
+use std::f64::consts::LOG2_E;
+
+/// Compute `log2(2^a + 2^b)` without overflow.
+#[inline]
+pub fn log2_add(a: f64, b: f64) -> f64 {
+    let (high, low) = if a > b { (a, b) } else { (b, a) };
+    if high == f64::NEG_INFINITY {
+        return high;
+    }
+    high + (low - high).exp2().ln_1p() * LOG2_E
+}
+
+/// The cell we move to when backtracking operation `op` from cell `(row, col)`.
+#[inline]
+pub fn predecessor(row: usize, col: usize, op: u8) -> (usize, usize) {
+    match op {
+        dp::KEPT | dp::REPLACED => (row - 1, col - 1),
+        dp::DELETED => (row - 1, col),
+        _ => (row, col - 1),
+    }
+}
+
+/// The set bits of a predecessor mask, in op code order.
+pub fn ops_in(mask: u8) -> impl Iterator<Item = u8> {
+    (0..4u8).filter(move |op| mask & (1 << op) != 0)
+}
+
+/// The predecessor masks and the logarithm of the number of optimal paths from the origin to each cell.
+pub struct PathCounts {
+    pub masks: dp::PredecessorMasks,
+    log_counts: Vec<f64>,
+    n_cols: usize,
+}
+
+impl PathCounts {
+    pub fn new(reference: &[u32], predicted: &[u32]) -> Self {
+        let masks = dp::PredecessorMasks::new(reference, predicted);
+        let n_cols = predicted.len() + 1;
+        let mut log_counts = vec![0.0; (reference.len() + 1) * n_cols];
+
+        for row in 0..=reference.len() {
+            for col in (0..n_cols).skip(usize::from(row == 0)) {
+                let log_count = ops_in(masks.get(row, col))
+                    .map(|op| {
+                        let (row, col) = predecessor(row, col, op);
+                        log_counts[row * n_cols + col]
+                    })
+                    .reduce(log2_add)
+                    .expect("every cell except the origin has an optimal predecessor");
+                log_counts[row * n_cols + col] = log_count;
+            }
+        }
+
+        Self {
+            masks,
+            log_counts,
+            n_cols,
+        }
+    }
+
+    pub fn n_rows(&self) -> usize {
+        self.log_counts.len() / self.n_cols
+    }
+
+    pub fn n_cols(&self) -> usize {
+        self.n_cols
+    }
+
+    #[inline]
+    pub fn log_count(&self, row: usize, col: usize) -> f64 {
+        self.log_counts[row * self.n_cols + col]
+    }
+
+    /// The logarithm of the number of optimal alignments.
+    pub fn log_total(&self) -> f64 {
+        self.log_counts[self.log_counts.len() - 1]
+    }
+
+    /// Whether there is only one optimal alignment.
+    ///
+    /// The logarithm of a single path is exactly zero, and any sum of path counts has a logarithm of at least one.
+    pub fn is_unique(&self) -> bool {
+        self.log_total() == 0.0
+    }
+
+    /// The probability that a uniformly random optimal path to cell `(row, col)` ends with operation `op`.
+    #[inline]
+    pub fn step_probability(&self, row: usize, col: usize, op: u8) -> f64 {
+        let (previous_row, previous_col) = predecessor(row, col, op);
+        (self.log_count(previous_row, previous_col) - self.log_count(row, col)).exp2()
+    }
+}
@@ -0,0 +1,86 @@
+//! Sample optimal alignments uniformly at random.
+//!
+//! Choosing a random optimal predecessor in each step of the traceback favours alignments that pass through few cells
+//! with several optimal predecessors, so the alignments are not uniformly distributed. Instead, we count the optimal
+//! paths from the origin to each cell (see [`PathCounts`]) and choose predecessor `p` of cell `c` with probability
+//! `count(p) / count(c)`. The probability of an alignment is the product of these ratios along its path, which
+//! telescopes to `1 / count(m, n)`.
+
+use crate::batch::Alignments;
+use crate::dp;
+use crate::paths::{ops_in, predecessor, PathCounts};
+
+/// The SplitMix64 pseudorandom number generator.
+///
+/// It is fast, every 64-bit seed gives a full-period stream, and it passes the BigCrush test suite, which is more than
+/// good enough for sampling alignments.
+pub struct SplitMix64(u64);
+
+impl SplitMix64 {
+    pub fn new(seed: u64) -> Self {
+        Self(seed)
+    }
+
+    pub fn next_u64(&mut self) -> u64 {
+        self.0 = self.0.wrapping_add(0x9E37_79B9_7F4A_7C15);
+        let mut z = self.0;
+        z = (z ^ (z >> 30)).wrapping_mul(0xBF58_476D_1CE4_E5B9);
+        z = (z ^ (z >> 27)).wrapping_mul(0x94D0_49BB_1331_11EB);
+        z ^ (z >> 31)
+    }
+
+    /// A uniformly distributed number in `[0, 1)`.
+    pub fn next_f64(&mut self) -> f64 {
+        (self.next_u64() >> 11) as f64 / (1u64 << 53) as f64
+    }
+}
+
+/// Draw one optimal alignment uniformly at random and return its op codes in alignment order.
+fn sample(path_counts: &PathCounts, rng: &mut SplitMix64) -> Vec<u8> {
+    let mut row = path_counts.n_rows() - 1;
+    let mut col = path_counts.n_cols() - 1;
+    let mut ops = Vec::with_capacity(row + col);
+
+    while row > 0 || col > 0 {
+        let mut threshold = rng.next_f64();
+        // If rounding errors make the probabilities sum to less than the threshold, the last operation is chosen.
+        let mut chosen_op = dp::INSERTED;
+        for op in ops_in(path_counts.masks.get(row, col)) {
+            let probability = path_counts.step_probability(row, col, op);
+            chosen_op = op;
+            if threshold < probability {
+                break;
+            }
+            threshold -= probability;
+        }
+
+        ops.push(chosen_op);
+        (row, col) = predecessor(row, col, chosen_op);
+    }
+
+    ops.reverse();
+    ops
+}
+
+/// Draw `n_samples` optimal alignments uniformly at random with a generator seeded by `seed`.
+pub fn sample_alignments(
+    reference: &[u32],
+    predicted: &[u32],
+    n_samples: usize,
+    seed: u64,
+) -> Alignments {
+    let path_counts = PathCounts::new(reference, predicted);
+    let mut rng = SplitMix64::new(seed);
+
+    let mut alignments = Alignments {
+        ops: Vec::with_capacity(n_samples * (reference.len() + predicted.len())),
+        offsets: Vec::with_capacity(n_samples + 1),
+        unique: vec![path_counts.is_unique(); n_samples],
+    };
+    alignments.offsets.push(0);
+    for _ in 0..n_samples {
+        alignments.ops.extend(sample(&path_counts, &mut rng));
+        alignments.offsets.push(alignments.ops.len());
+    }
+    alignments
+}
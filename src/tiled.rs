@@ -0,0 +1,124 @@
+//! Tiled wavefront sweeps over the cost matrix of one pair with several threads.
+//!
+//! The linear-memory kernels sweep the cost matrix row by row and only keep the last row. To use several threads for
+//! one pair, we split the columns into one strip per thread and the rows into chunks of [`CHUNK_ROWS`] rows, which
+//! gives a grid of tiles. A tile only depends on the tile above it, which the same thread computed before, and on the
+//! last column of the tile to its left, which the thread of the strip to the left sends over a channel. So the threads
+//! process the anti-diagonal fronts of tiles in a pipeline, and after the first few chunks, all threads are busy.
+
+use std::cmp::min;
+use std::sync::mpsc::{self, Receiver, Sender};
+use std::thread;
+
+/// The number of rows of a tile. The threads synchronise once per tile, so this is a trade-off between the
+/// synchronisation cost and the time the pipeline needs to start every thread.
+const CHUNK_ROWS: usize = 256;
+
+/// Strips narrower than this are not worth the synchronisation, so fewer threads are used for narrow matrices.
+const MIN_STRIP_WIDTH: usize = 1024;
+
+/// Sweep the columns `first_col..=first_col + predicted.len()` of the matrix. The columns left of the strip are
+/// received from `left`, and the last column of the strip is sent to `right`.
+#[allow(clippy::too_many_arguments)]
+fn sweep_strip<S, B, F>(
+    reference: &[u32],
+    predicted: &[u32],
+    first_col: usize,
+    boundary: &B,
+    cell: &F,
+    left: Option<Receiver<Vec<S>>>,
+    right: Option<Sender<Vec<S>>>,
+) -> Vec<S>
+where
+    S: Copy,
+    B: Fn(usize) -> S,
+    F: Fn(bool, S, S, S) -> S,
+{
+    let mut row: Vec<S> = (first_col..=first_col + predicted.len())
+        .map(boundary)
+        .collect();
+    for (chunk_index, chunk) in reference.chunks(CHUNK_ROWS).enumerate() {
+        let first_row = chunk_index * CHUNK_ROWS + 1;
+        let left_column = match &left {
+            Some(left) => left
+                .recv()
+                .expect("the thread of the strip to the left stopped"),
+            None => (first_row..first_row + chunk.len()).map(boundary).collect(),
+        };
+
+        let mut right_column = Vec::with_capacity(chunk.len());
+        for (&reference_token, &left_value) in chunk.iter().zip(&left_column) {
+            let mut diagonal = row[0];
+            row[0] = left_value;
+            for (j, &predicted_token) in predicted.iter().enumerate() {
+                let up = row[j + 1];
+                row[j + 1] = cell(reference_token == predicted_token, diagonal, up, row[j]);
+                diagonal = up;
+            }
+            right_column.push(row[predicted.len()]);
+        }
+        if let Some(right) = &right {
+            // The receiver only hangs up if its thread panicked, and then the panic is propagated by the scope.
+            let _ = right.send(right_column);
+        }
+    }
+    row
+}
+
+/// Compute the last row of a matrix with `n_threads` threads, where every cell is computed from the cells above, to
+/// the left and diagonally up and to the left.
+///
+/// `boundary(k)` is the value in row 0 and column `k` and in row `k` and column 0, and `cell(equal, diagonal, up,
+/// left)` computes a cell from its neighbours and whether the reference and predicted tokens of the cell are equal.
+pub fn last_row<S, B, F>(
+    reference: &[u32],
+    predicted: &[u32],
+    boundary: B,
+    cell: F,
+    n_threads: usize,
+) -> Vec<S>
+where
+    S: Copy + Send,
+    B: Fn(usize) -> S + Sync,
+    F: Fn(bool, S, S, S) -> S + Sync,
+{
+    let n_strips = min(n_threads, predicted.len() / MIN_STRIP_WIDTH).max(1);
+    if n_strips == 1 {
+        return sweep_strip(reference, predicted, 0, &boundary, &cell, None, None);
+    }
+
+    let width = predicted.len().div_ceil(n_strips);
+    thread::scope(|scope| {
+        let (boundary, cell) = (&boundary, &cell);
+        let mut left = None;
+        let mut workers = Vec::with_capacity(n_strips);
+        for (strip, strip_predicted) in predicted.chunks(width).enumerate() {
+            let (right, next_left) = if (strip + 1) * width < predicted.len() {
+                let (sender, receiver) = mpsc::channel();
+                (Some(sender), Some(receiver))
+            } else {
+                (None, None)
+            };
+            let left = std::mem::replace(&mut left, next_left);
+            workers.push(scope.spawn(move || {
+                sweep_strip(
+                    reference,
+                    strip_predicted,
+                    strip * width,
+                    boundary,
+                    cell,
+                    left,
+                    right,
+                )
+            }));
+        }
+
+        // Neighbouring strips share a column, which is the first column of the right strip.
+        let mut row = Vec::with_capacity(predicted.len() + 1);
+        for (strip, worker) in workers.into_iter().enumerate() {
+            let strip_row = worker.join().expect("alignment thread panicked");
+            row.extend_from_slice(&strip_row[usize::from(strip > 0)..]);
+        }
+        row
+    })
+}
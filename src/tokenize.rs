@@ -0,0 +1,262 @@
+//! Segmentation of strings into tokens and normalization of every token in one pass.
+//!
+//! The tokenizers apply a `StringNormalizer` to every token, and calling the Python normalizer once per token takes
+//! most of the tokenization time. So the steps of the normalizer are also implemented here. They must give exactly the
+//! same tokens as the Python implementation, which uses the Unicode database of the Python interpreter, while this
+//! crate may use another Unicode version. So we only normalize the tokens whose result does not depend on the Unicode
+//! version, and the other tokens are normalized by the Python normalizer:
+//!
+//! * Unicode normalization is only skipped if the quick check says that the token is normalized. The normalization of
+//!   assigned characters is stable, so a token that is normalized in the Unicode version of this crate is also
+//!   normalized in earlier versions, where the characters that are not assigned yet are normalized as they are.
+//!   Tokens that would change are left to Python.
+//! * Case folding is only done for ASCII letters, and the other characters must not have any case mappings.
+//! * Whitespace is what Python considers whitespace: the Unicode `White_Space` characters and the ASCII information
+//!   separators.
+//! * Word characters are only classified for ASCII tokens.
+//!
+//! Confusables are resolved with the same matcher as in Python (see [`crate::confusables`]).
+
+use crate::confusables::Matcher;
+use std::borrow::Cow;
+use unicode_normalization::{
+    is_nfc_quick, is_nfd_quick, is_nfkc_quick, is_nfkd_quick, IsNormalized,
+};
+use unicode_segmentation::UnicodeSegmentation;
+
+/// How a string is split into tokens.
+#[derive(Clone, Copy, Debug, PartialEq, Eq)]
+pub enum Segmentation {
+    /// Extended grapheme clusters.
+    GraphemeClusters,
+    /// The words of the Unicode word boundary rules, without punctuation and whitespace.
+    UnicodeWords,
+    /// All segments between Unicode word boundaries.
+    WordBoundaries,
+    /// The non-empty segments between whitespace, like `str.split()`.
+    Whitespace,
+}
+
+/// A Unicode normalization form.
+#[derive(Clone, Copy, Debug, PartialEq, Eq)]
+pub enum Form {
+    Nfc,
+    Nfd,
+    Nfkc,
+    Nfkd,
+}
+
+/// The steps of a `StringNormalizer`.
+#[derive(Clone, Copy, Debug, Default)]
+#[allow(clippy::struct_excessive_bools)]
+pub struct Normalizer<'m> {
+    pub confusables: Option<&'m Matcher>,
+    pub normalization: Option<Form>,
+    pub case_insensitive: bool,
+    pub normalize_whitespace: bool,
+    pub remove_whitespace: bool,
+    pub remove_non_word_characters: bool,
+}
+
+/// Whether Python considers the character whitespace, with `str.isspace` and `\s` in regular expressions.
+pub fn is_python_whitespace(c: char) -> bool {
+    c.is_whitespace() || ('\x1c'..='\x1f').contains(&c)
+}
+
+/// Apply a normalization step, which returns `None` if it gives up, to a token that may already have been changed.
+fn and_then<'a>(
+    text: Cow<'a, str>,
+    step: fn(&str) -> Option<Cow<'_, str>>,
+) -> Option<Cow<'a, str>> {
+    match text {
+        Cow::Borrowed(text) => step(text),
+        Cow::Owned(text) => step(&text).map(|changed| Cow::Owned(changed.into_owned())),
+    }
+}
+
+/// Case fold ASCII letters, or return `None` if a non-ASCII character has case mappings.
+fn case_fold(text: &str) -> Option<Cow<'_, str>> {
+    let is_caseless = |c: char| {
+        c.is_ascii()
+            || (c.to_lowercase().eq(std::iter::once(c)) && c.to_uppercase().eq(std::iter::once(c)))
+    };
+    if !text.is_ascii() && !text.chars().all(is_caseless) {
+        return None;
+    }
+    Some(if text.bytes().any(|b| b.is_ascii_uppercase()) {
+        Cow::Owned(text.to_ascii_lowercase())
+    } else {
+        Cow::Borrowed(text)
+    })
+}
+
+/// Replace runs of whitespace with a single space and strip whitespace from the ends.
+fn normalize_whitespace(text: &str) -> Option<Cow<'_, str>> {
+    let mut words = text
+        .split(is_python_whitespace)
+        .filter(|word| !word.is_empty());
+    let Some(first) = words.next() else {
+        return Some(Cow::Borrowed(""));
+    };
+    let mut normalized = String::from(first);
+    for word in words {
+        normalized.push(' ');
+        normalized.push_str(word);
+    }
+    Some(if normalized == text {
+        Cow::Borrowed(text)
+    } else {
+        Cow::Owned(normalized)
+    })
+}
+
+fn remove_whitespace(text: &str) -> Option<Cow<'_, str>> {
+    Some(if text.contains(is_python_whitespace) {
+        Cow::Owned(text.chars().filter(|&c| !is_python_whitespace(c)).collect())
+    } else {
+        Cow::Borrowed(text)
+    })
+}
+
+/// Remove all characters except letters, digits and whitespace, or return `None` for non-ASCII text.
+fn remove_non_word_characters(text: &str) -> Option<Cow<'_, str>> {
+    if !text.is_ascii() {
+        return None;
+    }
+    let is_kept = |c: char| c.is_ascii_alphanumeric() || is_python_whitespace(c);
+    Some(if text.chars().all(is_kept) {
+        Cow::Borrowed(text)
+    } else {
+        Cow::Owned(text.chars().filter(|&c| is_kept(c)).collect())
+    })
+}
+
+impl Normalizer<'_> {
+    /// Whether normalizing the text does not change it.
+    fn is_normalized(&self, text: &str) -> bool {
+        let quick_check = match self.normalization {
+            None => return true,
+            Some(Form::Nfc) => is_nfc_quick(text.chars()),
+            Some(Form::Nfd) => is_nfd_quick(text.chars()),
+            Some(Form::Nfkc) => is_nfkc_quick(text.chars()),
+            Some(Form::Nfkd) => is_nfkd_quick(text.chars()),
+        };
+        quick_check == IsNormalized::Yes
+    }
+
+    /// Normalize the token like `StringNormalizer.__call__`, or return `None` if the result may depend on the Unicode
+    /// version.
+    ///
+    /// The Python normalizer case folds, normalizes and case folds again. Case folding the ASCII letters a second time
+    /// does nothing, so we only do it once.
+    pub fn normalize<'a>(&self, token: &'a str) -> Option<Cow<'a, str>> {
+        let mut text = match self.confusables {
+            Some(confusables) => confusables.resolve(token),
+            None => Cow::Borrowed(token),
+        };
+        if self.case_insensitive {
+            text = and_then(text, case_fold)?;
+        }
+        if !self.is_normalized(&text) {
+            return None;
+        }
+        if self.normalize_whitespace {
+            text = and_then(text, normalize_whitespace)?;
+        }
+        if self.remove_whitespace {
+            text = and_then(text, remove_whitespace)?;
+        }
+        if self.remove_non_word_characters {
+            text = and_then(text, remove_non_word_characters)?;
+        }
+        // Removing characters can put a combining mark next to a character it combines with.
+        if !self.is_normalized(&text) {
+            return None;
+        }
+        Some(text)
+    }
+}
+
+/// The segments of the text, which are slices of the text.
+fn segments(text: &str, segmentation: Segmentation) -> Box<dyn Iterator<Item = &str> + '_> {
+    match segmentation {
+        Segmentation::GraphemeClusters => Box::new(text.graphemes(true)),
+        Segmentation::UnicodeWords => Box::new(text.unicode_words()),
+        Segmentation::WordBoundaries => Box::new(text.split_word_bounds()),
+        Segmentation::Whitespace => Box::new(
+            text.split(is_python_whitespace)
+                .filter(|segment| !segment.is_empty()),
+        ),
+    }
+}
+
+/// The segments of the text with their start and end code point offsets.
+///
+/// The offsets count code points, like the indices of Python strings, not bytes. The segments are in order, so the
+/// code points are counted in one pass over the text.
+fn segments_with_spans(
+    text: &str,
+    segmentation: Segmentation,
+) -> impl Iterator<Item = (&str, (usize, usize))> {
+    // The byte offset and the code point offset of the end of the previous segment.
+    let (mut byte_offset, mut offset) = (0, 0);
+    segments(text, segmentation).map(move |segment| {
+        // The segments are slices of the text, so their byte offsets are the distances between the pointers.
+        let segment_start = segment.as_ptr() as usize - text.as_ptr() as usize;
+        let start = offset + text[byte_offset..segment_start].chars().count();
+        let end = start + segment.chars().count();
+        (byte_offset, offset) = (segment_start + segment.len(), end);
+        (segment, (start, end))
+    })
+}
+
+/// The start and end code point offsets of the segments of the text.
+pub fn segment_spans(text: &str, segmentation: Segmentation) -> Vec<(usize, usize)> {
+    segments_with_spans(text, segmentation)
+        .map(|(_, span)| span)
+        .collect()
+}
+
+/// The start and end code point offsets of the segments of the text that are not only whitespace after normalization.
+///
+/// Returns the spans and the indices of the spans of the segments that could not be normalized. These segments are
+/// kept, and the Python normalizer must decide whether they are only whitespace.
+pub fn non_whitespace_token_spans(
+    text: &str,
+    segmentation: Segmentation,
+    normalizer: &Normalizer<'_>,
+) -> (Vec<(usize, usize)>, Vec<usize>) {
+    let mut spans = Vec::new();
+    let mut fallback_indices = Vec::new();
+    for (segment, span) in segments_with_spans(text, segmentation) {
+        match normalizer.normalize(segment) {
+            Some(token) if token.chars().all(is_python_whitespace) => continue,
+            Some(_) => {}
+            None => fallback_indices.push(spans.len()),
+        }
+        spans.push(span);
+    }
+    (spans, fallback_indices)
+}
+
+/// Split the text into tokens and normalize each token.
+///
+/// Returns the tokens and the indices of the tokens that could not be normalized. These tokens are returned as they
+/// are and must be normalized by the Python normalizer.
+pub fn normalized_tokens<'a>(
+    text: &'a str,
+    segmentation: Segmentation,
+    normalizer: &Normalizer<'_>,
+) -> (Vec<Cow<'a, str>>, Vec<usize>) {
+    let mut tokens = Vec::new();
+    let mut fallback_indices = Vec::new();
+    for segment in segments(text, segmentation) {
+        if let Some(token) = normalizer.normalize(segment) {
+            tokens.push(token);
+        } else {
+            fallback_indices.push(tokens.len());
+            tokens.push(Cow::Borrowed(segment));
+        }
+    }
+    (tokens, fallback_indices)
+}
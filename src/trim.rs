@@ -0,0 +1,80 @@
+//! Trim the common prefix and suffix of two token id sequences before aligning them.
+//!
+//! Many string pairs are identical or differ only in a small region. Since `lev(xa, xb) = lev(a, b)` for any common
+//! prefix `x`, and likewise for a common suffix, there is always an optimal alignment that keeps the common prefix and
+//! suffix, and we only need dynamic programming for the tokens in between.
+//!
+//! We keep one token of the common prefix and suffix in the trimmed sequences. Then, any optimal alignment that does
+//! not keep the common prefix and suffix gives a second optimal alignment of the trimmed sequences. Hence, the
+//! trimmed sequences have a unique optimal alignment if and only if the full sequences do.
+
+use crate::{banded, dp};
+
+/// The lengths of the common prefix and the common suffix, which do not overlap.
+fn common_affix_lengths(reference: &[u32], predicted: &[u32]) -> (usize, usize) {
+    let suffix = reference
+        .iter()
+        .rev()
+        .zip(predicted.iter().rev())
+        .take_while(|(r, p)| r == p)
+        .count();
+    let prefix = reference[..reference.len() - suffix]
+        .iter()
+        .zip(&predicted[..predicted.len() - suffix])
+        .take_while(|(r, p)| r == p)
+        .count();
+    (prefix, suffix)
+}
+
+/// Remove the whole common prefix and suffix of two token id sequences, which does not change their Levenshtein
+/// distance.
+pub fn trimmed<'a>(reference: &'a [u32], predicted: &'a [u32]) -> (&'a [u32], &'a [u32]) {
+    let (prefix, suffix) = common_affix_lengths(reference, predicted);
+    (
+        &reference[prefix..reference.len() - suffix],
+        &predicted[prefix..predicted.len() - suffix],
+    )
+}
+
+/// Align two token id sequences with `align` after trimming their common prefix and suffix.
+///
+/// If the sequences are equal, no alignment kernel is called. The result is the same as for the untrimmed sequences
+/// when `align` backtracks like [`dp::align`], and otherwise an optimal alignment. Returns the op codes in alignment
+/// order and whether the alignment is unique.
+pub fn align<F>(reference: &[u32], predicted: &[u32], align: F) -> (Vec<u8>, bool)
+where
+    F: FnOnce(&[u32], &[u32]) -> (Vec<u8>, bool),
+{
+    if reference == predicted {
+        return (vec![dp::KEPT; reference.len()], true);
+    }
+
+    let (prefix, suffix) = common_affix_lengths(reference, predicted);
+    let (prefix, suffix) = (prefix.saturating_sub(1), suffix.saturating_sub(1));
+    let (m, n) = (reference.len() - suffix, predicted.len() - suffix);
+    let (trimmed_ops, unique) = align(&reference[prefix..m], &predicted[prefix..n]);
+
+    // The traceback agrees with the traceback of the untrimmed sequences until it reaches the first row or column of
+    // the trimmed cost matrix. If it reaches the first row in column `d > 0` instead of the first cell, the untrimmed
+    // traceback continues into the common prefix. The cost there is `d`, so we can backtrack it within a band.
+    let leading = |op| trimmed_ops.iter().take_while(|&&o| o == op).count();
+    let (inserted, deleted) = (leading(dp::INSERTED), leading(dp::DELETED));
+    let (prefix_ops, trimmed_ops) = if prefix > 0 && inserted > 0 {
+        let prefix_reference = &reference[..prefix];
+        let prefix_predicted = &predicted[..prefix + inserted];
+        let ops = banded::align(prefix_reference, prefix_predicted, inserted).0;
+        (ops, &trimmed_ops[inserted..])
+    } else if prefix > 0 && deleted > 0 {
+        let prefix_reference = &reference[..prefix + deleted];
+        let prefix_predicted = &predicted[..prefix];
+        let ops = banded::align(prefix_reference, prefix_predicted, deleted).0;
+        (ops, &trimmed_ops[deleted..])
+    } else {
+        (vec![dp::KEPT; prefix], &trimmed_ops[..])
+    };
+
+    let mut ops = prefix_ops;
+    ops.extend_from_slice(trimmed_ops);
+    ops.resize(ops.len() + suffix, dp::KEPT);
+    (ops, unique)
+}
@@ -0,0 +1,38 @@
+import hypothesis.strategies as st
+import numpy as np
+from hypothesis import given
+from stringalign.align import _create_predecessor_masks, create_cost_matrix
+
+KEPT, REPLACED, DELETED, INSERTED = (1 << op for op in range(4))
+
+
+def expected_mask(row: int, col: int, reference: list[str], predicted: list[str], cost_matrix: np.ndarray) -> int:
+    cost = cost_matrix[row, col]
+    mask = 0
+    if row > 0 and col > 0 and reference[row - 1] == predicted[col - 1]:
+        mask |= KEPT
+    elif row > 0 and col > 0 and cost == cost_matrix[row - 1, col - 1] + 1:
+        mask |= REPLACED
+    if row > 0 and (col == 0 or cost == cost_matrix[row - 1, col] + 1):
+        mask |= DELETED
+    if col > 0 and (row == 0 or cost == cost_matrix[row, col - 1] + 1):
+        mask |= INSERTED
+    return mask
+
+
+@given(reference=st.lists(st.sampled_from("abc"), max_size=20), predicted=st.lists(st.sampled_from("abc"), max_size=20))
+def test_predecessor_masks_match_cost_matrix(reference: list[str], predicted: list[str]) -> None:
+    cost_matrix = create_cost_matrix(reference, predicted)
+    masks = _create_predecessor_masks(reference, predicted)
+
+    for row in range(len(reference) + 1):
+        for col in range(len(predicted) + 1):
+            mask = (int(masks[row, col // 2]) >> (4 * (col % 2))) & 0b1111
+            assert mask == expected_mask(row, col, reference, predicted, cost_matrix)
+
+
+@given(reference=st.lists(st.text(), max_size=20), predicted=st.lists(st.text(), max_size=20))
+def test_predecessor_masks_use_half_a_byte_per_cell(reference: list[str], predicted: list[str]) -> None:
+    masks = _create_predecessor_masks(reference, predicted)
+    assert masks.dtype == np.uint8
+    assert masks.shape == (len(reference) + 1, (len(predicted) + 2) // 2)
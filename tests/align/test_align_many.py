@@ -0,0 +1,79 @@
+import hypothesis.strategies as st
+import numpy as np
+import pytest
+from hypothesis import given
+from stringalign.align import AlignmentBatch, align_many, align_strings
+from stringalign.tokenize import SplitAtWhitespaceTokenizer
+
+
+@given(string_pairs=st.lists(st.tuples(st.text(), st.text())), n_threads=st.integers(min_value=1, max_value=4))
+def test_align_many_matches_align_strings(string_pairs: list[tuple[str, str]], n_threads: int) -> None:
+    references = [reference for reference, _ in string_pairs]
+    predictions = [predicted for _, predicted in string_pairs]
+
+    alignments = align_many(references, predictions, n_threads=n_threads)
+
+    assert isinstance(alignments, AlignmentBatch)
+    assert len(alignments) == len(string_pairs)
+    assert list(alignments) == [align_strings(reference, predicted) for reference, predicted in string_pairs]
+
+
+@pytest.mark.parametrize("engine", ["auto", "needleman-wunsch", "hirschberg", "myers", "anchored"])
+@pytest.mark.parametrize("max_distance", [None, 0, 3])
+def test_align_many_with_engine_and_max_distance(engine, max_distance) -> None:
+    references = ["The quick brown fox", "jumps over", "", "the lazy dog" * 30]
+    predictions = ["The quikc brown fx", "", "jumps", "the lazy dgo" * 30]
+
+    alignments = align_many(references, predictions, engine=engine, max_distance=max_distance, n_threads=2)
+
+    for (alignment, unique), reference, predicted in zip(alignments, references, predictions, strict=True):
+        assert (alignment, unique) == align_strings(reference, predicted, engine=engine, max_distance=max_distance)
+
+
+def test_align_many_with_tokenizer() -> None:
+    tokenizer = SplitAtWhitespaceTokenizer()
+    references = ["a b c", "hello world"]
+    predictions = ["a c", "hello there world"]
+
+    alignments = align_many(references, predictions, tokenizer=tokenizer)
+
+    assert alignments[0] == align_strings(references[0], predictions[0], tokenizer=tokenizer)
+    assert alignments[-1] == align_strings(references[1], predictions[1], tokenizer=tokenizer)
+
+
+def test_align_many_batched_arrays() -> None:
+    alignments = align_many(["ab", "", "abc"], ["b", "", "abd"])
+
+    np.testing.assert_array_equal(alignments.offsets, [0, 2, 2, 5])
+    np.testing.assert_array_equal(alignments.op_codes, [2, 0, 0, 0, 1])
+    np.testing.assert_array_equal(alignments.reference_indices, [0, 1, 0, 1, 2])
+    np.testing.assert_array_equal(alignments.predicted_indices, [0, 0, 0, 1, 2])
+    np.testing.assert_array_equal(alignments.unique, [True, True, True])
+
+
+def test_align_many_empty() -> None:
+    alignments = align_many([], [])
+    assert len(alignments) == 0
+    assert list(alignments) == []
+
+
+def test_align_many_index_out_of_range_raises() -> None:
+    alignments = align_many(["a"], ["b"])
+    with pytest.raises(IndexError):
+        alignments[1]
+
+
+def test_align_many_different_lengths_raises() -> None:
+    with pytest.raises(ValueError):
+        align_many(["a", "b"], ["a"])
+
+
+@pytest.mark.parametrize("n_threads", [0, -1])
+def test_align_many_invalid_n_threads_raises(n_threads: int) -> None:
+    with pytest.raises(ValueError, match="n_threads"):
+        align_many(["a"], ["b"], n_threads=n_threads)
+
+
+def test_align_many_invalid_engine_raises() -> None:
+    with pytest.raises(ValueError, match="Invalid alignment engine"):
+        align_many(["a"], ["b"], engine="not an engine")  # type: ignore[arg-type]
@@ -1,3 +1,4 @@
+import os
 import unicodedata
 from typing import Any
 from unittest.mock import Mock
@@ -15,6 +16,8 @@ from stringalign.align import (
     Replaced,
     align_strings,
     compute_levenshtein_distance_from_alignment,
+    find_all_alignments,
+    levenshtein_distance,
 )
 from stringalign.normalize import StringNormalizer
 from stringalign.tokenize import GraphemeClusterTokenizer
@@ -128,6 +131,54 @@ def test_detect_multiple_alignments(reference, predicted, unique_alignment) -> N
     assert align_strings(reference, predicted)[1] == unique_alignment
 
 
+@pytest.mark.parametrize(
+    "reference, predicted, unique_alignment",
+    [
+        ("a", "a", True),
+        ("a", "b", True),
+        ("aa", "ab", True),
+        ("aa", "a", False),
+        ("aa", "b", False),
+        ("ab", "ba", False),
+    ],
+)
+def test_detect_multiple_alignments_when_randomized(reference, predicted, unique_alignment) -> None:
+    assert align_strings(reference, predicted, randomize_alignment=True)[1] == unique_alignment
+
+
+@given(reference=st.text(), predicted=st.text())
+def test_alignment_is_first_of_all_alignments(reference: str, predicted: str) -> None:
+    """The traceback should prefer kept, then replaced, then deleted and finally inserted tokens."""
+    assert align_strings(reference, predicted)[0] == next(find_all_alignments(reference, predicted))
+
+
+@given(prefix=st.text(), reference=st.text(), predicted=st.text(), suffix=st.text())
+def test_common_prefix_and_suffix(prefix: str, reference: str, predicted: str, suffix: str) -> None:
+    """Trimming the common prefix and suffix should not change the alignment or whether it is unique."""
+    reference, predicted = prefix + reference + suffix, prefix + predicted + suffix
+    alignments = find_all_alignments(reference, predicted)
+    first_alignment = next(alignments)
+    alignment, unique = align_strings(reference, predicted)
+
+    assert alignment == first_alignment
+    assert unique == (next(alignments, None) is None)
+
+
+@pytest.mark.parametrize(
+    "reference, predicted, unique_alignment",
+    [
+        ("hello world", "hello world", True),
+        ("hello world", "hello  world", False),
+        ("hello world", "hello_world", True),
+        ("aaaa", "aaaaa", False),
+    ],
+)
+def test_detect_multiple_alignments_at_common_prefix_and_suffix(
+    reference: str, predicted: str, unique_alignment: bool
+) -> None:
+    assert align_strings(reference, predicted)[1] == unique_alignment
+
+
 @pytest.mark.parametrize(
     "reference, predicted",
     [
@@ -247,10 +298,10 @@ def test_same_levenshtein_if_different_random_state(reference: str, predicted: s
 def test_random_state_is_used_when_its_an_rng(reference: str, predicted: str):
     """If the random state is provided as an RNG, then it is used"""
     mocked = Mock(spec=np.random.Generator)
-    mocked.choice.return_value = Kept("mocked choice return value")
+    mocked.integers.return_value = np.uint64(0)
 
     align_strings(reference, predicted, randomize_alignment=True, random_state=mocked)
-    mocked.choice.assert_called()
+    mocked.integers.assert_called()
 
 
 @pytest.mark.parametrize("invalid_random_state", ["not a valid rng", np.inf, []])
@@ -263,3 +314,260 @@ def test_invalid_random_state_raises(invalid_random_state: Any) -> None:
             randomize_alignment=True,
             random_state=invalid_random_state,
         )
+
+
+@given(reference=st.text(), predicted=st.text())
+def test_hirschberg_engine_is_optimal(reference: str, predicted: str) -> None:
+    alignment, unique = align_strings(reference, predicted, engine="needleman-wunsch")
+    hirschberg_alignment, hirschberg_unique = align_strings(reference, predicted, engine="hirschberg")
+
+    assert compute_levenshtein_distance_from_alignment(hirschberg_alignment) == (
+        compute_levenshtein_distance_from_alignment(alignment)
+    )
+    assert hirschberg_unique == unique
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_hirschberg_engine_is_optimal_for_long_strings(seed: int) -> None:
+    rng = np.random.default_rng(seed)
+    reference = "".join(rng.choice(list("abcd "), size=600))
+    predicted = "".join(c for c in reference if rng.random() > 0.1) + "".join(rng.choice(list("abcde"), size=20))
+
+    alignment, unique = align_strings(reference, predicted, engine="needleman-wunsch")
+    hirschberg_alignment, hirschberg_unique = align_strings(reference, predicted, engine="hirschberg")
+
+    assert "".join(op.generalize().reference for op in hirschberg_alignment) == reference
+    assert "".join(op.generalize().predicted for op in hirschberg_alignment) == predicted
+    assert compute_levenshtein_distance_from_alignment(hirschberg_alignment) == (
+        compute_levenshtein_distance_from_alignment(alignment)
+    )
+    assert hirschberg_unique == unique
+
+
+@pytest.mark.parametrize("length", [127, 128, 200, 1000])
+def test_needleman_wunsch_engine_is_optimal_for_long_strings(length: int) -> None:
+    """The predecessor masks of long strings are computed with the wavefront kernel."""
+    rng = np.random.default_rng(length)
+    reference = "".join(rng.choice(list("abcd "), size=length))
+    predicted = "".join(c if rng.random() > 0.2 else rng.choice(list("abcde")) for c in reference if rng.random() > 0.1)
+
+    alignment, _unique = align_strings(reference, predicted, engine="needleman-wunsch")
+
+    assert "".join(op.generalize().reference for op in alignment) == reference
+    assert "".join(op.generalize().predicted for op in alignment) == predicted
+    assert compute_levenshtein_distance_from_alignment(alignment) == levenshtein_distance(reference, predicted)
+
+
+def test_hirschberg_engine_gives_same_alignment_with_several_threads(monkeypatch: pytest.MonkeyPatch) -> None:
+    rng = np.random.default_rng(0)
+    reference = "".join(rng.choice(list("abcd "), size=4500))
+    predicted = "".join(c for c in reference if rng.random() > 0.05)
+
+    monkeypatch.setattr(os, "cpu_count", lambda: 1)
+    alignment = align_strings(reference, predicted, engine="hirschberg")
+    monkeypatch.setattr(os, "cpu_count", lambda: 4)
+    assert align_strings(reference, predicted, engine="hirschberg") == alignment
+
+
+def test_auto_engine_uses_hirschberg_for_large_inputs(monkeypatch: pytest.MonkeyPatch) -> None:
+    import stringalign.align
+
+    hirschberg_alignment = Mock(wraps=stringalign.align._hirschberg_alignment)
+    monkeypatch.setattr(stringalign.align, "_hirschberg_alignment", hirschberg_alignment)
+
+    align_strings("abc", "abd")
+    hirschberg_alignment.assert_not_called()
+
+    monkeypatch.setattr(stringalign.align, "_HIRSCHBERG_MIN_CELLS", 0)
+    assert align_strings("abc", "abd") == align_strings("abc", "abd", engine="needleman-wunsch")
+    hirschberg_alignment.assert_called_once()
+
+    align_strings("abc", "abd", randomize_alignment=True)
+    hirschberg_alignment.assert_called_once()
+
+
+@given(reference=st.text(alphabet="abcd", max_size=100), predicted=st.text(alphabet="abcd", max_size=100))
+def test_myers_engine_gives_same_alignment(reference: str, predicted: str) -> None:
+    """The Myers engine should give the same alignment, also when it falls back to the full cost matrix."""
+    alignment = align_strings(reference, predicted, engine="needleman-wunsch")
+    assert align_strings(reference, predicted, engine="myers") == alignment
+
+
+@pytest.mark.parametrize("n_edits", [0, 1, 10, 100, 1000])
+def test_myers_engine_gives_same_alignment_for_long_strings(n_edits: int) -> None:
+    rng = np.random.default_rng(n_edits)
+    reference = "".join(rng.choice(list("abcdefgh "), size=5000))
+    predicted_characters = list(reference)
+    for position in rng.integers(len(predicted_characters), size=n_edits):
+        predicted_characters[position] = "x"
+    predicted = "".join(predicted_characters)
+
+    alignment = align_strings(reference, predicted, engine="needleman-wunsch")
+    assert align_strings(reference, predicted, engine="myers") == alignment
+
+
+def test_myers_engine_falls_back_to_hirschberg_for_large_inputs(monkeypatch: pytest.MonkeyPatch) -> None:
+    import stringalign.align
+
+    myers_alignment = Mock(wraps=stringalign.align._myers_alignment)
+    monkeypatch.setattr(stringalign.align, "_myers_alignment", myers_alignment)
+    monkeypatch.setattr(stringalign.align, "_HIRSCHBERG_MIN_CELLS", 0)
+    reference, predicted = "abcd" * 10, "dcba" * 10
+    alignment = align_strings(reference, predicted, engine="hirschberg")
+    assert align_strings(reference, predicted, engine="myers") == alignment
+    myers_alignment.assert_called_once()
+    assert myers_alignment.call_args.args[2]
+
+
+def test_myers_engine_uses_myers_alignment(monkeypatch: pytest.MonkeyPatch) -> None:
+    import stringalign.align
+
+    myers_alignment = Mock(wraps=stringalign.align._myers_alignment)
+    needleman_wunsch_alignment = Mock(wraps=stringalign.align._needleman_wunsch_alignment)
+    monkeypatch.setattr(stringalign.align, "_myers_alignment", myers_alignment)
+    monkeypatch.setattr(stringalign.align, "_needleman_wunsch_alignment", needleman_wunsch_alignment)
+
+    align_strings("abcdefgh", "abcxefgh", engine="myers")
+    myers_alignment.assert_called_once()
+    assert not myers_alignment.call_args.args[2]
+    needleman_wunsch_alignment.assert_not_called()
+
+
+@given(reference=st.text(alphabet="abcd", max_size=200), predicted=st.text(alphabet="abcd", max_size=200))
+def test_anchored_engine_gives_valid_alignment(reference: str, predicted: str) -> None:
+    alignment, _unique = align_strings(reference, predicted, engine="anchored")
+
+    assert "".join(op.generalize().reference for op in alignment) == reference
+    assert "".join(op.generalize().predicted for op in alignment) == predicted
+    assert compute_levenshtein_distance_from_alignment(alignment) >= levenshtein_distance(reference, predicted)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_anchored_engine_is_optimal_for_similar_long_strings(seed: int) -> None:
+    """Lines that are merged or split should not stop the anchored engine from finding an optimal alignment."""
+    rng = np.random.default_rng(seed)
+    lines = ["".join(rng.choice(list("abcdefghijklmnopqrstuvwxyz "), size=60)) for _ in range(100)]
+    reference = "\n".join(lines)
+    predicted = "".join(line + ("" if rng.random() < 0.1 else "\n") for line in lines[:-1]) + lines[-1].replace(
+        "a", "4"
+    )
+
+    alignment, _unique = align_strings(reference, predicted, engine="anchored")
+
+    assert compute_levenshtein_distance_from_alignment(alignment) == levenshtein_distance(reference, predicted)
+
+
+def test_anchored_engine_with_randomize_alignment_raises() -> None:
+    with pytest.raises(ValueError, match="randomized"):
+        align_strings("abc", "abd", engine="anchored", randomize_alignment=True)
+
+
+def test_invalid_engine_raises() -> None:
+    with pytest.raises(ValueError, match="Invalid alignment engine"):
+        align_strings("abc", "abd", engine="not an engine")  # type: ignore[arg-type]
+
+
+def test_hirschberg_engine_with_randomize_alignment_raises() -> None:
+    with pytest.raises(ValueError, match="randomized"):
+        align_strings("abc", "abd", engine="hirschberg", randomize_alignment=True)
+
+
+def test_invalid_arguments_do_not_use_random_state() -> None:
+    """The random state is only advanced after the arguments are checked."""
+    random_state = np.random.default_rng(0)
+    with pytest.raises(ValueError, match="randomized"):
+        align_strings("abc", "abd", engine="hirschberg", randomize_alignment=True, random_state=random_state)
+    assert random_state.integers(2**32) == np.random.default_rng(0).integers(2**32)
+
+
+@given(
+    reference=st.text(alphabet="abcd", max_size=100),
+    predicted=st.text(alphabet="abcd", max_size=100),
+    max_distance=st.integers(min_value=0, max_value=200),
+)
+def test_max_distance_gives_same_alignment(reference: str, predicted: str, max_distance: int) -> None:
+    alignment = align_strings(reference, predicted)
+    assert align_strings(reference, predicted, max_distance=max_distance) == alignment
+
+
+@pytest.mark.parametrize("max_distance", [0, 1, 10, 100])
+def test_max_distance_gives_same_alignment_for_long_strings(max_distance: int) -> None:
+    reference = "The quick brown fox jumps over the lazy dog. " * 20
+    predicted = reference.replace("o", "0", 15).replace("lazy ", "", 1)
+
+    alignment = align_strings(reference, predicted)
+    assert align_strings(reference, predicted, max_distance=max_distance) == alignment
+
+
+def test_negative_max_distance_raises() -> None:
+    with pytest.raises(ValueError, match="max_distance"):
+        align_strings("abc", "abd", max_distance=-1)
+
+
+@given(
+    reference=st.lists(st.sampled_from(["ab", "c", "de", "f"]), max_size=30),
+    predicted=st.lists(st.sampled_from(["ab", "c", "de", "f"]), max_size=30),
+)
+def test_token_sequences_give_same_alignment_as_strings(reference: list[str], predicted: list[str]) -> None:
+    tokenizer = Mock(side_effect=str.split)
+
+    expected = align_strings(" ".join(reference), " ".join(predicted), tokenizer=tokenizer)
+    assert align_strings(reference, predicted) == expected
+    assert align_strings(tuple(reference), tuple(predicted)) == expected
+
+
+@pytest.mark.parametrize("dtype", [np.uint32, np.int64, np.uint8, np.int32])
+@pytest.mark.parametrize("engine", ["needleman-wunsch", "hirschberg", "myers", "anchored"])
+def test_token_id_arrays_give_same_alignment_as_decimal_strings(dtype: type, engine: Any) -> None:
+    rng = np.random.default_rng(0)
+    reference: np.ndarray = rng.integers(0, 20, size=200).astype(dtype)
+    predicted: np.ndarray = np.concatenate([reference[:50], rng.integers(0, 20, size=30), reference[80:]]).astype(dtype)
+
+    expected = align_strings([str(t) for t in reference.tolist()], [str(t) for t in predicted.tolist()], engine=engine)
+    assert align_strings(reference, predicted, engine=engine) == expected
+
+
+def test_token_id_arrays_outside_uint32_range_give_same_alignment() -> None:
+    reference = np.array([-1, 2**40, 3, 2**40], dtype=np.int64)
+    predicted = np.array([2**40, 3, -1, -5], dtype=np.int64)
+
+    alignment, unique = align_strings(reference, predicted)
+    expected = align_strings([str(t) for t in reference.tolist()], [str(t) for t in predicted.tolist()])
+    assert (alignment, unique) == expected
+    assert Kept(str(2**40)) in alignment
+
+
+def test_uint64_and_signed_token_id_arrays_give_same_alignment() -> None:
+    """The arrays have no common integer type, so the ids must not be compared as floats."""
+    reference = np.array([2**63, 2**62, 3], dtype=np.uint64)
+    predicted = np.array([-1, 2**62 + 1, 3], dtype=np.int64)
+
+    alignment, unique = align_strings(reference, predicted)
+    expected = align_strings([str(t) for t in reference.tolist()], [str(t) for t in predicted.tolist()])
+    assert (alignment, unique) == expected
+    assert Replaced(str(2**62), str(2**62 + 1)) in alignment
+
+
+def test_non_contiguous_token_id_arrays_are_aligned() -> None:
+    reference = np.arange(20, dtype=np.uint32)[::2]
+    predicted = np.arange(20, dtype=np.uint32)[::3]
+
+    expected = align_strings([str(t) for t in reference.tolist()], [str(t) for t in predicted.tolist()])
+    assert align_strings(reference, predicted) == expected
+
+
+def test_token_id_array_with_string_raises() -> None:
+    with pytest.raises(TypeError, match="token id arrays"):
+        align_strings(np.array([1, 2, 3]), "abc")
+
+
+@pytest.mark.parametrize(
+    "reference, predicted",
+    [
+        (np.array([[1, 2], [3, 4]]), np.array([1, 2])),
+        (np.array([1.0, 2.0]), np.array([1.0])),
+    ],
+)
+def test_invalid_token_id_arrays_raise(reference: np.ndarray, predicted: np.ndarray) -> None:
+    with pytest.raises(ValueError, match="one dimensional integer arrays"):
+        align_strings(reference, predicted)
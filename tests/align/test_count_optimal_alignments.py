@@ -0,0 +1,41 @@
+import hypothesis.strategies as st
+import pytest
+from hypothesis import given
+from stringalign.align import align_strings, count_optimal_alignments, find_all_alignments
+from stringalign.tokenize import UnicodeWordTokenizer
+
+
+@given(reference=st.text(max_size=8), predicted=st.text(max_size=8))
+def test_count_equals_number_of_alignments(reference: str, predicted: str) -> None:
+    assert count_optimal_alignments(reference, predicted) == len(list(find_all_alignments(reference, predicted)))
+
+
+@given(reference=st.text(), predicted=st.text())
+def test_count_is_one_if_unique(reference: str, predicted: str) -> None:
+    _alignment, unique = align_strings(reference, predicted)
+    assert (count_optimal_alignments(reference, predicted) == 1) == unique
+
+
+@pytest.mark.parametrize(
+    "reference, predicted, count",
+    [
+        ("", "", 1),
+        ("hello", "hello", 1),
+        ("hello", "helo", 2),
+        ("aaaa", "aaa", 4),
+        ("ab", "ba", 3),
+    ],
+)
+def test_count_examples(reference: str, predicted: str, count: int) -> None:
+    assert count_optimal_alignments(reference, predicted) == count
+
+
+def test_count_uses_tokenizer() -> None:
+    tokenizer = UnicodeWordTokenizer()
+    assert count_optimal_alignments("hello hello world", "hello world", tokenizer=tokenizer) == 2
+    assert count_optimal_alignments("hello hello world", "hello world") == 10
+
+
+def test_count_saturates() -> None:
+    # There are 200 choose 100 > 2**64 ways to delete 100 of the reference tokens
+    assert count_optimal_alignments("a" * 200, "a" * 100) == 2**64 - 1
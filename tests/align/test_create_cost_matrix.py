@@ -1,7 +1,10 @@
 import hypothesis.strategies as st
 import numpy as np
+import numpy.typing as npt
+import pytest
 from hypothesis import given
-from stringalign.align import create_cost_matrix
+from stringalign._stringutils import create_cost_matrix as _create_cost_matrix
+from stringalign.align import create_cost_matrix, intern_tokens, levenshtein_distance
 
 
 @given(reference=st.text(), predicted=st.text())
@@ -32,3 +35,43 @@ def test_cost_matrix_values(reference: str, predicted: str) -> None:
 def test_cost_matrix_identical_strings(text: str) -> None:
     cost_matrix = create_cost_matrix(list(text), list(text))
     assert np.array_equal(np.diag(cost_matrix), np.zeros(len(text) + 1))
+
+
+def test_cost_matrix_default_dtype_is_narrow() -> None:
+    cost_matrix = create_cost_matrix(list("kitten"), list("sitting"))
+    assert cost_matrix.dtype == np.uint16
+
+
+@pytest.mark.parametrize("dtype", ["uint16", "uint32", "uint64", np.uint32, np.dtype(np.uint64)])
+@given(reference=st.text(), predicted=st.text())
+def test_cost_matrix_dtype(reference: str, predicted: str, dtype: npt.DTypeLike) -> None:
+    cost_matrix = create_cost_matrix(list(reference), list(predicted), dtype=dtype)
+    assert cost_matrix.dtype == np.dtype(dtype)
+    assert np.array_equal(cost_matrix, create_cost_matrix(list(reference), list(predicted)))
+
+
+@pytest.mark.parametrize("dtype", ["int64", "uint8", np.float64])
+def test_cost_matrix_invalid_dtype(dtype: npt.DTypeLike) -> None:
+    with pytest.raises(ValueError):
+        create_cost_matrix(list("kitten"), list("sitting"), dtype=dtype)
+
+
+@pytest.mark.parametrize("dtype", ["uint16", "uint32", "uint64"])
+@given(
+    reference=st.text(alphabet="abcd", max_size=300),
+    predicted=st.text(alphabet="abcd", max_size=300),
+)
+def test_cost_matrix_wavefront_kernel_matches_row_major_kernel(reference: str, predicted: str, dtype: str) -> None:
+    reference_ids, predicted_ids = intern_tokens(reference, predicted)
+    row_major = _create_cost_matrix(reference_ids, predicted_ids, dtype, wavefront=False)
+    wavefront = _create_cost_matrix(reference_ids, predicted_ids, dtype, wavefront=True)
+    assert np.array_equal(wavefront, row_major)
+
+
+@given(
+    reference=st.text(alphabet="abcd", min_size=200, max_size=400),
+    predicted=st.text(alphabet="abcd", min_size=200, max_size=400),
+)
+def test_cost_matrix_long_strings(reference: str, predicted: str) -> None:
+    cost_matrix = create_cost_matrix(list(reference), list(predicted))
+    assert cost_matrix[-1, -1] == levenshtein_distance(reference, predicted)
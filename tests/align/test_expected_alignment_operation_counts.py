@@ -0,0 +1,91 @@
+from collections import Counter
+
+import hypothesis.strategies as st
+import numpy as np
+import pytest
+from hypothesis import given
+from stringalign.align import (
+    Deleted,
+    Inserted,
+    Kept,
+    Replaced,
+    align_strings,
+    expected_alignment_operation_counts,
+    find_all_alignments,
+)
+from stringalign.tokenize import UnicodeWordTokenizer
+
+
+@given(reference=st.text(alphabet="abc", max_size=7), predicted=st.text(alphabet="abc", max_size=7))
+def test_moments_match_all_alignments(reference: str, predicted: str) -> None:
+    alignment_counts = [Counter(alignment) for alignment in find_all_alignments(reference, predicted)]
+    operations = set().union(*alignment_counts)
+
+    expected_counts, variances = expected_alignment_operation_counts(reference, predicted)
+
+    assert set(expected_counts) == operations
+    assert set(variances) == operations
+    for operation in operations:
+        counts = [alignment_count[operation] for alignment_count in alignment_counts]
+        assert expected_counts[operation] == pytest.approx(np.mean(counts))
+        assert variances[operation] == pytest.approx(np.var(counts), abs=1e-9)
+
+
+@pytest.mark.parametrize("n_regions", [1, 2, 4])
+def test_moments_match_all_alignments_with_several_ambiguous_regions(n_regions: int) -> None:
+    """The variances of operations that occur in several independent ambiguous regions are added up correctly."""
+    reference = "xyz".join(["ab"] * n_regions + ["aab"])
+    predicted = "xyz".join(["ba"] * n_regions + ["abb"])
+    alignment_counts = [Counter(alignment) for alignment in find_all_alignments(reference, predicted)]
+
+    expected_counts, variances = expected_alignment_operation_counts(reference, predicted)
+
+    for operation in set().union(*alignment_counts):
+        counts = [alignment_count[operation] for alignment_count in alignment_counts]
+        assert expected_counts[operation] == pytest.approx(np.mean(counts))
+        assert variances[operation] == pytest.approx(np.var(counts), abs=1e-9)
+
+
+@given(reference=st.text(), predicted=st.text())
+def test_expected_counts_add_up_to_number_of_tokens(reference: str, predicted: str) -> None:
+    alignment, unique = align_strings(reference, predicted)
+    expected_counts, variances = expected_alignment_operation_counts(reference, predicted)
+
+    n_reference = sum(n for op, n in expected_counts.items() if not isinstance(op, Inserted))
+    n_predicted = sum(n for op, n in expected_counts.items() if not isinstance(op, Deleted))
+    assert n_reference == pytest.approx(len(alignment) - sum(isinstance(op, Inserted) for op in alignment))
+    assert n_predicted == pytest.approx(len(alignment) - sum(isinstance(op, Deleted) for op in alignment))
+    if unique:
+        assert expected_counts == Counter(alignment)
+        assert all(variance == 0 for variance in variances.values())
+
+
+@pytest.mark.parametrize(
+    "reference, predicted, operation, expected_count, variance",
+    [
+        ("hello", "helo", Deleted("l"), 1, 0),
+        ("ab", "ba", Replaced("a", "b"), 1 / 3, 2 / 9),
+        ("ab", "ba", Kept("a"), 1 / 3, 2 / 9),
+        ("aab", "bba", Replaced("a", "b"), 6 / 5, 4 / 25),
+    ],
+)
+def test_expected_counts_examples(
+    reference: str, predicted: str, operation, expected_count: float, variance: float
+) -> None:
+    expected_counts, variances = expected_alignment_operation_counts(reference, predicted)
+    assert expected_counts[operation] == pytest.approx(expected_count)
+    assert variances[operation] == pytest.approx(variance)
+
+
+def test_expected_counts_uses_tokenizer() -> None:
+    expected_counts, variances = expected_alignment_operation_counts(
+        "hello hello world", "hello world", tokenizer=UnicodeWordTokenizer()
+    )
+    assert expected_counts == {Kept("hello"): 1, Deleted("hello"): 1, Kept("world"): 1}
+    assert variances == {Kept("hello"): 0, Deleted("hello"): 0, Kept("world"): 0}
+
+
+def test_long_strings_do_not_overflow() -> None:
+    expected_counts, variances = expected_alignment_operation_counts("a" * 2000, "a" * 1000)
+    assert expected_counts == pytest.approx({Kept("a"): 1000, Deleted("a"): 1000})
+    assert variances == pytest.approx({Kept("a"): 0, Deleted("a"): 0})
@@ -64,3 +64,41 @@ def test_best_is_among_all(reference: str, predicted: str) -> None:
     all_alignments = find_all_alignments(reference, predicted)
     best_alignment = align_strings(reference, predicted)[0]
     assert best_alignment in set(all_alignments)
+
+
+@settings(deadline=timedelta(milliseconds=500))
+@given(
+    reference=st.text(alphabet="abc", max_size=7),
+    predicted=st.text(alphabet="abc", max_size=7),
+    skip=st.integers(min_value=0, max_value=20),
+    limit=st.none() | st.integers(min_value=0, max_value=20),
+)
+def test_skip_and_limit_slice_all_alignments(reference: str, predicted: str, skip: int, limit: int | None) -> None:
+    all_alignments = tuple(find_all_alignments(reference, predicted))
+    stop = None if limit is None else skip + limit
+
+    alignments = tuple(find_all_alignments(reference, predicted, skip=skip, limit=limit))
+
+    assert alignments == all_alignments[skip:stop]
+
+
+def test_is_lazy() -> None:
+    """The first alignments should be available without generating all of the astronomically many alignments."""
+    alignments = find_all_alignments("a" * 500, "b" * 250)
+
+    first_alignments = [next(alignments) for _ in range(10)]
+
+    assert len(set(first_alignments)) == 10
+    assert first_alignments[0] == align_strings("a" * 500, "b" * 250)[0]
+
+
+def test_skip_far_ahead() -> None:
+    alignment = next(find_all_alignments("a" * 500, "b" * 250, skip=10**30))
+    assert compute_levenshtein_distance_from_alignment(alignment) == 500
+
+
+@pytest.mark.parametrize("skip, limit", [(-1, None), (0, -1)])
+def test_negative_skip_or_limit(skip: int, limit: int | None) -> None:
+    """The arguments are checked when the function is called, before any alignment is generated."""
+    with pytest.raises(ValueError):
+        find_all_alignments("ab", "ba", skip=skip, limit=limit)
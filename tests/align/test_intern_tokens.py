@@ -0,0 +1,36 @@
+import hypothesis.strategies as st
+import numpy as np
+from hypothesis import given
+from stringalign.align import intern_tokens
+
+
+@given(reference=st.lists(st.text()), predicted=st.lists(st.text()))
+def test_intern_tokens_preserves_equality(reference: list[str], predicted: list[str]) -> None:
+    reference_ids, predicted_ids = intern_tokens(reference, predicted)
+    tokens = reference + predicted
+    ids = np.concatenate([reference_ids, predicted_ids])
+
+    assert len(ids) == len(tokens)
+    for i, token_i in enumerate(tokens):
+        for j, token_j in enumerate(tokens):
+            assert (ids[i] == ids[j]) == (token_i == token_j)
+
+
+@given(reference=st.lists(st.text()), predicted=st.lists(st.text()))
+def test_intern_tokens_ids_are_dense(reference: list[str], predicted: list[str]) -> None:
+    reference_ids, predicted_ids = intern_tokens(reference, predicted)
+    assert reference_ids.dtype == np.uint32
+    assert predicted_ids.dtype == np.uint32
+    assert set(reference_ids) | set(predicted_ids) == set(range(len(set(reference) | set(predicted))))
+
+
+def test_intern_tokens_shared_vocabulary() -> None:
+    vocabulary: dict[str, int] = {}
+    first_reference_ids, first_predicted_ids = intern_tokens(["a", "b"], ["b", "c"], vocabulary=vocabulary)
+    second_reference_ids, second_predicted_ids = intern_tokens(["c", "d"], ["a"], vocabulary=vocabulary)
+
+    assert vocabulary == {"a": 0, "b": 1, "c": 2, "d": 3}
+    assert first_reference_ids.tolist() == [0, 1]
+    assert first_predicted_ids.tolist() == [1, 2]
+    assert second_reference_ids.tolist() == [2, 3]
+    assert second_predicted_ids.tolist() == [0]
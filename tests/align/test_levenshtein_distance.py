@@ -1,8 +1,12 @@
+from unittest.mock import Mock
+
 import hypothesis.strategies as st
 import Levenshtein
+import numpy as np
 import pytest
+import stringalign.align
 from hypothesis import given
-from stringalign.align import levenshtein_distance
+from stringalign.align import align_strings, compute_levenshtein_distance_from_alignment, levenshtein_distance
 
 from tests.utils import caseswap_n_randomly, interleave_strings, remove_n_characters
 
@@ -97,3 +101,96 @@ def string_pair_with_known_levenshtein_distance(draw: st.DrawFn) -> tuple[str, s
 def test_levenshtein_distance_with_known_distance(string_pair: tuple[str, str, int]) -> None:
     string1, string2, expected_distance = string_pair
     assert levenshtein_distance(string1, string2) == expected_distance
+
+
+@given(string1=st.text(min_size=50, max_size=300), string2=st.text(min_size=50, max_size=300))
+def test_levenshtein_distance_long_strings_matches_alignment(string1: str, string2: str) -> None:
+    """Strings longer than 64 tokens need several words in the bit-parallel kernel."""
+    expected_distance = compute_levenshtein_distance_from_alignment(align_strings(string1, string2)[0])
+    assert levenshtein_distance(string1, string2) == expected_distance
+
+
+@pytest.mark.parametrize("length", [63, 64, 65, 127, 128, 129])
+def test_levenshtein_distance_at_word_boundaries(length: int) -> None:
+    reference = "ab" * length
+    predicted = reference[:length] + "c" + reference[length + 1 :]
+    assert levenshtein_distance(reference, predicted) == 1
+    assert levenshtein_distance(reference[:length], reference) == length
+
+
+@given(
+    string1=st.text(alphabet="abc", max_size=300),
+    string2=st.text(alphabet="abc", max_size=300),
+    max_distance=st.integers(min_value=0, max_value=400),
+)
+def test_levenshtein_distance_with_max_distance(string1: str, string2: str, max_distance: int) -> None:
+    distance = levenshtein_distance(string1, string2)
+    expected = distance if distance <= max_distance else None
+    assert levenshtein_distance(string1, string2, max_distance=max_distance) == expected
+
+
+@pytest.mark.parametrize("max_distance", [0, 1, 5, 9, 10, 11, 100])
+def test_levenshtein_distance_with_max_distance_long_strings(max_distance: int) -> None:
+    reference = "abcdefghij" * 100
+    predicted = reference.replace("e", "E", 10)
+    expected = 10 if max_distance >= 10 else None
+    assert levenshtein_distance(reference, predicted, max_distance=max_distance) == expected
+
+
+def test_levenshtein_distance_with_negative_max_distance_raises() -> None:
+    with pytest.raises(ValueError, match="max_distance"):
+        levenshtein_distance("abc", "abd", max_distance=-1)
+
+
+@given(
+    string1=st.text(alphabet="abc", max_size=300),
+    string2=st.text(alphabet="abc", max_size=300),
+    max_distance=st.none() | st.integers(min_value=0, max_value=400),
+)
+def test_levenshtein_distance_with_myers_engine(string1: str, string2: str, max_distance: int | None) -> None:
+    """The Myers engine should give the same distance, also when it falls back to the other kernels."""
+    distance = levenshtein_distance(string1, string2, max_distance=max_distance)
+    assert levenshtein_distance(string1, string2, max_distance=max_distance, engine="myers") == distance
+
+
+@pytest.mark.parametrize("max_distance", [None, 0, 9, 10, 11, 100])
+def test_levenshtein_distance_with_myers_engine_long_strings(max_distance: int | None) -> None:
+    reference = "abcdefghij" * 1000
+    predicted = reference.replace("e", "E", 10)
+    expected = 10 if max_distance is None or max_distance >= 10 else None
+    assert levenshtein_distance(reference, predicted, max_distance=max_distance, engine="myers") == expected
+
+
+def test_levenshtein_distance_with_invalid_engine_raises() -> None:
+    with pytest.raises(ValueError, match="Invalid distance engine"):
+        levenshtein_distance("abc", "abd", engine="not an engine")  # type: ignore[call-overload]
+
+
+@given(
+    reference=st.lists(st.integers(min_value=-3, max_value=3), max_size=50),
+    predicted=st.lists(st.integers(min_value=-3, max_value=3), max_size=50),
+)
+def test_levenshtein_distance_with_token_sequences_and_arrays(reference: list[int], predicted: list[int]) -> None:
+    reference_tokens, predicted_tokens = [str(t) for t in reference], [str(t) for t in predicted]
+    expected = Levenshtein.distance(reference_tokens, predicted_tokens)
+
+    assert levenshtein_distance(reference_tokens, predicted_tokens) == expected
+    assert levenshtein_distance(np.array(reference, dtype=np.int64), np.array(predicted, dtype=np.int64)) == expected
+    assert levenshtein_distance(np.array(reference, dtype=np.int8), np.array(predicted, dtype=np.int8)) == expected
+
+
+def test_levenshtein_distance_with_token_id_arrays_does_not_create_tokens(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(stringalign.align, "_tokenize_and_intern", Mock(side_effect=AssertionError))
+    reference = np.array([1, 2, 3, 4], dtype=np.int64)
+    predicted = np.array([1, 3, 3], dtype=np.int64)
+
+    assert levenshtein_distance(reference, predicted) == 2
+
+
+def test_levenshtein_distance_with_uint64_and_signed_token_id_arrays() -> None:
+    """The arrays have no common integer type, so the ids must not be compared as floats."""
+    reference = np.array([2**63, 2**62], dtype=np.uint64)
+    predicted = np.array([-1, 2**62 + 1], dtype=np.int64)
+
+    assert levenshtein_distance(reference, predicted) == 2
+    assert levenshtein_distance(reference, np.array([-1, 2**62], dtype=np.int64)) == 1
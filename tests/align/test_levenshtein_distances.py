@@ -0,0 +1,47 @@
+import hypothesis.strategies as st
+import pytest
+from hypothesis import given
+from stringalign.align import DistanceEngine, levenshtein_distance, levenshtein_distances
+from stringalign.tokenize import SplitAtWhitespaceTokenizer
+
+
+@given(
+    pairs=st.lists(st.tuples(st.text(alphabet="abcd", max_size=80), st.text(alphabet="abcd", max_size=80))),
+    max_distance=st.none() | st.integers(min_value=0, max_value=20),
+    n_threads=st.integers(min_value=1, max_value=4),
+)
+def test_levenshtein_distances_match_levenshtein_distance(
+    pairs: list[tuple[str, str]], max_distance: int | None, n_threads: int
+) -> None:
+    references = [reference for reference, _ in pairs]
+    predictions = [predicted for _, predicted in pairs]
+    distances = levenshtein_distances(references, predictions, max_distance=max_distance, n_threads=n_threads)
+    assert distances == [levenshtein_distance(r, p, max_distance=max_distance) for r, p in pairs]
+
+
+@pytest.mark.parametrize("engine", ["auto", "myers"])
+def test_levenshtein_distances_with_max_distance(engine: DistanceEngine) -> None:
+    references = ["kitten", "flaw", "saturday", "a", "abc" * 100]
+    predictions = ["sitting", "lawn", "sunday", "a" * 10, "abc" * 99 + "abd"]
+    distances = levenshtein_distances(references, predictions, max_distance=2, engine=engine)
+    assert distances == [None, 2, None, None, 1]
+
+
+def test_levenshtein_distances_with_tokenizer() -> None:
+    distances = levenshtein_distances(["a b c", "a b"], ["a x c", "a b"], tokenizer=SplitAtWhitespaceTokenizer())
+    assert distances == [1, 0]
+
+
+def test_levenshtein_distances_with_no_pairs() -> None:
+    assert levenshtein_distances([], []) == []
+
+
+def test_levenshtein_distances_with_different_number_of_strings() -> None:
+    with pytest.raises(ValueError):
+        levenshtein_distances(["a", "b"], ["a"])
+
+
+@pytest.mark.parametrize("kwargs", [{"max_distance": -1}, {"n_threads": 0}, {"engine": "needleman-wunsch"}])
+def test_levenshtein_distances_with_invalid_arguments(kwargs: dict[str, object]) -> None:
+    with pytest.raises(ValueError):
+        levenshtein_distances(["a"], ["b"], **kwargs)  # type: ignore[call-overload]
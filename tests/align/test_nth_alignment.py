@@ -0,0 +1,28 @@
+import hypothesis.strategies as st
+import pytest
+from hypothesis import given
+from stringalign.align import Deleted, Inserted, Kept, count_optimal_alignments, find_all_alignments, nth_alignment
+from stringalign.tokenize import SplitAtWhitespaceTokenizer
+
+
+@given(reference=st.text(alphabet="abc", max_size=7), predicted=st.text(alphabet="abc", max_size=7))
+def test_matches_find_all_alignments(reference: str, predicted: str) -> None:
+    all_alignments = list(find_all_alignments(reference, predicted))
+    assert [nth_alignment(reference, predicted, n) for n in range(len(all_alignments))] == all_alignments
+
+
+@pytest.mark.parametrize("reference, predicted", [("ab", "ba"), ("hello", "helo"), ("", ""), ("abc", "abc")])
+def test_out_of_range(reference: str, predicted: str) -> None:
+    with pytest.raises(IndexError):
+        nth_alignment(reference, predicted, count_optimal_alignments(reference, predicted))
+
+
+def test_negative_n() -> None:
+    with pytest.raises(ValueError):
+        nth_alignment("ab", "ba", -1)
+
+
+def test_with_tokenizer() -> None:
+    tokenizer = SplitAtWhitespaceTokenizer()
+    alignment = nth_alignment("hello world", "world hello", 1, tokenizer=tokenizer)
+    assert alignment == (Inserted("world"), Kept("hello"), Deleted("world"))
@@ -0,0 +1,82 @@
+from collections import Counter
+
+import hypothesis.strategies as st
+import numpy as np
+import pytest
+from hypothesis import given
+from stringalign.align import (
+    InvalidRngError,
+    compute_levenshtein_distance_from_alignment,
+    count_optimal_alignments,
+    find_all_alignments,
+    levenshtein_distance,
+    sample_alignments,
+)
+from stringalign.tokenize import UnicodeWordTokenizer
+
+
+@given(reference=st.text(), predicted=st.text(), random_state=st.integers(min_value=0))
+def test_samples_are_optimal_alignments(reference: str, predicted: str, random_state: int) -> None:
+    distance = levenshtein_distance(reference, predicted)
+    for alignment in sample_alignments(reference, predicted, n_samples=5, random_state=random_state):
+        assert compute_levenshtein_distance_from_alignment(alignment) == distance
+
+
+@given(reference=st.text(max_size=6), predicted=st.text(max_size=6))
+def test_samples_are_among_all_alignments(reference: str, predicted: str) -> None:
+    all_alignments = set(find_all_alignments(reference, predicted))
+    assert set(sample_alignments(reference, predicted, n_samples=20)) <= all_alignments
+
+
+@pytest.mark.parametrize("n_samples", [0, 1, 10])
+def test_number_of_samples(n_samples: int) -> None:
+    assert len(sample_alignments("hello", "helo", n_samples=n_samples)) == n_samples
+
+
+@pytest.mark.parametrize(
+    "reference, predicted",
+    [
+        ("ab", "ba"),
+        ("aaaa", "aa"),
+        ("aab", "bba"),
+    ],
+)
+def test_samples_are_uniformly_distributed(reference: str, predicted: str) -> None:
+    """Every optimal alignment should be drawn with the same probability.
+
+    For ``"aaaa"`` and ``"aa"``, choosing a random optimal predecessor in each step would draw two of the six optimal
+    alignments with probability 1/4 and the others with probability 1/8.
+    """
+    n_alignments = count_optimal_alignments(reference, predicted)
+    n_samples = 2000 * n_alignments
+    counts = Counter(sample_alignments(reference, predicted, n_samples=n_samples, random_state=0))
+
+    assert set(counts) == set(find_all_alignments(reference, predicted))
+    expected = n_samples / n_alignments
+    chi_squared = sum((count - expected) ** 2 / expected for count in counts.values())
+    # The 99.9% quantile of the chi-squared distribution with at most 20 degrees of freedom is below 50
+    assert n_alignments <= 21
+    assert chi_squared < 50
+
+
+def test_same_samples_for_same_random_state() -> None:
+    samples = sample_alignments("aab", "bba", n_samples=10, random_state=1)
+    assert sample_alignments("aab", "bba", n_samples=10, random_state=1) == samples
+    assert sample_alignments("aab", "bba", n_samples=10, random_state=np.random.default_rng(1)) == samples
+    assert sample_alignments("aab", "bba", n_samples=10, random_state=2) != samples
+
+
+def test_sample_alignments_uses_tokenizer() -> None:
+    alignments = sample_alignments("hello hello world", "hello world", tokenizer=UnicodeWordTokenizer(), n_samples=20)
+    assert all(len(alignment) == 3 for alignment in alignments)
+
+
+def test_negative_n_samples_raises() -> None:
+    with pytest.raises(ValueError, match="n_samples"):
+        sample_alignments("abc", "abd", n_samples=-1)
+
+
+@pytest.mark.parametrize("invalid_random_state", ["not a valid rng", np.inf, []])
+def test_invalid_random_state_raises(invalid_random_state) -> None:
+    with pytest.raises(InvalidRngError):
+        sample_alignments("abc", "abd", random_state=invalid_random_state)
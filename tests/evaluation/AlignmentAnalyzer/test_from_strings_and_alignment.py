@@ -0,0 +1,30 @@
+from typing import TYPE_CHECKING
+
+import pytest
+from stringalign.align import align_strings
+from stringalign.evaluate import AlignmentAnalyzer
+from stringalign.tokenize import DEFAULT_TOKENIZER, UnicodeWordTokenizer
+
+if TYPE_CHECKING:
+    from collections.abc import Hashable
+
+
+@pytest.mark.parametrize(
+    "reference, predicted",
+    [
+        ("Hello, world!", "Hello, world!"),
+        ("Hello, world!", "Hallo, world"),
+        ("", ""),
+        ("aa", "a"),
+    ],
+)
+@pytest.mark.parametrize("tokenizer", [DEFAULT_TOKENIZER, UnicodeWordTokenizer()])
+def test_from_strings_and_alignment_matches_from_strings(reference: str, predicted: str, tokenizer) -> None:
+    alignment, unique = align_strings(reference, predicted, tokenizer=tokenizer)
+    metadata: dict[Hashable, Hashable] = {"id": 1}
+
+    result = AlignmentAnalyzer.from_strings_and_alignment(
+        reference, predicted, alignment, unique, tokenizer=tokenizer, metadata=metadata
+    )
+
+    assert result == AlignmentAnalyzer.from_strings(reference, predicted, tokenizer=tokenizer, metadata=metadata)
@@ -0,0 +1,19 @@
+import pytest
+from stringalign.evaluate import AlignmentAnalyzer
+from stringalign.tokenize import DEFAULT_TOKENIZER, UnicodeWordTokenizer
+
+
+@pytest.mark.parametrize(
+    "reference, predicted, tokenizer, count",
+    [
+        ("Hello, world!", "Hello, world!", DEFAULT_TOKENIZER, 1),
+        ("Hello, world!", "Helo, world!", DEFAULT_TOKENIZER, 2),
+        ("Hello, world!", "Hello world!", UnicodeWordTokenizer(), 1),
+        ("aaaa", "aaa", DEFAULT_TOKENIZER, 4),
+    ],
+)
+def test_optimal_alignment_count(reference: str, predicted: str, tokenizer, count: int) -> None:
+    alignment_analyzer = AlignmentAnalyzer.from_strings(reference, predicted, tokenizer=tokenizer)
+
+    assert alignment_analyzer.optimal_alignment_count == count
+    assert (alignment_analyzer.optimal_alignment_count == 1) == alignment_analyzer.unique_alignment
@@ -0,0 +1,55 @@
+from collections import Counter, defaultdict
+
+import pytest
+from stringalign.align import AlignmentOperation, Deleted, Inserted, Kept, Replaced, find_all_alignments
+from stringalign.evaluate import MultiAlignmentAnalyzer
+
+
+def _all_edit_counts(reference: str, predicted: str) -> list[Counter]:
+    return [
+        Counter(operation for operation in alignment if not isinstance(operation, Kept))
+        for alignment in find_all_alignments(reference, predicted)
+    ]
+
+
+def test_expected_edit_counts_match_all_alignments() -> None:
+    """The expected edit counts and variances should match the counts over all optimal alignments of each sample."""
+    references = ["ab", "aab", "hello"]
+    predictions = ["ba", "bba", "helo"]
+    evaluator = MultiAlignmentAnalyzer.from_strings(references=references, predictions=predictions)
+
+    expected_counts: defaultdict[AlignmentOperation, float] = defaultdict(float)
+    variances: defaultdict[AlignmentOperation, float] = defaultdict(float)
+    for reference, predicted in zip(references, predictions):
+        all_counts = _all_edit_counts(reference, predicted)
+        operations = set().union(*all_counts)
+        for operation in operations:
+            counts = [edit_counts[operation] for edit_counts in all_counts]
+            mean = sum(counts) / len(counts)
+            expected_counts[operation] += mean
+            variances[operation] += sum((count - mean) ** 2 for count in counts) / len(counts)
+
+    assert evaluator.expected_edit_counts.keys() == expected_counts.keys()
+    assert evaluator.edit_count_variances.keys() == variances.keys()
+    for operation, expected_count in expected_counts.items():
+        assert evaluator.expected_edit_counts[operation] == pytest.approx(expected_count)
+        assert evaluator.edit_count_variances[operation] == pytest.approx(variances[operation], abs=1e-12)
+
+
+def test_expected_edit_counts_with_unique_alignments() -> None:
+    """With unique alignments, the expected edit counts are the edit counts and the variances are zero."""
+    evaluator = MultiAlignmentAnalyzer.from_strings(references=["ab", "abc"], predictions=["Ab", "a"])
+
+    assert evaluator.expected_edit_counts == {
+        Replaced(reference="a", predicted="A"): 1,
+        Deleted(substring="b"): 1,
+        Deleted(substring="c"): 1,
+    }
+    assert all(variance == 0 for variance in evaluator.edit_count_variances.values())
+
+
+def test_expected_edit_counts_without_kept_operations() -> None:
+    evaluator = MultiAlignmentAnalyzer.from_strings(references=["abc", "ab"], predictions=["abcd", "ba"])
+
+    assert not any(isinstance(operation, Kept) for operation in evaluator.expected_edit_counts)
+    assert evaluator.expected_edit_counts[Inserted(substring="d")] == pytest.approx(1)
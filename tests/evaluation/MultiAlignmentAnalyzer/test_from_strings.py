@@ -0,0 +1,44 @@
+from typing import TYPE_CHECKING
+
+import pytest
+from stringalign.evaluate import MultiAlignmentAnalyzer
+
+if TYPE_CHECKING:
+    from collections.abc import Hashable
+
+
+@pytest.mark.parametrize("n_threads", [2, 4])
+def test_from_strings_with_threads_matches_single_thread(n_threads: int) -> None:
+    references = ["ab", "abc", "The quick brown fox", "jumps over the lazy dog" * 10]
+    predictions = ["Ab", "a", "The quikc brown fx", "jumps ovr the lazy dog" * 10]
+    metadata: list[dict[Hashable, Hashable]] = [{"id": i} for i in range(len(references))]
+
+    single_threaded = MultiAlignmentAnalyzer.from_strings(references, predictions, metadata=metadata)
+    multi_threaded = MultiAlignmentAnalyzer.from_strings(
+        references, predictions, metadata=metadata, n_threads=n_threads
+    )
+
+    assert multi_threaded.references == single_threaded.references
+    assert multi_threaded.predictions == single_threaded.predictions
+    for multi, single in zip(multi_threaded.alignment_analyzers, single_threaded.alignment_analyzers, strict=True):
+        assert multi.raw_alignment == single.raw_alignment
+        assert multi.unique_alignment == single.unique_alignment
+        assert multi.metadata == single.metadata
+
+
+def test_from_strings_with_invalid_n_threads_raises() -> None:
+    with pytest.raises(ValueError, match="n_threads"):
+        MultiAlignmentAnalyzer.from_strings(["a"], ["b"], n_threads=0)
+
+
+def test_from_strings_with_anchored_engine() -> None:
+    """Whole documents with merged lines should get as many edits as with the regular engine."""
+    reference = "\n".join(f"This is line number {i} of the reference document." for i in range(200))
+    prediction = reference.replace("line number 17 of the reference document.\n", "line nunber 17 of the ").replace(
+        "document", "docunent", 3
+    )
+
+    anchored = MultiAlignmentAnalyzer.from_strings([reference], [prediction], engine="anchored", n_threads=2)
+    regular = MultiAlignmentAnalyzer.from_strings([reference], [prediction])
+
+    assert sum(anchored.edit_counts["raw"].values()) == sum(regular.edit_counts["raw"].values())
@@ -4,7 +4,16 @@ from typing import Literal
 import hypothesis.strategies as st
 import pytest
 from hypothesis import given
-from stringalign.normalize import StringNormalizer
+from stringalign.normalize import (
+    StringNormalizer,
+    load_confusable_map,
+    normalize_whitespace,
+    remove_non_word_characters,
+    remove_whitespace,
+    resolve_confusables,
+)
+
+from tests.strategies import string_normalizers
 
 
 @given(string=st.text(alphabet=st.characters()))  # Specify st.characters to get invalid utf-8 code-points
@@ -222,3 +231,47 @@ def test_intentional_txt_is_used():
     """
     normalizer = StringNormalizer(resolve_confusables="intentional")
     assert normalizer("\u2374") == "\u03c1"
+
+
+def _normalize_with_every_step(normalizer: StringNormalizer, text: str) -> str:
+    """Apply every step of the normalizer, including the steps that the compiled plan skips."""
+    if isinstance(normalizer.resolve_confusables, dict):
+        text = resolve_confusables(text, normalizer.resolve_confusables)
+    elif normalizer.resolve_confusables is not None:
+        text = resolve_confusables(text, load_confusable_map(normalizer.resolve_confusables))
+    if normalizer.case_insensitive:
+        text = text.casefold()
+    if normalizer.normalization is not None:
+        text = unicodedata.normalize(normalizer.normalization, text)
+    if normalizer.case_insensitive:
+        text = text.casefold()
+    if normalizer.normalize_whitespace:
+        text = normalize_whitespace(text)
+    if normalizer.remove_whitespace:
+        text = remove_whitespace(text)
+    if normalizer.remove_non_word_characters:
+        text = remove_non_word_characters(text)
+    if normalizer.normalization is not None:
+        text = unicodedata.normalize(normalizer.normalization, text)
+    return text
+
+
+@given(string=st.text(alphabet=st.characters()), normalizer=string_normalizers())
+def test_compiled_plan_gives_same_result_as_every_step(string: str, normalizer: StringNormalizer) -> None:
+    """Skipping the steps that cannot change the text does not change the result."""
+    assert normalizer(string) == _normalize_with_every_step(normalizer, string)
+
+
+@given(string=st.text(alphabet="abcAB \u2374"))
+def test_compiled_plan_gives_same_result_as_every_step_with_custom_confusable_map(string: str) -> None:
+    normalizer = StringNormalizer(resolve_confusables={"a": "b", "\u2374": "p"}, case_insensitive=True)
+    assert normalizer(string) == _normalize_with_every_step(normalizer, string)
+
+
+def test_changed_setting_is_used() -> None:
+    """The plan is compiled again if a setting is changed after the normalizer is created."""
+    normalizer = StringNormalizer()
+    assert normalizer("Hello") == "Hello"
+
+    normalizer.case_insensitive = True
+    assert normalizer("Hello") == "hello"
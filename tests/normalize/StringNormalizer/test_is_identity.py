@@ -0,0 +1,33 @@
+from typing import Any
+
+import pytest
+from stringalign.normalize import StringNormalizer
+
+
+def test_normalizer_without_steps_is_identity() -> None:
+    assert StringNormalizer(normalization=None).is_identity
+
+
+def test_default_normalizer_is_not_identity() -> None:
+    assert not StringNormalizer().is_identity
+
+
+@pytest.mark.parametrize(
+    "settings",
+    [
+        {"case_insensitive": True},
+        {"normalize_whitespace": True},
+        {"remove_whitespace": True},
+        {"remove_non_word_characters": True},
+        {"resolve_confusables": {"a": "b"}},
+    ],
+)
+def test_normalizer_with_steps_is_not_identity(settings: dict[str, Any]) -> None:
+    assert not StringNormalizer(normalization=None, **settings).is_identity
+
+
+def test_changed_setting_updates_is_identity() -> None:
+    normalizer = StringNormalizer(normalization=None)
+    normalizer.normalization = "NFC"
+
+    assert not normalizer.is_identity
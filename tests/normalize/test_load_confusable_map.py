@@ -0,0 +1,20 @@
+import json
+from pathlib import Path
+
+import pytest
+import stringalign
+from stringalign.normalize import load_confusable_map
+
+
+@pytest.mark.parametrize("confusable_type", ["confusables", "intentional"])
+def test_same_map_as_json_file(confusable_type: str) -> None:
+    """The map created from the precompiled table is the same as the map in the JSON file"""
+    json_file = Path(stringalign.__file__).with_name("unicode_data") / f"{confusable_type}.json"
+    with json_file.open(encoding="utf-8") as f:
+        assert load_confusable_map(confusable_type) == json.load(f)  # type: ignore[arg-type]
+
+
+def test_invalid_confusable_type() -> None:
+    """Only the Unicode confusables and intentional confusables can be loaded"""
+    with pytest.raises(ValueError):
+        load_confusable_map("unknown")  # type: ignore[arg-type]
@@ -1,4 +1,6 @@
-from stringalign.normalize import resolve_confusables
+import hypothesis.strategies as st
+from hypothesis import given
+from stringalign.normalize import _resolve_confusables_in_python, load_confusable_map, resolve_confusables
 
 
 def test_simple_example() -> None:
@@ -17,5 +19,34 @@ def test_multi_token_input() -> None:
     assert resolve_confusables(example_text, confusables) == expected_output
 
 
+def test_longest_confusable_is_resolved() -> None:
+    """The longest confusable that starts at a position is replaced, and replacements are not replaced again"""
+    confusables = {"a": "b", "ab": "x", "b": "a"}
+    assert resolve_confusables("abab", confusables) == "xx"
+    assert resolve_confusables("aab", confusables) == "bx"
+    assert resolve_confusables("ba", confusables) == "ab"
+
+
+def test_text_with_lone_surrogate() -> None:
+    """Text that cannot be encoded as UTF-8 is resolved like other text"""
+    assert resolve_confusables("a\ud800ab", {"a": "b", "ab": "x"}) == "b\ud800x"
+
+
+@given(
+    text=st.text(alphabet=st.sampled_from("abcρ𝐀\u0301 ")),
+    confusables=st.dictionaries(st.text(alphabet="abcρ𝐀\u0301 ", max_size=3), st.text(alphabet="xyz", max_size=2)),
+)
+def test_same_result_as_python_fallback(text: str, confusables: dict[str, str]) -> None:
+    """The compiled matcher resolves the confusables like the pure Python implementation"""
+    assert resolve_confusables(text, confusables) == _resolve_confusables_in_python(text, confusables)
+
+
+@given(text=st.text(alphabet=st.characters(blacklist_categories=["Cs"])))
+def test_same_result_as_python_fallback_for_unicode_confusables(text: str) -> None:
+    """The compiled matcher resolves the Unicode confusables like the pure Python implementation"""
+    confusables = load_confusable_map("confusables")
+    assert resolve_confusables(text, confusables) == _resolve_confusables_in_python(text, confusables)
+
+
 # Note: The tests for the StringNormalizer class test various aspects of confusable resolving also
 # but we keep this file as a simple example of how the resolve_confusables-function works.
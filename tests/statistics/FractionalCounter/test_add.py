@@ -0,0 +1,40 @@
+from collections import Counter
+
+import hypothesis.strategies as st
+import pytest
+from hypothesis import given
+from stringalign.statistics import FractionalCounter
+
+counts = st.dictionaries(st.sampled_from("abcd"), st.floats(min_value=0, max_value=10))
+integer_counts = st.dictionaries(st.sampled_from("abcd"), st.integers(min_value=1, max_value=10))
+
+
+@given(first=counts, second=counts)
+def test_add_sums_the_counts_of_each_key(first: dict[str, float], second: dict[str, float]) -> None:
+    total = FractionalCounter(first) + FractionalCounter(second)
+
+    assert isinstance(total, FractionalCounter)
+    assert total.keys() == first.keys() | second.keys()
+    for key in total:
+        assert total[key] == pytest.approx(first.get(key, 0) + second.get(key, 0))
+
+
+@given(fractional=counts, integer=integer_counts)
+def test_add_with_counter(fractional: dict[str, float], integer: dict[str, int]) -> None:
+    expected = FractionalCounter(fractional) + FractionalCounter(integer)
+
+    assert FractionalCounter(fractional) + Counter(integer) == expected
+    assert isinstance(Counter(integer) + FractionalCounter(fractional), FractionalCounter)
+    assert Counter(integer) + FractionalCounter(fractional) == pytest.approx(expected)
+
+
+def test_missing_keys_have_zero_count() -> None:
+    counter = FractionalCounter({"a": 0.5})
+
+    assert counter["b"] == 0
+    assert "b" not in counter
+
+
+def test_add_with_non_mapping_raises() -> None:
+    with pytest.raises(TypeError):
+        FractionalCounter({"a": 0.5}) + 1  # type: ignore[operator]
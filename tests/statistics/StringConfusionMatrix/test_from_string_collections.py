@@ -1,5 +1,6 @@
 from collections import Counter
 
+import pytest
 from stringalign.align import align_strings
 from stringalign.statistics import StringConfusionMatrix
 
@@ -17,3 +18,19 @@ def test_confusion_matrix_is_sum_of_confusion_matrices() -> None:
     ) + StringConfusionMatrix.from_strings_and_alignment(references[1], predictions[1], alignment2)
 
     assert result1 == result2
+
+
+@pytest.mark.parametrize("n_threads", [2, 4])
+def test_confusion_matrix_with_threads_matches_single_thread(n_threads: int) -> None:
+    references = ["abcbaa", "xyz", "The quick brown fox" * 10, ""]
+    predictions = ["acdeai", "xyy", "The quikc brown fx" * 10, "a"]
+
+    result1 = StringConfusionMatrix.from_string_collections(references, predictions)
+    result2 = StringConfusionMatrix.from_string_collections(references, predictions, n_threads=n_threads)
+
+    assert result1 == result2
+
+
+def test_confusion_matrix_with_invalid_n_threads_raises() -> None:
+    with pytest.raises(ValueError, match="n_threads"):
+        StringConfusionMatrix.from_string_collections(["a"], ["b"], n_threads=0)
@@ -1,7 +1,10 @@
 from collections import Counter
+from typing import Literal
 
+import numpy as np
+import pytest
 from stringalign.align import align_strings
-from stringalign.statistics import StringConfusionMatrix
+from stringalign.statistics import FractionalCounter, StringConfusionMatrix
 
 
 def test_from_strings() -> None:
@@ -23,3 +26,69 @@ def test_from_strings_empty() -> None:
     assert result.false_positives == Counter()
     assert result.false_negatives == Counter()
     assert result.edit_counts == Counter()
+
+
+def test_from_strings_with_max_distance() -> None:
+    reference = "abcbaa"
+    predicted = "acdeai"
+
+    result1 = StringConfusionMatrix.from_strings(reference, predicted)
+    result2 = StringConfusionMatrix.from_strings(reference, predicted, max_distance=1)
+
+    assert result1 == result2
+
+
+def test_from_strings_expected_alignment_with_unique_alignment() -> None:
+    """With a unique alignment, the expected counts should be the counts for that alignment."""
+    reference = "abcdb"
+    predicted = "abxdbe"
+    assert align_strings(reference, predicted)[1]
+
+    result = StringConfusionMatrix.from_strings(reference, predicted, alignment="expected")
+
+    assert result == StringConfusionMatrix.from_strings(reference, predicted)
+
+
+def test_from_strings_expected_alignment_averages_over_alignments() -> None:
+    """The optimal alignments of "ab" and "ba" are "RR", "DKI" and "IKD", so every count is a third."""
+    result = StringConfusionMatrix.from_strings("ab", "ba", alignment="expected")
+
+    assert result.true_positives == pytest.approx({"a": 1 / 3, "b": 1 / 3})
+    assert result.false_positives == pytest.approx({"a": 2 / 3, "b": 2 / 3})
+    assert result.false_negatives == pytest.approx({"a": 2 / 3, "b": 2 / 3})
+    assert sum(result.edit_counts.values()) == pytest.approx(2)
+
+
+def test_from_strings_expected_alignment_has_fractional_counters() -> None:
+    result = StringConfusionMatrix.from_strings("ab", "ba", alignment="expected")
+
+    assert isinstance(result.true_positives, FractionalCounter)
+    assert isinstance(result.false_positives, FractionalCounter)
+    assert isinstance(result.false_negatives, FractionalCounter)
+    assert isinstance(result.edit_counts, FractionalCounter)
+
+    total = StringConfusionMatrix.from_strings("ab", "ab") + result
+    assert isinstance(total.true_positives, FractionalCounter)
+    assert total.true_positives == pytest.approx({"a": 4 / 3, "b": 4 / 3})
+
+
+def test_from_strings_invalid_alignment() -> None:
+    with pytest.raises(ValueError, match="Invalid alignment"):
+        StringConfusionMatrix.from_strings("ab", "ba", alignment="not an alignment")  # type: ignore[arg-type]
+
+
+@pytest.mark.parametrize("alignment", ["single", "expected"])
+def test_from_strings_with_tokens_and_token_ids(alignment: Literal["single", "expected"]) -> None:
+    reference = "abcbaa"
+    predicted = "acdeai"
+    expected = StringConfusionMatrix.from_strings(reference, predicted, alignment=alignment)
+
+    from_tokens = StringConfusionMatrix.from_strings(list(reference), list(predicted), alignment=alignment)
+    from_token_ids = StringConfusionMatrix.from_strings(
+        np.array([ord(c) for c in reference]), np.array([ord(c) for c in predicted]), alignment=alignment
+    )
+
+    assert from_tokens == expected
+    assert from_token_ids.true_positives == {str(ord(c)): n for c, n in expected.true_positives.items()}
+    assert from_token_ids.false_positives == {str(ord(c)): n for c, n in expected.false_positives.items()}
+    assert from_token_ids.false_negatives == {str(ord(c)): n for c, n in expected.false_negatives.items()}
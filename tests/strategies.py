@@ -1,4 +1,5 @@
 import hypothesis.strategies as st
+from stringalign.normalize import StringNormalizer
 
 
 @st.composite
@@ -8,3 +9,16 @@ def different_text_strings(draw):
     # Generate the second string, ensuring it's different from the first
     second_string = draw(st.text().filter(lambda x: x != first_string))
     return first_string, second_string
+
+
+@st.composite
+def string_normalizers(draw):
+    """String normalizers with every combination of settings."""
+    return StringNormalizer(
+        resolve_confusables=draw(st.sampled_from([None, "confusables", "intentional"])),
+        normalization=draw(st.sampled_from(["NFC", "NFD", "NFKC", "NFKD", None])),
+        case_insensitive=draw(st.booleans()),
+        normalize_whitespace=draw(st.booleans()),
+        remove_whitespace=draw(st.booleans()),
+        remove_non_word_characters=draw(st.booleans()),
+    )
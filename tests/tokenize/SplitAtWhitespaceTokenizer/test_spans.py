@@ -0,0 +1,34 @@
+import hypothesis
+import hypothesis.strategies as st
+import numpy as np
+from stringalign.normalize import StringNormalizer
+from stringalign.tokenize import SplitAtWhitespaceTokenizer
+
+from tests.strategies import string_normalizers
+
+
+def test_simple_example() -> None:
+    spans = SplitAtWhitespaceTokenizer().spans("  Hello\tWorld ")
+    assert spans.dtype == np.int32
+    assert spans.tolist() == [[2, 7], [8, 13]]
+
+
+def test_empty_text() -> None:
+    assert SplitAtWhitespaceTokenizer().spans("").shape == (0, 2)
+
+
+@hypothesis.given(
+    text=st.text(alphabet=st.one_of(st.characters(), st.sampled_from("aA ßΣ\u0301\u0327\t_-!"))),
+    pre_tokenization_normalizer=string_normalizers(),
+    post_tokenization_normalizer=string_normalizers(),
+)
+def test_spans_give_the_tokens(
+    text: str,
+    pre_tokenization_normalizer: StringNormalizer,
+    post_tokenization_normalizer: StringNormalizer,
+) -> None:
+    """Normalizing the slices of the normalized text gives the same tokens as calling the tokenizer"""
+    tokenizer = SplitAtWhitespaceTokenizer(pre_tokenization_normalizer, post_tokenization_normalizer)
+    normalized = pre_tokenization_normalizer(text)
+    tokens = [post_tokenization_normalizer(normalized[start:end]) for start, end in tokenizer.spans(text)]
+    assert tokens == tokenizer(text)
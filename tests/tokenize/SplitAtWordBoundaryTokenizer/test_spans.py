@@ -0,0 +1,69 @@
+from unittest.mock import Mock
+
+import hypothesis
+import hypothesis.strategies as st
+import numpy as np
+import pytest
+import stringalign.tokenize
+from stringalign.normalize import StringNormalizer
+from stringalign.tokenize import SplitAtWordBoundaryTokenizer
+
+from tests.strategies import string_normalizers
+
+
+def test_simple_example() -> None:
+    spans = SplitAtWordBoundaryTokenizer().spans("Hello World")
+    assert spans.dtype == np.int32
+    assert spans.tolist() == [[0, 5], [5, 6], [6, 11]]
+
+
+def test_whitespace_tokens_are_removed_without_normalizing_tokens_in_python(monkeypatch: pytest.MonkeyPatch) -> None:
+    post_tokenization_normalizer = StringNormalizer(remove_non_word_characters=True)
+    tokenizer = SplitAtWordBoundaryTokenizer(
+        post_tokenization_normalizer=post_tokenization_normalizer, remove_whitespace=True
+    )
+
+    def normalize(self: StringNormalizer, text: str) -> str:
+        assert self is not post_tokenization_normalizer, "The tokens should not be normalized in Python"
+        return text
+
+    monkeypatch.setattr(StringNormalizer, "__call__", normalize)
+    monkeypatch.setattr(stringalign.tokenize, "_normalized_tokens", Mock(side_effect=AssertionError("Created tokens")))
+    assert tokenizer.spans("Hello,  World!").tolist() == [[0, 5], [8, 13]]
+
+
+class UpperCaseNormalizer(StringNormalizer):
+    def __call__(self, text: str) -> str:
+        return text.upper()
+
+
+def test_whitespace_tokens_are_removed_with_normalizer_subclass() -> None:
+    tokenizer = SplitAtWordBoundaryTokenizer(post_tokenization_normalizer=UpperCaseNormalizer(), remove_whitespace=True)
+    assert tokenizer.spans("Hello  World!").tolist() == [[0, 5], [7, 12], [12, 13]]
+
+
+def test_empty_text() -> None:
+    assert SplitAtWordBoundaryTokenizer().spans("").shape == (0, 2)
+
+
+@hypothesis.given(
+    text=st.text(
+        alphabet=st.one_of(st.characters(blacklist_categories=["Cs"]), st.sampled_from("aA ßΣ\u0301\u0327\t_-!"))
+    ),
+    pre_tokenization_normalizer=string_normalizers(),
+    post_tokenization_normalizer=string_normalizers(),
+    remove_whitespace=st.booleans(),
+)
+def test_spans_give_the_tokens(
+    text: str,
+    pre_tokenization_normalizer: StringNormalizer,
+    post_tokenization_normalizer: StringNormalizer,
+    remove_whitespace: bool,
+) -> None:
+    """Normalizing the slices of the normalized text gives the same tokens as calling the tokenizer"""
+    tokenizer = SplitAtWordBoundaryTokenizer(
+        pre_tokenization_normalizer, post_tokenization_normalizer, remove_whitespace=remove_whitespace
+    )
+    normalized = pre_tokenization_normalizer(text)
+    tokens = [post_tokenization_normalizer(normalized[start:end]) for start, end in tokenizer.spans(text)]
+    assert tokens == tokenizer(text)
@@ -1,7 +1,11 @@
 import hypothesis
 import hypothesis.strategies as st
+import stringalign._stringutils
+from stringalign.normalize import StringNormalizer
 from stringalign.tokenize import UnicodeWordTokenizer
 
+from tests.strategies import string_normalizers
+
 word_separator_whitespace_strategy = st.characters(
     categories=["Zs"],
     exclude_characters=["\u202f", "\u00a0"],
@@ -45,3 +49,18 @@ def test_tokens_are_atomic(text):
         ]
         for token in tokens
     )
+
+
+@hypothesis.given(
+    text=st.text(
+        alphabet=st.one_of(st.characters(blacklist_categories=["Cs"]), st.sampled_from("aA ßΣ\u0301\u0327\t_-!"))
+    ),
+    normalizer=string_normalizers(),
+)
+def test_same_tokens_as_normalizing_each_token_in_python(text: str, normalizer: StringNormalizer) -> None:
+    """The tokens that are normalized in Rust are the same as the tokens normalized by the Python normalizer."""
+    tokenizer = UnicodeWordTokenizer(
+        pre_tokenization_normalizer=StringNormalizer(normalization=None), post_tokenization_normalizer=normalizer
+    )
+    expected = [normalizer(token) for token in stringalign._stringutils.unicode_words(text)]
+    assert tokenizer(text) == expected
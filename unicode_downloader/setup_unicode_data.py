@@ -1,6 +1,8 @@
 import argparse
+import array
 import csv
 import json
+import sys
 from pathlib import Path
 from typing import TYPE_CHECKING
 
@@ -83,6 +85,29 @@ def build_confusable_map(confusables: list[CodePointDict]) -> dict[str, str]:
     return {k: confusable_map[k] for k in sorted(confusable_map.keys())}
 
 
+def build_confusable_table(confusable_map: dict[str, str]) -> bytes:
+    """Build the precompiled table of a confusable map with single code point keys.
+
+    The table starts with an array of little-endian 32-bit unsigned integers with the number of confusables, the sorted
+    code points of the confusables and the byte offsets of their replacements, which follow as UTF-8. The replacement of
+    the i-th confusable is the bytes from offset i to offset i + 1. The table is embedded in the Rust extension, so the
+    confusables can be resolved and ``load_confusable_map`` can create the map without parsing the JSON file.
+    """
+    keys = sorted(confusable_map)
+    assert all(len(key) == 1 for key in keys)
+
+    replacements = [confusable_map[key].encode("utf-8") for key in keys]
+    offsets = [0]
+    for replacement in replacements:
+        offsets.append(offsets[-1] + len(replacement))
+
+    header = array.array("I", [len(keys), *map(ord, keys), *offsets])
+    assert header.itemsize == 4
+    if sys.byteorder == "big":
+        header.byteswap()
+    return header.tobytes() + b"".join(replacements)
+
+
 def test_build_confusable_map(confusables: list[CodePointDict]) -> None:
     confusable_map = build_confusable_map(confusables)
 
@@ -129,6 +154,8 @@ def main() -> None:
     (PATH / "intentional.txt").write_text(intentional_raw)
     (PATH / "confusables.json").write_text(json.dumps(confusable_map, ensure_ascii=False), encoding="utf-8")
     (PATH / "intentional.json").write_text(json.dumps(intentional_map, ensure_ascii=False), encoding="utf-8")
+    (PATH / "confusables.bin").write_bytes(build_confusable_table(confusable_map))
+    (PATH / "intentional.bin").write_bytes(build_confusable_table(intentional_map))
     (PATH / "version.txt").write_text(args.version, encoding="utf-8")
 
 